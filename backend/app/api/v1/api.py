@@ -1,5 +1,6 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import signals
+from app.api.v1.endpoints import analytics, signals
 
 api_router = APIRouter()
 api_router.include_router(signals.router, prefix="/signals", tags=["signals"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
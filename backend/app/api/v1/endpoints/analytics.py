@@ -0,0 +1,51 @@
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional
+from app.core.config import settings
+from app.services.signal_store import signal_store
+
+router = APIRouter()
+
+@router.get("/signals/{token}")
+async def get_signal_history(
+    token: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(1000, ge=1, le=settings.ANALYTICS_MAX_ROWS),
+) -> List[dict]:
+    """
+    Stored signals for a token over time, newest first.
+    """
+    try:
+        return await signal_store.history(token, start, end, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/hit-rate")
+async def get_hit_rate(
+    bucket_width: float = Query(0.5, gt=0),
+    horizon_days: int = Query(7, ge=1, le=90),
+    exchange: Optional[str] = None,
+) -> List[dict]:
+    """
+    How often the expected move direction was realized, per UIS bucket.
+    """
+    try:
+        return await signal_store.hit_rate(bucket_width, horizon_days, exchange)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/realized")
+async def get_realized_moves(
+    token: Optional[str] = None,
+    horizon_days: int = Query(7, ge=1, le=90),
+    exchange: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=settings.ANALYTICS_MAX_ROWS),
+) -> List[dict]:
+    """
+    Expected vs realized price move for each scored unlock with candles on both sides.
+    """
+    try:
+        return await signal_store.realized(token, horizon_days, exchange, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
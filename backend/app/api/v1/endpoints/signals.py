@@ -1,31 +1,158 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
-from app.engine.calculator import signal_engine, TradeSignal
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from app.core.config import settings
+from app.engine.calculator import TradeSignal
+from app.engine.columnar import ARROW_MEDIA_TYPE, JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE
+from app.engine.pipeline import score_events, score_events_bulk
+from app.engine.simulation import simulate_events
+from app.services.broadcaster import broadcaster
+from app.services.snapshot import snapshot_service
 from app.services.unlocks import unlock_service
-from app.services.onchain import onchain_service
 
 router = APIRouter()
 
 @router.get("/dashboard", response_model=List[TradeSignal])
-async def get_dashboard_signals():
+async def get_dashboard_signals(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=settings.DASHBOARD_MAX_LIMIT),
+):
     """
     Get signals for upcoming major unlocks.
+    The default view is served from the shared snapshot (ETag / If-None-Match aware);
+    a custom limit is scored live, concurrently, with slow events degraded.
     """
+    if limit is None or limit == settings.DASHBOARD_LIMIT:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            etag = await snapshot_service.get_etag()
+            if etag and etag == if_none_match:
+                return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+        try:
+            snapshot = await snapshot_service.get_or_refresh()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+        headers = {
+            "ETag": snapshot.etag,
+            "X-Snapshot-Generation": str(snapshot.generation),
+            "Cache-Control": "no-cache",
+        }
+        if if_none_match == snapshot.etag:
+            return Response(status_code=304, headers=headers)
+        return Response(content=snapshot.payload, media_type="application/json", headers=headers)
+
     try:
         # 1. Get Events
-        events = await unlock_service.get_next_major_unlocks(limit=5)
-        
-        signals = []
-        for event in events:
-            # 2. Check Onchain pressure
-            # We assume token address is known or resolvable. Mocking for now.
-            fake_addr = "0x123..." 
-            pressure = await onchain_service.analyze_movement_to_cex(fake_addr)
-            
-            # 3. Generate Signal
-            sig = await signal_engine.generate_signal(event, onchain_confidence=pressure)
-            signals.append(sig)
-            
-        return signals
+        events = await unlock_service.get_next_major_unlocks(limit=limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # 2. Score them in parallel (bounded concurrency, per-event deadline)
+    return await score_events(events)
+
+@router.get("/bulk")
+async def get_bulk_signals(
+    limit: int = Query(1000, ge=1, le=settings.BULK_MAX_LIMIT),
+    horizon_days: Optional[float] = Query(None, gt=0),
+    format: str = Query("json", pattern="^(json|msgpack|arrow)$"),
+):
+    """
+    Signals for up to BULK_MAX_LIMIT upcoming unlocks as column arrays rather than
+    row objects: orjson (default), MessagePack or an Arrow IPC stream. The signal
+    column is dictionary-encoded against `signal_types`.
+    """
+    try:
+        events = await unlock_service.get_next_unlock_records(limit, horizon_days=horizon_days)
+        batch = await score_events_bulk(events)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+    try:
+        if format == "msgpack":
+            return Response(content=batch.to_msgpack(), media_type=MSGPACK_MEDIA_TYPE)
+        if format == "arrow":
+            return Response(content=batch.to_arrow(), media_type=ARROW_MEDIA_TYPE)
+    except ImportError as e:
+        raise HTTPException(status_code=406, detail=f"Format {format} unavailable on this server: {e}")
+    return Response(content=batch.to_json(), media_type=JSON_MEDIA_TYPE)
+
+@router.get("/simulate")
+async def simulate_signals(
+    limit: int = Query(100, ge=1, le=settings.SIM_MAX_EVENTS),
+    horizon_days: Optional[float] = Query(None, gt=0),
+    paths: Optional[int] = Query(None, ge=100, le=settings.SIM_MAX_PATHS),
+    horizons: Optional[List[int]] = Query(None, description="Days after the unlock, e.g. horizons=1&horizons=7"),
+    drawdown_pct: Optional[List[float]] = Query(None, description="Drawdown thresholds in %"),
+    seed: Optional[int] = None,
+):
+    """
+    Scenario mode: Monte Carlo price paths per upcoming unlock, driven by realized
+    volatility, order book absorption and a cliff / linear sell-through schedule.
+    Returns column arrays of return quantiles, mean return and drawdown probabilities
+    per event and horizon.
+    """
+    if horizons and not all(1 <= h <= 365 for h in horizons):
+        raise HTTPException(status_code=422, detail="horizons must be between 1 and 365 days")
+    if drawdown_pct and not all(0 < d < 100 for d in drawdown_pct):
+        raise HTTPException(status_code=422, detail="drawdown_pct must be between 0 and 100")
+    work = limit * (paths or settings.SIM_PATHS) * max(horizons or settings.SIM_HORIZONS_DAYS)
+    if work > settings.SIM_MAX_WORK:
+        raise HTTPException(status_code=422, detail=(
+            f"limit x paths x longest horizon = {work} exceeds {settings.SIM_MAX_WORK}; "
+            "lower one of them"
+        ))
+    try:
+        events = await unlock_service.get_next_unlock_records(limit, horizon_days=horizon_days)
+        result = await simulate_events(events, paths, horizons, drawdown_pct, seed)
+    except TimeoutError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return Response(content=result.to_json(), media_type=JSON_MEDIA_TYPE)
+
+@router.websocket("/stream")
+async def stream_signals_ws(websocket: WebSocket):
+    """
+    Push stream: a full snapshot on connect, then per-token diffs when a
+    token's signal, UIS score or confidence changes.
+    """
+    await websocket.accept()
+    sub = await broadcaster.subscribe()
+    try:
+        while True:
+            message = await sub.queue.get()
+            await websocket.send_text(message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        broadcaster.unsubscribe(sub)
+
+@router.get("/stream")
+async def stream_signals_sse(request: Request):
+    """
+    Server-Sent Events fallback for clients that cannot open a WebSocket.
+    """
+    sub = await broadcaster.subscribe()
+
+    async def events():
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(sub.queue.get(), settings.STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"data: {message}\n\n"
+        finally:
+            broadcaster.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,10 +1,15 @@
+import asyncio
+from typing import Optional
 from celery import Celery
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown
 from app.core.config import settings
 
 celery_app = Celery(
     "antigravity_worker",
     broker=settings.REDIS_URL,
-    backend=settings.REDIS_URL
+    backend=settings.REDIS_URL,
+    # Explicit: autodiscover_tasks(["app.tasks"]) only looks for app.tasks.tasks
+    include=["app.tasks.scheduler", "app.tasks.scoring"],
 )
 
 celery_app.conf.update(
@@ -21,7 +26,49 @@ celery_app.conf.update(
     task_default_queue="default",
     task_default_exchange="default",
     task_default_routing_key="default",
+    # Scoring tasks are idempotent; redeliver them if a worker dies mid-task
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
+    beat_schedule={
+        "score-calendar": {
+            "task": "app.tasks.scoring.score_calendar",
+            "schedule": settings.SCORING_INTERVAL,
+        },
+    },
 )
 
-# Auto-discover tasks in packages
-celery_app.autodiscover_tasks(["app.tasks"])
+@worker_init.connect
+@worker_process_init.connect
+def _own_database(**kwargs):
+    """
+    Point this worker (and, under prefork, each child) away from the API's DuckDB
+    file: DuckDB holds an exclusive lock per process. Worker caches (candles,
+    transfer cursors, the calendar ingested on first use) are per process.
+    """
+    import os
+    from app.core.database import db
+    db.path = settings.DUCKDB_WORKER_PATH.format(pid=os.getpid())
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def run_async(coro):
+    """
+    Run a coroutine on this worker process's persistent event loop. The shared
+    HTTP / Redis clients and exchange connectors are bound to the loop they were
+    first used on, so a fresh asyncio.run() per task would break them.
+    """
+    global _loop
+    if _loop is None or _loop.is_closed():
+        from app.core.http import open_http_client
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+        open_http_client()  # Lives as long as the loop it is bound to
+    return _loop.run_until_complete(coro)
+
+@worker_process_shutdown.connect
+def _close_loop(**kwargs):
+    from app.core.http import close_http_client
+    if _loop is not None and not _loop.is_closed():
+        _loop.run_until_complete(close_http_client())
+        _loop.close()
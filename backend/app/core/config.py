@@ -1,5 +1,6 @@
 import os
-from typing import List, Optional
+from functools import lru_cache
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import AnyHttpUrl, validator
 
@@ -26,6 +27,143 @@ class Settings(BaseSettings):
 
     # Database
     DUCKDB_PATH: str = "data/antigravity.db"
+    DUCKDB_READ_POOL_SIZE: int = 4  # Threads serving async reads; writes go through one writer thread
+    # DuckDB locks its file per process: Celery worker processes use their own database
+    # (in-memory caches by default; a file path may contain {pid})
+    DUCKDB_WORKER_PATH: str = ":memory:"
+    OHLCV_CACHE_ENABLED: bool = True  # Serve candles from DuckDB, fetch only the tail
+
+    # Signal pipeline
+    DASHBOARD_LIMIT: int = 5
+    DASHBOARD_MAX_LIMIT: int = 500
+    SIGNAL_CONCURRENCY: int = 32  # Max events scored in parallel
+    BULK_MAX_LIMIT: int = 5000  # /signals/bulk
+    SIGNAL_EVENT_TIMEOUT: float = 4.0  # Per-event deadline (seconds)
+
+    # Unlock calendar ingestion
+    UNLOCK_INGEST_ENABLED: bool = True
+    UNLOCK_INGEST_INTERVAL: float = 3600.0
+    UNLOCK_WATCHLIST: List[str] = []  # Extra symbols to pull vesting schedules for
+
+    # Dashboard snapshot (computed once per tick, served to every client)
+    SNAPSHOT_REFRESH_ENABLED: bool = True
+    SNAPSHOT_REFRESH_INTERVAL: float = 5.0
+    SNAPSHOT_MAX_AGE: float = 900.0  # Recomputed on read and expired from Redis after this; > REACTIVE_FULL_RESCORE_INTERVAL
+
+    # Reactive rescoring: replaces the snapshot refresher when enabled (one leader across workers)
+    REACTIVE_ENABLED: bool = False
+    REACTIVE_FULL_RESCORE_INTERVAL: float = 300.0  # Whole dashboard, follows calendar changes
+    REACTIVE_BLOCK_POLL_INTERVAL: float = 12.0  # ~1 Ethereum block
+    REACTIVE_INFLOW_USD: float = 100000.0  # CEX inflow since the previous poll that triggers a rescore
+    REACTIVE_PRICE_MOVE_PCT: float = 2.0  # Streamed price vs price at last scoring (needs MARKET_STREAMING)
+    REACTIVE_VOLUME_MOVE_PCT: float = 50.0  # Streamed 24h quote volume vs value at last scoring
+    REACTIVE_DEBOUNCE: float = 0.5  # Seconds to coalesce triggers before rescoring
+    REACTIVE_LEADER_TTL: float = 30.0  # Redis lease: one worker rescores and publishes, others stand by
+
+    # Push stream (WebSocket / SSE)
+    STREAM_POLL_INTERVAL: float = 0.5  # How often other workers' snapshots are checked
+    STREAM_QUEUE_SIZE: int = 16  # Per-client backlog before it is collapsed into a resync
+    STREAM_KEEPALIVE: float = 15.0
+
+    # Market data venues
+    DEFAULT_EXCHANGE: str = "binance"
+    MARKET_DATA_AGGREGATE: bool = False  # Query all venues concurrently and consolidate
+    EXCHANGE_REQUEST_TIMEOUT: float = 5.0
+    EXCHANGE_BREAKER_THRESHOLD: int = 3  # Consecutive venue failures before opening
+    EXCHANGE_BREAKER_COOLDOWN: float = 30.0
+
+    # Order book depth metrics
+    DEPTH_BOOK_LIMIT: int = 1000  # Levels requested per side (capped per venue)
+    DEPTH_BANDS_PCT: List[float] = [0.5, 1.0, 2.0, 5.0]
+
+    # Streaming market data (ccxt.pro watch_* subscriptions), opt-in
+    MARKET_STREAMING: bool = False
+    MARKET_STREAM_EXCHANGES: List[str] = ["binance"]
+    MARKET_STREAM_MAX_SYMBOLS: int = 50  # Upcoming unlock tokens to keep subscribed
+    MARKET_STREAM_BOOK_DEPTH: int = 100
+    MARKET_STREAM_STALE_AFTER: float = 10.0  # Seconds a streamed value is served before falling back to REST
+    # Quiet this long counts as stale; when every stream of a venue is, its client is recreated
+    MARKET_STREAM_TICKER_STALE_AFTER: float = 120.0
+    MARKET_STREAM_BOOK_STALE_AFTER: float = 600.0  # Illiquid books can sit unchanged for minutes
+    MARKET_STREAM_SYNC_INTERVAL: float = 60.0  # How often the subscription set follows the calendar
+
+    # Onchain log ingestion
+    ONCHAIN_CHAIN: str = "ethereum"
+    ONCHAIN_BATCH_SIZE: int = 20  # eth_getLogs calls per JSON-RPC batch
+    ONCHAIN_MAX_BLOCK_RANGE: int = 2000  # Initial chunk size, halved on "too large" errors
+    ONCHAIN_INITIAL_LOOKBACK_BLOCKS: int = 7200  # ~1 day for tokens without a cursor
+    ONCHAIN_PRESSURE_WINDOW_BLOCKS: int = 7200
+    ONCHAIN_TOPIC_FILTER_MAX: int = 500  # Wallets per eth_getLogs topic list; larger registries take several
+    CEX_WALLETS_PATH: Optional[str] = "data/cex_wallets.csv"  # address,label
+
+    # Startup
+    WARM_IMPORTS: bool = True  # Import ccxt / pandas in the background once the API is up
+
+    # Shared outbound HTTP client (app/core/http.py)
+    HTTP_HTTP2: bool = True  # Requires httpx[http2]
+    HTTP_TIMEOUT: float = 10.0
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_MAX_CONNECTIONS: int = 50
+    HTTP_MAX_KEEPALIVE: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_RETRIES: int = 3  # On 429 / 5xx / transport errors
+    HTTP_BACKOFF_BASE: float = 0.25  # Seconds; full-jitter exponential
+    HTTP_BACKOFF_MAX: float = 10.0
+    HTTP_DEFAULT_RATE_LIMIT: float = 10.0  # Requests/second per host, 0 = unlimited
+    HTTP_HOST_RATE_LIMITS: Dict[str, float] = {
+        "eth-mainnet.g.alchemy.com": 25.0,
+        "api.cryptorank.io": 2.0,
+        "data.messari.io": 0.5,
+    }
+
+    # UIS inputs
+    UIS_VOLATILITY: str = "stdev"  # 'stdev' of returns or 'atr' (ATR / last close); backtests use stdev
+
+    # Token supply cache
+    SUPPLY_CACHE_TTL: float = 6 * 3600.0  # Supply moves slowly; shared via Redis
+    SUPPLY_CACHE_SIZE: int = 4096  # In-process LRU entries
+
+    # Celery scoring pipeline (app/tasks/scoring.py)
+    SCORING_INTERVAL: float = 60.0  # Beat period for re-scoring the calendar
+    SCORING_CALENDAR_LIMIT: int = 500
+    SCORING_HIGH_PRIORITY_HOURS: float = 48.0  # Unlocks this close go to the high_priority queue
+    SCORING_RESULT_TTL: int = 6 * 3600  # Seconds a signal:{token}:{unlock_date} result is kept
+    SCORING_MAX_RETRIES: int = 3
+    SCORING_OFFLOAD: bool = False  # Dashboard refresh uses the workers' signals, scoring only missing events itself
+
+    # Backtest-fitted model parameters
+    MODEL_PARAMS_TTL: float = 300.0  # Seconds before the live engine re-reads model_params
+
+    # Scenario simulation (/signals/simulate): Monte Carlo price paths per unlock
+    SIM_PATHS: int = 20000
+    SIM_MAX_PATHS: int = 100000
+    SIM_MAX_EVENTS: int = 5000
+    SIM_HORIZONS_DAYS: List[int] = [1, 7, 30]
+    SIM_QUANTILES: List[float] = [5.0, 25.0, 50.0, 75.0, 95.0]
+    SIM_DRAWDOWN_PCT: List[float] = [10.0, 20.0, 30.0]
+    SIM_SELL_THROUGH: float = 0.35  # Mean share of the unlock sold within SIM_SELL_DAYS
+    SIM_SELL_THROUGH_CONCENTRATION: float = 8.0  # Beta concentration (higher = less uncertain)
+    SIM_SELL_DAYS: int = 14
+    SIM_CLIFF_HALF_LIFE_DAYS: float = 1.0  # Cliff selling decays by half per this many days
+    SIM_ABSORB_BAND_PCT: float = 2.0  # Selling the bid depth within this band moves price by the band
+    SIM_FALLBACK_DEPTH_FRACTION: float = 0.05  # Band depth as a share of daily USD volume without a book
+    SIM_MAX_CELLS: int = 1_048_576  # events x paths stepped together (float32, kept cache-sized)
+    SIM_MAX_WORK: int = 2_000_000_000  # events x paths x days per request (~10 s on one core)
+    SIM_TIMEOUT: float = 60.0  # Seconds before a running simulation gives up
+
+    # Signal history and analytics (/analytics)
+    SIGNAL_HISTORY_ENABLED: bool = True
+    SIGNAL_HISTORY_INTERVAL: float = 60.0  # Min seconds between stored rows per (token, unlock)
+    SIGNAL_ARCHIVE_AFTER_DAYS: int = 30  # Older rows move from DuckDB to Parquet
+    SIGNAL_ARCHIVE_DIR: str = "data/signal_archive"
+    SIGNAL_ARCHIVE_INTERVAL: float = 3600.0
+    ANALYTICS_MAX_ROWS: int = 10000
+
+    # Observability (/metrics)
+    LOG_LEVEL: str = "INFO"
+    PROFILER_ENABLED: bool = False  # Expose /metrics/profile (sampling profiler)
+    PROFILER_INTERVAL: float = 0.005  # Seconds between stack samples
+    PROFILER_MAX_SECONDS: float = 60.0
 
     # API Keys & Secrets
     BINANCE_API_KEY: Optional[str] = None
@@ -43,4 +181,16 @@ class Settings(BaseSettings):
 
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=True, extra="ignore")
 
-settings = Settings()
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    return Settings()
+
+class _LazySettings:
+    """
+    Stands in for the Settings instance and builds it (env / .env parsing and
+    validation) on first attribute access instead of at import.
+    """
+    def __getattr__(self, name: str):
+        return getattr(get_settings(), name)
+
+settings: Settings = _LazySettings()  # type: ignore[assignment]
@@ -1,23 +1,102 @@
+import asyncio
 import duckdb
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
 from app.core.config import settings
+from app.core.metrics import record_error
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
 
 class Database:
+    """
+    One DuckDB database per process, opened on first use.
+
+    Async callers go through two executors: every write runs on a single writer
+    thread, so transactions from different stores never conflict, and reads run on
+    a pool of DUCKDB_READ_POOL_SIZE reader threads, so analytical queries neither
+    block the event loop nor queue behind ingestion. Each thread works on its own
+    cursor of the shared connection.
+    """
     def __init__(self):
+        self.path: Optional[str] = None  # Overrides DUCKDB_PATH (Celery worker processes)
         self._conn = None
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._readers: Optional[ThreadPoolExecutor] = None
 
     def get_connection(self):
-        if self._conn is None:
-            # Create data directory if it doesn't exist
-            import os
-            os.makedirs(os.path.dirname(settings.DUCKDB_PATH), exist_ok=True)
-            
-            self._conn = duckdb.connect(settings.DUCKDB_PATH)
-        return self._conn
+        """
+        This thread's cursor onto the shared database. One connection must not be
+        used by two threads at once; cursors of it can.
+        """
+        with self._init_lock:
+            if self._conn is None:
+                path = self.path or settings.DUCKDB_PATH
+                # Create data directory if it doesn't exist
+                import os
+                data_dir = os.path.dirname(path)
+                if data_dir:
+                    os.makedirs(data_dir, exist_ok=True)
+
+                self._conn = duckdb.connect(path)
+            conn = self._conn
+        if getattr(self._local, "root", None) is not conn:
+            self._local.cursor = conn.cursor()
+            self._local.root = conn
+        return self._local.cursor
+
+    def _executors(self):
+        with self._init_lock:
+            if self._writer is None:
+                self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="duckdb-writer")
+                self._readers = ThreadPoolExecutor(
+                    max_workers=settings.DUCKDB_READ_POOL_SIZE, thread_name_prefix="duckdb-reader"
+                )
+            return self._writer, self._readers
+
+    async def write(self, fn: Callable[..., T], *args) -> T:
+        """
+        Run a blocking store method on the writer thread.
+        """
+        writer, _ = self._executors()
+        return await asyncio.get_running_loop().run_in_executor(writer, fn, *args)
+
+    def write_nowait(self, fn: Callable[..., T], *args) -> Future:
+        """
+        Queue a write without waiting for it (e.g. history appends off the request
+        path). Failures are logged.
+        """
+        writer, _ = self._executors()
+        future = writer.submit(fn, *args)
+        future.add_done_callback(_log_failure)
+        return future
+
+    async def read(self, fn: Callable[..., T], *args) -> T:
+        """
+        Run a blocking query on the reader pool. `fn` must only read.
+        """
+        _, readers = self._executors()
+        return await asyncio.get_running_loop().run_in_executor(readers, fn, *args)
 
     def close(self):
-        if self._conn:
-            self._conn.close()
-            self._conn = None
+        with self._init_lock:
+            for executor in (self._writer, self._readers):
+                if executor:
+                    executor.shutdown(wait=True)
+            self._writer = self._readers = None
+            if self._conn:
+                self._conn.close()
+                self._conn = None
+
+def _log_failure(future: Future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning("Background DuckDB write failed: %r", future.exception())
+        record_error("duckdb_write", future.exception())
 
 db = Database()
 
@@ -0,0 +1,183 @@
+import asyncio
+import hashlib
+import importlib.util
+import json
+import random
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+from urllib.parse import urlsplit
+from app.core.config import settings
+from app.core.metrics import HTTP_LATENCY, HTTP_RETRIES, cache_result
+
+if TYPE_CHECKING:
+    import httpx
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# HTTP/2 needs the optional `h2` package (httpx[http2]); fall back to HTTP/1.1 without it
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class TokenBucket:
+    """
+    Refills `rate` tokens per second up to `burst`; acquire() waits for a token.
+    """
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class HttpClient:
+    """
+    One pooled (HTTP/2 where available) client for all outbound API / RPC traffic:
+    per-host token buckets, jittered exponential retry on 429/5xx and transport
+    errors, and single-flight coalescing of identical in-flight requests.
+    """
+    def __init__(self, transport: Optional["httpx.AsyncBaseTransport"] = None):
+        import httpx
+        self._client = httpx.AsyncClient(
+            transport=transport,  # e.g. an ASGITransport onto local stubs for benchmarks
+            http2=settings.HTTP_HTTP2 and _HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def _bucket(self, host: str) -> Optional[TokenBucket]:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            rate = settings.HTTP_HOST_RATE_LIMITS.get(host, settings.HTTP_DEFAULT_RATE_LIMIT)
+            if not rate:
+                return None
+            bucket = self._buckets[host] = TokenBucket(rate, max(int(rate), 1))
+        return bucket
+
+    @staticmethod
+    def _backoff(attempt: int, response: Optional["httpx.Response"]) -> float:
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            if retry_after:
+                try:
+                    return min(float(retry_after), settings.HTTP_BACKOFF_MAX)
+                except ValueError:
+                    pass
+        # Full jitter: spreads retries so callers don't hit a recovering host in lockstep
+        return random.uniform(0, min(settings.HTTP_BACKOFF_BASE * 2 ** attempt, settings.HTTP_BACKOFF_MAX))
+
+    async def _send(self, method: str, url: str, retries: int, **kwargs) -> "httpx.Response":
+        import httpx
+        host = urlsplit(url).hostname or ""
+        bucket = self._bucket(host)
+        for attempt in range(retries + 1):
+            if bucket:
+                await bucket.acquire()
+            response = None
+            start = time.perf_counter()
+            try:
+                response = await self._client.request(method, url, **kwargs)
+                if response.status_code not in RETRY_STATUSES or attempt == retries:
+                    return response
+                reason = str(response.status_code)
+            except httpx.TransportError as e:
+                if attempt == retries:
+                    raise
+                reason = type(e).__name__
+            finally:
+                HTTP_LATENCY.observe(time.perf_counter() - start, host=host)
+            HTTP_RETRIES.inc(host=host, reason=reason)
+            await asyncio.sleep(self._backoff(attempt, response))
+        raise AssertionError("unreachable")
+
+    @staticmethod
+    def _flight_key(method: str, url: str, kwargs: Dict[str, Any]) -> str:
+        body = json.dumps(
+            [method, url, kwargs.get("params"), kwargs.get("json"), sorted((kwargs.get("headers") or {}).items())],
+            sort_keys=True, default=str,
+        )
+        return hashlib.sha1(body.encode()).hexdigest()
+
+    async def request(self, method: str, url: str, *, coalesce: Optional[bool] = None,
+                      retries: Optional[int] = None, **kwargs) -> "httpx.Response":
+        """
+        Same arguments as httpx.AsyncClient.request. `coalesce` defaults to True for GET;
+        pass it explicitly for idempotent POSTs such as JSON-RPC reads.
+        """
+        retries = settings.HTTP_RETRIES if retries is None else retries
+        if coalesce is None:
+            coalesce = method.upper() == "GET"
+        if not coalesce:
+            return await self._send(method, url, retries, **kwargs)
+
+        key = self._flight_key(method, url, kwargs)
+        pending = self._inflight.get(key)
+        cache_result('http_single_flight', pending is not None)
+        if pending is None:
+            # Detached from the first caller: its cancellation (e.g. a per-event
+            # timeout) must not cancel everyone else waiting on the same request
+            pending = asyncio.create_task(self._send(method, url, retries, **kwargs))
+            self._inflight[key] = pending
+            pending.add_done_callback(lambda task: self._landed(key, task))
+        return await asyncio.shield(pending)
+
+    def _landed(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved; callers re-raise it themselves, if any are left
+
+    async def get(self, url: str, **kwargs) -> "httpx.Response":
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> "httpx.Response":
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self):
+        for task in list(self._inflight.values()):
+            task.cancel()
+        await self._client.aclose()
+
+
+_client: Optional[HttpClient] = None
+
+def open_http_client(client: Optional[HttpClient] = None) -> HttpClient:
+    """
+    Install the process-wide outbound client. Opened by the app lifespan, the Celery
+    worker loop (run_async) and standalone scripts, each of which closes it again;
+    offline benchmarks pass a client routed to local stubs.
+    """
+    global _client
+    _client = client or HttpClient()
+    return _client
+
+def get_http_client() -> HttpClient:
+    """
+    The client installed by open_http_client().
+    """
+    if _client is None:
+        raise RuntimeError("HTTP client is not open: call open_http_client() (app lifespan / worker init)")
+    return _client
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,225 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+# Prometheus text exposition (format 0.0.4) without a client library: a handful of
+# counters / histograms updated on the hot path, rendered on scrape. Values are per
+# process; with several API workers, scrape each or aggregate in Prometheus.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+NAMESPACE = "antigravity"
+
+# Seconds; outbound calls and pipeline stages both fall in the 1 ms - 10 s range
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = f"{NAMESPACE}_{name}"
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()  # Also updated from to_thread workers (DuckDB stores)
+
+    def _key(self, labels: Dict[str, object]) -> Labels:
+        values = (labels.get(n, "") for n in self.labelnames)
+        return tuple(str(v).lower() if isinstance(v, bool) else str(v) for v in values)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + self._samples())
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (+Inf last)], sum
+        self._counts: Dict[Labels, List[int]] = {}
+        self._sums: Dict[Labels, float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """
+        Observe the duration of the block (also around awaits).
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(c), self._sums[k]) for k, c in sorted(self._counts.items())]
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.labelnames, key, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in self._metrics.values()) + "\n"
+
+
+registry = Registry()
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return registry.register(Counter(name, documentation, labelnames))
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return registry.register(Gauge(name, documentation, labelnames))
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+    return registry.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# --- Hot-path metrics ------------------------------------------------------
+
+EXCHANGE_LATENCY = histogram(
+    "exchange_request_seconds", "Exchange API call latency (ccxt), by venue and method", ("exchange", "method"))
+EXCHANGE_ERRORS = counter(
+    "exchange_errors_total", "Failed exchange calls by venue, method and error type (e.g. RateLimitExceeded, "
+    "RequestTimeout, BadSymbol, CircuitOpenError)", ("exchange", "method", "error"))
+
+RPC_LATENCY = histogram(
+    "rpc_batch_seconds", "JSON-RPC batch latency, by method ('mixed' for heterogeneous batches)", ("method",))
+RPC_CALLS = counter("rpc_calls_total", "JSON-RPC calls sent (each call in a batch counts)", ("method",))
+RPC_ERRORS = counter("rpc_errors_total", "JSON-RPC calls that failed, by method and error", ("method", "error"))
+
+HTTP_LATENCY = histogram("http_request_seconds", "Outbound HTTP attempt latency by host", ("host",))
+HTTP_RETRIES = counter(
+    "http_retries_total", "Outbound HTTP retries by host and reason (status code or transport error)",
+    ("host", "reason"))
+
+CACHE_REQUESTS = counter(
+    "cache_requests_total", "Cache lookups by cache and result (hit / miss)", ("cache", "result"))
+
+STAGE_LATENCY = histogram(
+    "pipeline_stage_seconds", "Scoring pipeline stage durations", ("stage",))
+SIGNALS = counter("signals_total", "Signals produced, by type and whether they were degraded", ("signal", "degraded"))
+RESCORES = counter(
+    "reactive_rescores_total", "Tokens rescored by the reactive engine, by trigger (cex_inflow, price_move, "
+    "volume_move)", ("trigger",))
+
+ERRORS = counter(
+    "errors_total", "Errors handled (logged and swallowed) by component and type", ("component", "error"))
+
+QUEUE_DEPTH = gauge("celery_queue_depth", "Messages waiting in each Celery queue (sampled on scrape)", ("queue",))
+
+
+def cache_result(cache: str, hit: bool, n: int = 1):
+    if n:
+        CACHE_REQUESTS.inc(n, cache=cache, result="hit" if hit else "miss")
+
+
+def record_error(component: str, error: BaseException):
+    ERRORS.inc(component=component, error=type(error).__name__)
+
+
+async def collect_queue_depth():
+    """
+    LLEN of each Celery queue on the Redis broker. Scrape-time only; never raises.
+    """
+    from app.core.celery_app import celery_app
+    from app.core.redis import get_redis
+    queues = list(celery_app.conf.task_queues or {}) or [celery_app.conf.task_default_queue]
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for queue in queues:
+                pipe.llen(queue)
+            depths = await pipe.execute()
+    except Exception as e:
+        record_error("metrics", e)
+        return
+    for queue, depth in zip(queues, depths):
+        QUEUE_DEPTH.set(depth, queue=queue)
+
+
+async def render() -> str:
+    await collect_queue_depth()
+    return registry.render()
@@ -0,0 +1,72 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+
+class ProfilerBusyError(Exception):
+    pass
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for a live process: a background thread snapshots the
+    target thread's Python stack (sys._current_frames) at a fixed interval.
+    Output is collapsed stacks ("root;...;leaf count" per line), readable by
+    flamegraph.pl and speedscope. Nothing runs until profile() is called, and only
+    one profile runs at a time.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _label(frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _stack(self, frame) -> str:
+        labels = []
+        while frame is not None:
+            labels.append(self._label(frame))
+            frame = frame.f_back
+        return ";".join(reversed(labels))
+
+    def sample(self, seconds: float, interval: float, thread_id: Optional[int] = None) -> str:
+        """
+        Blocking. Samples `thread_id`, or every other thread when None (stacks are
+        then prefixed with the thread name).
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already running")
+        try:
+            me = threading.get_ident()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            stacks: Counter = Counter()
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                frames = sys._current_frames()
+                if thread_id is not None:
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[self._stack(frame)] += 1
+                else:
+                    for ident, frame in frames.items():
+                        if ident != me:
+                            stacks[f"{names.get(ident, ident)};{self._stack(frame)}"] += 1
+                time.sleep(interval)
+        finally:
+            self._lock.release()
+        return "".join(f"{stack} {n}\n" for stack, n in stacks.most_common())
+
+    async def profile(self, seconds: float, interval: float, all_threads: bool = False) -> str:
+        """
+        Profile the calling event loop's thread (or all threads) for `seconds` while
+        it keeps serving requests; the sampler runs in a worker thread.
+        """
+        thread_id = None if all_threads else threading.get_ident()
+        return await asyncio.to_thread(self.sample, seconds, interval, thread_id)
+
+profiler = SamplingProfiler()
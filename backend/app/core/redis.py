@@ -1,6 +1,28 @@
 import redis.asyncio as redis
+from typing import Optional
 from app.core.config import settings
 
+_client: Optional[redis.Redis] = None
+
+def get_redis() -> redis.Redis:
+    """
+    Process-wide Redis client (connection pooled). Closed by the app lifespan.
+    """
+    global _client
+    if _client is None:
+        _client = redis.from_url(
+            settings.REDIS_URL,
+            encoding="utf-8",
+            decode_responses=True
+        )
+    return _client
+
+async def close_redis():
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
 async def get_redis_pool():
     redis_client = redis.from_url(
         settings.REDIS_URL,
@@ -0,0 +1,278 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from app.core.config import settings
+from app.core.database import db
+from app.engine.calculator import UIS_LOOKBACK, _market_stats, _uis_kernel
+from app.services.candle_store import candle_store
+from app.services.market_data import MarketDataService
+from app.services.param_store import (
+    param_store, DEFAULT_DUMP_FACTOR, DEFAULT_SHORT_THRESHOLD, DEFAULT_LONG_THRESHOLD,
+)
+from app.services.unlock_store import unlock_store, utc_ms, utc_now
+
+DAY_MS = 86_400_000
+
+
+@dataclass
+class BacktestConfig:
+    pre_days: int = 7             # Entry = close `pre_days` before the unlock candle
+    post_days: int = 14           # Exit = close `post_days` after it
+    horizons: Tuple[int, ...] = (0, 1, 3, 7, 14)  # Extra checkpoints, days after the unlock
+    exchange: str = field(default_factory=lambda: settings.DEFAULT_EXCHANGE)
+    timeframe: str = "1d"
+    workers: int = field(default_factory=lambda: os.cpu_count() or 1)
+    shrinkage: float = 5.0        # Pseudo-events pulling small groups toward the global factor
+
+
+@dataclass
+class TokenPayload:
+    symbol: str
+    ts: np.ndarray                # (t,) candle open times, ms
+    close: np.ndarray
+    volume: np.ndarray
+    event_ts: np.ndarray          # (e,) unlock times, ms
+    unlock_amount: np.ndarray
+    event_index: np.ndarray       # Position of each event in the global event list
+
+
+@dataclass
+class BacktestResult:
+    config: BacktestConfig
+    event_index: np.ndarray       # Into the loaded event list; only events with enough history
+    symbols: np.ndarray
+    categories: np.ndarray
+    raw_uis: np.ndarray           # UIS at entry with dump factor 1.0
+    realized: np.ndarray          # Entry -> exit return
+    post_return: np.ndarray       # Unlock candle -> exit return (what LONG_AFTER_DUMP earns)
+    max_drawdown: np.ndarray      # Worst close in [entry, exit] vs entry
+    horizon_returns: np.ndarray   # (n, len(horizons)) entry -> unlock + h
+    token_factors: Dict[str, float] = field(default_factory=dict)
+    category_factors: Dict[str, float] = field(default_factory=dict)
+    short_threshold: float = DEFAULT_SHORT_THRESHOLD
+    long_threshold: float = DEFAULT_LONG_THRESHOLD
+    objective: float = 0.0        # Summed strategy return at the fitted thresholds
+
+    @property
+    def n_events(self) -> int:
+        return len(self.event_index)
+
+
+def _replay_token(p: TokenPayload, pre: int, post: int, horizons: Sequence[int]) -> Optional[dict]:
+    """
+    Replay every unlock of one token against its candles with array indexing only.
+    """
+    n = len(p.ts)
+    if n < UIS_LOOKBACK + pre + post:
+        return None
+
+    t0 = np.searchsorted(p.ts, p.event_ts, side='right') - 1   # Candle containing the unlock
+    entry, exit_ = t0 - pre, t0 + post
+    valid = (t0 >= 0) & (entry - UIS_LOOKBACK + 1 >= 0) & (exit_ < n)
+    if not valid.any():
+        return None
+    t0, entry, exit_ = t0[valid], entry[valid], exit_[valid]
+
+    close = p.close
+    realized = close[exit_] / close[entry] - 1.0
+    post_return = close[exit_] / close[t0] - 1.0
+    span = pre + post + 1
+    max_drawdown = sliding_window_view(close, span).min(axis=1)[entry] / close[entry] - 1.0
+
+    h_idx = t0[:, None] + np.asarray(horizons)[None, :]
+    h_ok = h_idx < n
+    horizon_returns = np.where(h_ok, close[np.minimum(h_idx, n - 1)] / close[entry][:, None] - 1.0, np.nan)
+
+    # What the live engine would have seen at entry: the UIS_LOOKBACK candles ending there
+    window_start = entry - UIS_LOOKBACK + 1
+    close_panel = sliding_window_view(close, UIS_LOOKBACK)[window_start]
+    volume_panel = sliding_window_view(p.volume, UIS_LOOKBACK)[window_start]
+    avg_volume, volatility, last_close = _market_stats(close_panel, volume_panel)
+    raw_uis = _uis_kernel(avg_volume, volatility, last_close, p.unlock_amount[valid], 1.0)
+
+    return {
+        "event_index": p.event_index[valid],
+        "raw_uis": raw_uis,
+        "realized": realized,
+        "post_return": post_return,
+        "max_drawdown": max_drawdown,
+        "horizon_returns": horizon_returns,
+    }
+
+
+def _replay_chunk(payloads: List[TokenPayload], pre: int, post: int, horizons: Sequence[int]) -> List[dict]:
+    """
+    Process-pool entry point: one call per chunk of tokens to amortise pickling.
+    """
+    results = [_replay_token(p, pre, post, horizons) for p in payloads]
+    return [r for r in results if r is not None]
+
+
+def _group_factors(keys: np.ndarray, dump: np.ndarray, global_mean: float, shrinkage: float) -> Dict[str, float]:
+    """
+    Per-group dump severity relative to all events, shrunk toward 1.0 for small groups,
+    scaled onto DEFAULT_DUMP_FACTOR.
+    """
+    if global_mean <= 0:
+        return {}
+    groups, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse)
+    means = np.bincount(inverse, weights=dump) / counts
+    weight = counts / (counts + shrinkage)
+    ratio = 1.0 + weight * (means / global_mean - 1.0)
+    factors = np.clip(DEFAULT_DUMP_FACTOR * ratio, 0.25 * DEFAULT_DUMP_FACTOR, 4.0 * DEFAULT_DUMP_FACTOR)
+    return {str(g): float(f) for g, f in zip(groups, factors) if g is not None and g != ""}
+
+
+def _fit_thresholds(uis: np.ndarray, realized: np.ndarray, post_return: np.ndarray) -> Tuple[float, float, float]:
+    """
+    Grid search (short, long) thresholds maximising summed strategy return:
+    SHORT earns -realized above `short`, LONG_AFTER_DUMP earns post_return below `long`.
+    """
+    grid = np.unique(np.concatenate([
+        np.quantile(uis, np.linspace(0.05, 0.95, 19)),
+        [DEFAULT_LONG_THRESHOLD, DEFAULT_SHORT_THRESHOLD],
+    ]))
+    short_pnl = (uis[None, :] > grid[:, None]) @ (-realized)    # (m,)
+    long_pnl = (uis[None, :] < grid[:, None]) @ post_return     # (m,)
+    total = short_pnl[:, None] + long_pnl[None, :]              # [short_i, long_j]
+    total = np.where(grid[None, :] <= grid[:, None], total, -np.inf)  # Require long <= short
+    i, j = np.unravel_index(np.argmax(total), total.shape)
+    return float(grid[i]), float(grid[j]), float(total[i, j])
+
+
+def _load_payloads(config: BacktestConfig) -> Tuple[List[dict], List[TokenPayload]]:
+    events = unlock_store.query_sync(None, utc_now())
+    by_symbol: Dict[str, List[int]] = {}
+    for i, event in enumerate(events):
+        by_symbol.setdefault(event['token_symbol'], []).append(i)
+
+    payloads = []
+    for symbol, idx in by_symbol.items():
+        candles = candle_store.read_range_sync(
+            config.exchange, MarketDataService._format_symbol(symbol), config.timeframe
+        )
+        if candles.empty:
+            continue
+        payloads.append(TokenPayload(
+            symbol=symbol,
+            ts=candles['timestamp'].to_numpy(dtype=np.int64),
+            close=candles['close'].to_numpy(dtype=float),
+            volume=candles['volume'].to_numpy(dtype=float),
+            event_ts=np.array([utc_ms(events[i]['unlock_date']) for i in idx], dtype=np.int64),
+            unlock_amount=np.array([events[i]['unlock_amount'] or 0.0 for i in idx], dtype=float),
+            event_index=np.array(idx, dtype=np.int64),
+        ))
+    return events, payloads
+
+
+def _replay(payloads: List[TokenPayload], config: BacktestConfig,
+            executor: Optional[ProcessPoolExecutor] = None) -> List[dict]:
+    if config.workers <= 1 or len(payloads) < 2:
+        return _replay_chunk(payloads, config.pre_days, config.post_days, config.horizons)
+    n_chunks = min(len(payloads), config.workers * 4)
+    chunks = [payloads[i::n_chunks] for i in range(n_chunks)]
+    own = executor is None
+    executor = executor or ProcessPoolExecutor(max_workers=config.workers)
+    try:
+        futures = [
+            executor.submit(_replay_chunk, chunk, config.pre_days, config.post_days, config.horizons)
+            for chunk in chunks
+        ]
+        return [r for f in futures for r in f.result()]
+    finally:
+        if own:
+            executor.shutdown()
+
+
+def _fit(events: List[dict], parts: List[dict], config: BacktestConfig) -> Optional[BacktestResult]:
+    if not parts:
+        return None
+    cat = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+    index = cat["event_index"]
+    result = BacktestResult(
+        config=config,
+        event_index=index,
+        symbols=np.array([events[i]['token_symbol'] for i in index], dtype=object),
+        categories=np.array([events[i].get('category') or "" for i in index], dtype=object),
+        raw_uis=cat["raw_uis"],
+        realized=cat["realized"],
+        post_return=cat["post_return"],
+        max_drawdown=cat["max_drawdown"],
+        horizon_returns=cat["horizon_returns"],
+    )
+
+    dump = -result.realized
+    global_mean = float(dump.mean())
+    result.token_factors = _group_factors(result.symbols, dump, global_mean, config.shrinkage)
+    result.category_factors = _group_factors(result.categories, dump, global_mean, config.shrinkage)
+
+    # Thresholds are fitted on UIS as the live engine would compute it with these factors
+    factors = np.array([
+        result.token_factors.get(s, result.category_factors.get(c, DEFAULT_DUMP_FACTOR))
+        for s, c in zip(result.symbols, result.categories)
+    ])
+    result.short_threshold, result.long_threshold, result.objective = _fit_thresholds(
+        result.raw_uis * factors, result.realized, result.post_return
+    )
+    return result
+
+
+def run_backtest_sync(config: Optional[BacktestConfig] = None) -> Optional[BacktestResult]:
+    """
+    Replay every stored historical unlock against stored candles and fit parameters.
+    """
+    config = config or BacktestConfig()
+    events, payloads = _load_payloads(config)
+    return _fit(events, _replay(payloads, config), config)
+
+
+def sweep_sync(windows: Sequence[Tuple[int, int]], base: Optional[BacktestConfig] = None) -> List[BacktestResult]:
+    """
+    Fit once per (pre_days, post_days) window, reusing the loaded data and one process pool.
+    """
+    base = base or BacktestConfig()
+    events, payloads = _load_payloads(base)
+    results = []
+    with ProcessPoolExecutor(max_workers=max(base.workers, 1)) as executor:
+        for pre, post in windows:
+            config = BacktestConfig(pre_days=pre, post_days=post, horizons=base.horizons, exchange=base.exchange,
+                                    timeframe=base.timeframe, workers=base.workers, shrinkage=base.shrinkage)
+            result = _fit(events, _replay(payloads, config, executor), config)
+            if result is not None:
+                results.append(result)
+    return results
+
+
+def write_back_sync(result: BacktestResult):
+    """
+    Publish fitted factors and thresholds for the live engine.
+    """
+    common = {'pre_days': result.config.pre_days, 'post_days': result.config.post_days}
+    rows = [{
+        'scope': 'global', 'key': '*', 'dump_factor': DEFAULT_DUMP_FACTOR,
+        'short_threshold': result.short_threshold, 'long_threshold': result.long_threshold,
+        'n_events': result.n_events, **common,
+    }]
+    counts = dict(zip(*np.unique(result.symbols, return_counts=True)))
+    rows += [
+        {'scope': 'token', 'key': symbol, 'dump_factor': factor, 'n_events': int(counts[symbol]), **common}
+        for symbol, factor in result.token_factors.items()
+    ]
+    cat_counts = dict(zip(*np.unique(result.categories, return_counts=True)))
+    rows += [
+        {'scope': 'category', 'key': category, 'dump_factor': factor, 'n_events': int(cat_counts[category]), **common}
+        for category, factor in result.category_factors.items()
+    ]
+    param_store.replace_sync(rows)
+
+
+async def run_backtest(config: Optional[BacktestConfig] = None, write: bool = False) -> Optional[BacktestResult]:
+    result = await asyncio.to_thread(run_backtest_sync, config)
+    if write and result is not None:
+        await db.write(write_back_sync, result)
+    return result
@@ -1,8 +1,14 @@
+import asyncio
 import numpy as np
 from enum import Enum
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional, Sequence, Tuple
+from app.core.config import settings
+from app.core.metrics import STAGE_LATENCY
+from app.engine.rolling import UIS_LOOKBACK, rolling_stats
 from app.services.market_data import market_service
+from app.services.param_store import param_store
+from app.services.supply import supply_service
 from app.services.unlocks import UnlockEvent
 
 class SignalType(str, Enum):
@@ -17,69 +23,186 @@ class TradeSignal(BaseModel):
     confidence: float
     expected_move_pct: float
     reason: str
+    degraded: bool = False  # True when the signal was built from partial data
+
+UIS_TIMEFRAME = '1d'
+
+# 1/UIS rebound term of LONG_AFTER_DUMP is capped here (+10%); UIS 0 means no data
+LONG_UIS_FLOOR = 0.1
+
+
+def _market_stats(close: np.ndarray, volume: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Row-wise (avg USD volume, volatility of returns, last close) over a price panel.
+    Array form of RollingStats (stdev volatility), used to replay history in the backtest.
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        n_candles = np.sum(~np.isnan(close), axis=1)
+        # USD volume per candle: mean(volume x close)
+        avg_daily_volume = np.nansum(volume * close, axis=1) / n_candles
+
+        # Sample std of simple returns (equivalent to close.pct_change().std())
+        returns = close[:, 1:] / close[:, :-1] - 1.0
+        valid = ~np.isnan(returns)
+        n_returns = valid.sum(axis=1)
+        mean = np.where(valid, returns, 0.0).sum(axis=1) / n_returns
+        sq_dev = np.where(valid, (returns - mean[:, None]) ** 2, 0.0).sum(axis=1)
+        volatility = np.where(n_returns > 1, np.sqrt(sq_dev / (n_returns - 1)), 0.0)
+
+    return np.nan_to_num(avg_daily_volume), volatility, close[:, -1]
+
+
+def _uis_kernel(avg_daily_volume: np.ndarray, volatility: np.ndarray, last_close: np.ndarray,
+                unlock_tokens: np.ndarray, historical_dump_factor) -> np.ndarray:
+    volatility_factor = 1.0 + (volatility * 10)  # Scaling factor, baseline 1.0
+
+    # Pressure = Value of Unlock / Avg Daily Volume
+    unlock_value_usd = unlock_tokens * last_close
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pressure_ratio = unlock_value_usd / avg_daily_volume
+
+    uis = pressure_ratio * volatility_factor * historical_dump_factor
+    # Insufficient data -> 0.0
+    return np.where((avg_daily_volume > 0) & ~np.isnan(last_close), uis, 0.0)
+
+
+def _unlock_tokens(event: UnlockEvent, circulating_supply: Optional[float]) -> float:
+    """
+    Tokens unlocked: the reported amount, else unlock_percent of circulating supply.
+    """
+    if event.unlock_amount:
+        return event.unlock_amount
+    if circulating_supply and event.unlock_percent:
+        return event.unlock_percent / 100.0 * circulating_supply
+    return 0.0
+
 
 class SignalEngine:
-    async def calculate_uis(self, event: UnlockEvent, circulating_supply: float) -> float:
+    async def calculate_uis(self, event: UnlockEvent, circulating_supply: Optional[float] = None) -> float:
         """
         UIS = (unlock_percent * circulating_supply) / avg_daily_volume * volatility_factor * historical_dump_factor
+
+        Circulating supply is only needed (and looked up, cached) when the event has no unlock_amount.
+        """
+        with STAGE_LATENCY.time(stage="market_stats"):
+            stats = await self.market_stats(event.token_symbol)
+        if stats is None:
+            return 0.0 # Insufficient data
+        return await self.uis_from_stats(event, *stats, circulating_supply=circulating_supply)
+
+    async def market_stats(self, symbol: str) -> Optional[Tuple[float, float, float]]:
+        """
+        (avg USD daily volume, volatility, last close) over the UIS lookback, None without candles.
         """
-        symbol = event.token_symbol
-        
         # 1. Fetch Market Data
         # We need historical volume for avg calc
-        ohlcv = await market_service.get_ohlcv(symbol, limit=30)
-        if ohlcv.empty:
-            return 0.0 # Insufficient data
-            
-        avg_daily_volume = ohlcv['volume'].mean() * ohlcv['close'].mean() # Approximate USD volume
-        if avg_daily_volume == 0:
-            return 0.0
-
-        # 2. Calculate Volatility Factor (ATR / Realized Volatility)
-        # Simplified: Use StdDev of returns
-        returns = ohlcv['close'].pct_change().dropna()
-        volatility = returns.std()
-        volatility_factor = 1.0 + (volatility * 10) # Scaling factor, baseline 1.0
-        
+        ohlcv = await market_service.get_ohlcv_array(symbol, limit=UIS_LOOKBACK)
+        if not len(ohlcv):
+            return None
+
+        # 2. Volume, Volatility Factor (ATR / Realized Volatility) and last price
+        # Rolling state: only candles newer than the last one seen are applied
+        rolling_stats.ingest(symbol, UIS_TIMEFRAME, ohlcv)
+        return rolling_stats.stats(symbol, UIS_TIMEFRAME)
+
+    async def uis_from_stats(self, event: UnlockEvent, avg_daily_volume: float, volatility: float,
+                             last_close: float, circulating_supply: Optional[float] = None) -> float:
+        """
+        UIS from precomputed market stats, e.g. fetched by a separate worker task.
+        """
+        symbol = event.token_symbol
+
         # 3. Historical Dump Factor
-        # Hardcoded 1.1 for now, in real engine this comes from database of past unlocks
-        historical_dump_factor = 1.1 
-        
+        # Fitted per token / category by the unlock backtest (app/engine/backtest.py)
+        await param_store.ensure_fresh()
+        historical_dump_factor = param_store.dump_factor(symbol, event.category)
+
         # 4. Unlock Value
-        # unlock_percent is passed from event (e.g. 18.5 for 18.5%), convert to decimal if needed, 
-        # but formula implies raw magnitude. Let's assume ratio relative to daily volume is key.
-        
-        unlock_tokens = event.unlock_amount
-        unlock_value_usd = unlock_tokens * ohlcv['close'].iloc[-1]
-        
-        # Revised Formula implementation based on "Pressure Ratio"
-        # Pressure = Value of Unlock / Avg Daily Volume
-        pressure_ratio = unlock_value_usd / avg_daily_volume
-        
-        uis = pressure_ratio * volatility_factor * historical_dump_factor
-        return uis
+        # unlock_percent is passed from event (e.g. 18.5 for 18.5%), converted via circulating supply
+        # when the source did not report a token amount.
+        if not event.unlock_amount and circulating_supply is None:
+            with STAGE_LATENCY.time(stage="supply"):
+                circulating_supply = (await supply_service.get_supply(symbol, event.token_address)).circulating
+        unlock_tokens = np.array([_unlock_tokens(event, circulating_supply)], dtype=float)
+
+        uis = _uis_kernel(np.array([avg_daily_volume]), np.array([volatility]), np.array([last_close]),
+                          unlock_tokens, historical_dump_factor)
+        return float(uis[0])
+
+    async def calculate_uis_batch(self, events: Sequence[UnlockEvent]) -> List[float]:
+        """
+        Vectorized UIS for many events. Candles are fetched once per distinct token
+        (concurrently), folded into the rolling stats and scored with array operations.
+        Results are in event order and identical to calculate_uis.
+        """
+        if not events:
+            return []
+
+        symbols = list(dict.fromkeys(e.token_symbol for e in events))
+        semaphore = asyncio.Semaphore(settings.SIGNAL_CONCURRENCY)
+
+        async def fetch(symbol: str) -> np.ndarray:
+            async with semaphore:
+                return await market_service.get_ohlcv_array(symbol, limit=UIS_LOOKBACK)
+
+        with STAGE_LATENCY.time(stage="ohlcv_batch"):
+            candles = await asyncio.gather(*(fetch(sym) for sym in symbols))
+
+        # Per-token statistics, then broadcast to events
+        for symbol, ohlcv in zip(symbols, candles):
+            rolling_stats.ingest(symbol, UIS_TIMEFRAME, ohlcv)
+        avg_daily_volume, volatility, last_close = rolling_stats.stats_many([(sym, UIS_TIMEFRAME) for sym in symbols])
+        last_close[[not len(ohlcv) for ohlcv in candles]] = np.nan  # No candles now -> insufficient data
+
+        row_of = {sym: i for i, sym in enumerate(symbols)}
+        rows = np.fromiter((row_of[e.token_symbol] for e in events), dtype=np.intp, count=len(events))
+
+        # One batched supply lookup for events without an unlock amount
+        with STAGE_LATENCY.time(stage="supply"):
+            supplies = await supply_service.get_supplies(
+                (e.token_symbol, e.token_address) for e in events if not e.unlock_amount
+            )
+        unlock_tokens = np.fromiter(
+            (_unlock_tokens(e, getattr(supplies.get(e.token_symbol.upper()), 'circulating', None)) for e in events),
+            dtype=float, count=len(events),
+        )
+
+        await param_store.ensure_fresh()
+        dump_factors = np.fromiter(
+            (param_store.dump_factor(e.token_symbol, e.category) for e in events), dtype=float, count=len(events)
+        )
+        uis = _uis_kernel(avg_daily_volume[rows], volatility[rows], last_close[rows],
+                          unlock_tokens, dump_factors)
+        return uis.tolist()
 
     async def generate_signal(self, event: UnlockEvent, onchain_confidence: float = 0.0) -> TradeSignal:
-        # Need to fetch circulating supply. For now assume we have it or fetch from API.
-        # Placeholder: 1B for demo if not provided
-        circulating_supply = 1_000_000_000 
-        
-        uis = await self.calculate_uis(event, circulating_supply)
-        
-        # Signal Logic
-        # UIS > 1.2 -> SHORT
-        # 0.7 - 1.2 -> AVOID
-        # < 0.7 -> LONG_AFTER_DUMP
-        
+        # Circulating supply is resolved (cached) inside calculate_uis when the event needs it
+        uis = await self.calculate_uis(event)
+        return self.build_signal(event, uis, onchain_confidence)
+
+    def build_signal(self, event: UnlockEvent, uis: float, onchain_confidence: float = 0.0) -> TradeSignal:
+        # Signal Logic (thresholds fitted by the backtest, default 1.2 / 0.7)
+        # UIS > short -> SHORT
+        # long - short -> AVOID
+        # < long -> LONG_AFTER_DUMP
+        short_threshold, long_threshold = param_store.thresholds()
+
+        if uis <= 0.0:
+            # No candles or no unlock size: nothing to score
+            return TradeSignal(
+                token=event.token_symbol, signal=SignalType.AVOID, uis_score=0.0, confidence=0.0,
+                expected_move_pct=0.0, reason="Degraded: insufficient data", degraded=True,
+            )
+
         signal_type = SignalType.AVOID
         expected_move = 0.0
-        
-        if uis > 1.2:
+
+        if uis > short_threshold:
             signal_type = SignalType.SHORT
             expected_move = -5.0 - (uis * 2.0) # Simple linear model
-        elif uis < 0.7:
+        elif uis < long_threshold:
             signal_type = SignalType.LONG_AFTER_DUMP
-            expected_move = 5.0 + ((1/uis) * 1.0)
+            expected_move = 5.0 + (1.0 / max(uis, LONG_UIS_FLOOR))
         else:
             signal_type = SignalType.AVOID
             expected_move = -1.0 # Slight dip expected usually
@@ -0,0 +1,129 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Sequence
+from app.engine.calculator import LONG_UIS_FLOOR, SignalType, TradeSignal
+from app.services.param_store import param_store
+from app.services.unlock_store import utc_ms
+from app.services.unlocks import UnlockEvent
+
+# Dictionary encoding for the signal column: code -> SignalType
+SIGNAL_TYPES = list(SignalType)
+SHORT, AVOID, LONG_AFTER_DUMP = (SIGNAL_TYPES.index(t) for t in
+                                 (SignalType.SHORT, SignalType.AVOID, SignalType.LONG_AFTER_DUMP))
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+@dataclass(slots=True)
+class SignalColumns:
+    """
+    Many signals as one set of column arrays: what TradeSignal holds per row, plus
+    the unlock timestamp. Serialises without per-row model validation.
+    """
+    token: List[str]
+    unlock_ts: np.ndarray           # int64, ms since epoch
+    signal: np.ndarray              # int8 codes into SIGNAL_TYPES
+    uis_score: np.ndarray
+    confidence: np.ndarray
+    expected_move_pct: np.ndarray
+    degraded: np.ndarray            # bool
+    reason: List[str]
+
+    def __len__(self) -> int:
+        return len(self.token)
+
+    def columns(self) -> dict:
+        return {
+            "token": self.token,
+            "unlock_ts": self.unlock_ts,
+            "signal": self.signal,
+            "uis_score": self.uis_score,
+            "confidence": self.confidence,
+            "expected_move_pct": self.expected_move_pct,
+            "degraded": self.degraded,
+            "reason": self.reason,
+        }
+
+    def to_json(self) -> bytes:
+        import orjson
+        return orjson.dumps(
+            {"n": len(self), "signal_types": [t.value for t in SIGNAL_TYPES], "columns": self.columns()},
+            option=orjson.OPT_SERIALIZE_NUMPY,
+        )
+
+    def to_msgpack(self) -> bytes:
+        import msgpack  # Imported on first use
+        columns = {k: v.tolist() if isinstance(v, np.ndarray) else v for k, v in self.columns().items()}
+        return msgpack.packb(
+            {"n": len(self), "signal_types": [t.value for t in SIGNAL_TYPES], "columns": columns}
+        )
+
+    def to_arrow(self) -> bytes:
+        """
+        Arrow IPC stream with a dictionary-encoded signal column.
+        """
+        import pyarrow as pa  # Imported on first use (heavy)
+        columns = self.columns()
+        columns["unlock_ts"] = pa.array(self.unlock_ts, type=pa.timestamp("ms"))
+        columns["signal"] = pa.DictionaryArray.from_arrays(
+            pa.array(self.signal, type=pa.int8()), pa.array([t.value for t in SIGNAL_TYPES])
+        )
+        table = pa.table(columns)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    def rows(self) -> List[TradeSignal]:
+        return [
+            TradeSignal(
+                token=self.token[i], signal=SIGNAL_TYPES[self.signal[i]], uis_score=float(self.uis_score[i]),
+                confidence=float(self.confidence[i]), expected_move_pct=float(self.expected_move_pct[i]),
+                reason=self.reason[i], degraded=bool(self.degraded[i]),
+            )
+            for i in range(len(self))
+        ]
+
+
+def build_signal_columns(events: Sequence[UnlockEvent], uis: np.ndarray, onchain_confidence: np.ndarray,
+                         partial: np.ndarray) -> SignalColumns:
+    """
+    Vectorized SignalEngine.build_signal over aligned per-event arrays. Rows without
+    data (UIS 0) come out degraded, as they do there. `partial` marks events whose
+    on-chain pressure was unavailable.
+    """
+    short_threshold, long_threshold = param_store.thresholds()
+    uis = np.asarray(uis, dtype=float)
+    n = len(uis)
+
+    signal = np.full(n, AVOID, dtype=np.int8)
+    signal[uis < long_threshold] = LONG_AFTER_DUMP
+    signal[uis > short_threshold] = SHORT
+    is_short, is_long = signal == SHORT, signal == LONG_AFTER_DUMP
+
+    rebound = 5.0 + 1.0 / np.maximum(uis, LONG_UIS_FLOOR)
+    expected_move = np.where(is_short, -5.0 - uis * 2.0, np.where(is_long, rebound, -1.0))
+    is_cliff = np.fromiter((bool(e.is_cliff) for e in events), dtype=bool, count=n)
+    confidence = 50.0 + 15.0 * is_cliff + np.where(is_short, onchain_confidence * 20.0, 0.0)
+    confidence = np.minimum(confidence, 99.0)
+
+    failed = ~(uis > 0.0)
+    degraded = partial | failed
+    reason = [
+        "Degraded: insufficient data" if failed[i]
+        else f"UIS: {uis[i]:.2f} (Pressure: High)" + (" (onchain unavailable)" if partial[i] else "")
+        for i in range(n)
+    ]
+    signal[failed] = AVOID
+    return SignalColumns(
+        token=[e.token_symbol for e in events],
+        unlock_ts=np.fromiter((utc_ms(e.unlock_date) for e in events), dtype=np.int64, count=n),
+        signal=signal,
+        uis_score=np.where(failed, 0.0, np.round(uis, 2)),
+        confidence=np.where(failed, 0.0, confidence),
+        expected_move_pct=np.where(failed, 0.0, np.round(expected_move, 2)),
+        degraded=degraded,
+        reason=reason,
+    )
@@ -0,0 +1,135 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import Sequence, Tuple
+
+DEFAULT_BANDS_PCT = (0.5, 1.0, 2.0, 5.0)
+
+
+@dataclass(slots=True)
+class DepthMetrics:
+    """
+    Array-backed order book liquidity summary.
+
+    Bid arrays run best -> worst, ask arrays best -> worst; `*_cum_usd` / `*_cum_qty`
+    are running totals along each side, so any slippage query is a binary search.
+    """
+    venues: Tuple[str, ...]
+    mid: float
+    spread_bps: float
+    bands_pct: np.ndarray       # (k,) band widths around mid, in %
+    bid_depth_usd: np.ndarray   # (k,) bid notional within mid * (1 - band)
+    ask_depth_usd: np.ndarray   # (k,) ask notional within mid * (1 + band)
+    bid_prices: np.ndarray
+    bid_cum_qty: np.ndarray
+    bid_cum_usd: np.ndarray
+    ask_prices: np.ndarray
+    ask_cum_qty: np.ndarray
+    ask_cum_usd: np.ndarray
+
+    @property
+    def imbalance(self) -> np.ndarray:
+        """
+        (bid - ask) / (bid + ask) per band: > 0 means more resting bids.
+        """
+        total = self.bid_depth_usd + self.ask_depth_usd
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(total > 0, (self.bid_depth_usd - self.ask_depth_usd) / total, 0.0)
+
+    def _slippage(self, usd_sizes, prices, cum_qty, cum_usd) -> np.ndarray:
+        sizes = np.atleast_1d(np.asarray(usd_sizes, dtype=float))
+        if len(prices) == 0 or self.mid <= 0:
+            return np.full(sizes.shape, np.nan)
+        # First level at which the cumulative notional covers each size
+        idx = np.searchsorted(cum_usd, sizes, side='left')
+        filled = idx < len(prices)
+        i = np.minimum(idx, len(prices) - 1)
+        prev_usd = np.where(i > 0, cum_usd[i - 1], 0.0)
+        prev_qty = np.where(i > 0, cum_qty[i - 1], 0.0)
+        qty = np.where(filled, prev_qty + (sizes - prev_usd) / prices[i], cum_qty[-1])
+        usd = np.where(filled, sizes, cum_usd[-1])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            vwap = usd / qty
+        return np.abs(vwap - self.mid) / self.mid * 100.0
+
+    def sell_slippage_pct(self, usd_sizes) -> np.ndarray:
+        """
+        Average execution slippage vs mid (%) for market-selling each USD size into the bids.
+        Sizes beyond the visible book report the slippage of sweeping the whole side.
+        """
+        return self._slippage(usd_sizes, self.bid_prices, self.bid_cum_qty, self.bid_cum_usd)
+
+    def buy_slippage_pct(self, usd_sizes) -> np.ndarray:
+        return self._slippage(usd_sizes, self.ask_prices, self.ask_cum_qty, self.ask_cum_usd)
+
+    def absorbable_usd(self, band_pct: float) -> float:
+        """
+        Bid notional resting within `band_pct` % below mid.
+        """
+        threshold = self.mid * (1.0 - band_pct / 100.0)
+        n = np.searchsorted(-self.bid_prices, -threshold, side='right')
+        return float(self.bid_cum_usd[n - 1]) if n > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "venues": list(self.venues),
+            "mid": self.mid,
+            "spread_bps": self.spread_bps,
+            "bands_pct": self.bands_pct.tolist(),
+            "bid_depth_usd": self.bid_depth_usd.tolist(),
+            "ask_depth_usd": self.ask_depth_usd.tolist(),
+            "imbalance": self.imbalance.tolist(),
+        }
+
+
+def levels_to_array(levels: Sequence) -> np.ndarray:
+    """
+    ccxt [price, amount, (count)] levels from one venue -> (n, 2) float array.
+    """
+    if len(levels) == 0:
+        return np.empty((0, 2))
+    return np.asarray(levels, dtype=float)[:, :2]
+
+
+def _side(book: np.ndarray, descending: bool) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    order = np.argsort(-book[:, 0] if descending else book[:, 0], kind='stable')
+    prices, qty = book[order, 0], book[order, 1]
+    return prices, np.cumsum(qty), np.cumsum(prices * qty)
+
+
+def compute_depth_metrics(bids: np.ndarray, asks: np.ndarray, bands_pct: Sequence[float] = DEFAULT_BANDS_PCT,
+                          venues: Sequence[str] = ()) -> DepthMetrics:
+    """
+    Build DepthMetrics from (n, 2) [price, amount] arrays. Levels may come in any
+    order, e.g. several venues' books concatenated.
+    """
+    bid_prices, bid_cum_qty, bid_cum_usd = _side(bids, descending=True)
+    ask_prices, ask_cum_qty, ask_cum_usd = _side(asks, descending=False)
+    bands = np.asarray(bands_pct, dtype=float)
+
+    if len(bid_prices) and len(ask_prices):
+        mid = (bid_prices[0] + ask_prices[0]) / 2.0
+        spread_bps = (ask_prices[0] - bid_prices[0]) / mid * 1e4
+    else:
+        mid = bid_prices[0] if len(bid_prices) else (ask_prices[0] if len(ask_prices) else 0.0)
+        spread_bps = np.nan
+
+    # Levels inside each band; prices are sorted so a single searchsorted per side suffices
+    n_bid = np.searchsorted(-bid_prices, -(mid * (1.0 - bands / 100.0)), side='right')
+    n_ask = np.searchsorted(ask_prices, mid * (1.0 + bands / 100.0), side='right')
+    bid_depth = np.where(n_bid > 0, bid_cum_usd[np.maximum(n_bid - 1, 0)] if len(bid_prices) else 0.0, 0.0)
+    ask_depth = np.where(n_ask > 0, ask_cum_usd[np.maximum(n_ask - 1, 0)] if len(ask_prices) else 0.0, 0.0)
+
+    return DepthMetrics(
+        venues=tuple(venues),
+        mid=float(mid),
+        spread_bps=float(spread_bps),
+        bands_pct=bands,
+        bid_depth_usd=bid_depth,
+        ask_depth_usd=ask_depth,
+        bid_prices=bid_prices,
+        bid_cum_qty=bid_cum_qty,
+        bid_cum_usd=bid_cum_usd,
+        ask_prices=ask_prices,
+        ask_cum_qty=ask_cum_qty,
+        ask_cum_usd=ask_cum_usd,
+    )
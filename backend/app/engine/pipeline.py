@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+from app.core.config import settings
+from app.core.metrics import SIGNALS, STAGE_LATENCY
+from app.engine.calculator import signal_engine, TradeSignal, SignalType
+from app.engine.columnar import SIGNAL_TYPES, SignalColumns, build_signal_columns
+from app.services.market_data import market_service
+from app.services.unlocks import UnlockEvent
+from app.services.onchain import onchain_service
+from app.services.signal_store import signal_store
+
+logger = logging.getLogger(__name__)
+
+
+def degraded_signal(event: UnlockEvent, reason: str) -> TradeSignal:
+    """
+    Placeholder signal for an event that could not be scored in time.
+    """
+    return TradeSignal(
+        token=event.token_symbol,
+        signal=SignalType.AVOID,
+        uis_score=0.0,
+        confidence=0.0,
+        expected_move_pct=0.0,
+        reason=f"Degraded: {reason}",
+        degraded=True,
+    )
+
+
+async def _onchain_pressure(event: UnlockEvent, refresh: bool) -> float:
+    if not event.token_address:
+        return 0.0  # Not an Ethereum token: nothing to watch
+    price = await market_service.get_current_price(event.token_symbol)
+    return await onchain_service.analyze_movement_to_cex(event.token_address, price_usd=price, refresh=refresh)
+
+
+async def score_event(event: UnlockEvent, timeout: float, refresh_onchain: bool = True) -> TradeSignal:
+    """
+    Run the per-event pipeline (onchain pressure -> signal) under a single deadline.
+    Onchain failures degrade to zero pressure; engine failures degrade the whole signal.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    partial = False
+
+    # 1. Check Onchain pressure
+    try:
+        with STAGE_LATENCY.time(stage="onchain_pressure"):
+            pressure = await asyncio.wait_for(_onchain_pressure(event, refresh_onchain), timeout=timeout)
+    except Exception:
+        pressure = 0.0
+        partial = True
+
+    # 2. Generate Signal with whatever time is left
+    remaining = deadline - loop.time()
+    if remaining <= 0:
+        return _counted(degraded_signal(event, "timeout"))
+    try:
+        with STAGE_LATENCY.time(stage="generate_signal"):
+            sig = await asyncio.wait_for(
+                signal_engine.generate_signal(event, onchain_confidence=pressure), timeout=remaining
+            )
+    except asyncio.TimeoutError:
+        return _counted(degraded_signal(event, "timeout"))
+    except Exception as e:
+        return _counted(degraded_signal(event, type(e).__name__))
+
+    if partial:
+        sig.degraded = True
+        sig.reason += " (onchain unavailable)"
+    return _counted(sig)
+
+
+def _counted(sig: TradeSignal) -> TradeSignal:
+    SIGNALS.inc(signal=sig.signal.value, degraded=sig.degraded)
+    return sig
+
+
+async def score_events(
+    events: List[UnlockEvent],
+    concurrency: Optional[int] = None,
+    timeout: Optional[float] = None,
+    source: str = "dashboard",
+) -> List[TradeSignal]:
+    """
+    Score events concurrently, capped by a semaphore. Results keep event order.
+    Signals are queued for the signal history under `source`.
+    """
+    concurrency = concurrency or settings.SIGNAL_CONCURRENCY
+    timeout = timeout or settings.SIGNAL_EVENT_TIMEOUT
+    semaphore = asyncio.Semaphore(concurrency)
+
+    # One batched, incremental log ingest for every token instead of one per event
+    addresses = [e.token_address for e in events if e.token_address]
+    pre_ingested = False
+    if addresses:
+        try:
+            with STAGE_LATENCY.time(stage="onchain_ingest"):
+                await asyncio.wait_for(onchain_service.ingest_transfers(addresses), timeout=timeout)
+            pre_ingested = True
+        except Exception as e:
+            logger.warning("Batch log ingest failed: %r", e)
+
+    async def bounded(event: UnlockEvent) -> TradeSignal:
+        async with semaphore:
+            return await score_event(event, timeout, refresh_onchain=not pre_ingested)
+
+    with STAGE_LATENCY.time(stage="score_events"):
+        signals = await asyncio.gather(*(bounded(e) for e in events))
+    signal_store.record(events, signals, source)
+    return signals
+
+
+async def score_events_bulk(events: Sequence[UnlockEvent], timeout: Optional[float] = None,
+                            source: str = "bulk") -> SignalColumns:
+    """
+    Bulk variant of score_events: UIS for all events in one vectorized pass, on-chain
+    pressure once per distinct token address, signals built as columns. The UIS pass
+    shares one deadline; if it misses it, every row degrades as in score_event.
+    """
+    timeout = timeout or settings.SIGNAL_EVENT_TIMEOUT
+    semaphore = asyncio.Semaphore(settings.SIGNAL_CONCURRENCY)
+
+    addresses = list(dict.fromkeys(e.token_address.lower() for e in events if e.token_address))
+    symbol_of = {e.token_address.lower(): e.token_symbol for e in events if e.token_address}
+    pre_ingested = False
+    if addresses:
+        try:
+            with STAGE_LATENCY.time(stage="onchain_ingest"):
+                await asyncio.wait_for(onchain_service.ingest_transfers(addresses), timeout=timeout)
+            pre_ingested = True
+        except Exception as e:
+            logger.warning("Batch log ingest failed: %r", e)
+
+    async def pressure(address: str) -> Optional[float]:
+        async with semaphore:
+            price = await market_service.get_current_price(symbol_of[address])
+            return await onchain_service.analyze_movement_to_cex(
+                address, price_usd=price, refresh=not pre_ingested
+            )
+
+    async def bounded(address: str) -> Optional[float]:
+        try:
+            return await asyncio.wait_for(pressure(address), timeout=timeout)
+        except Exception:
+            return None
+
+    uis_failure: Optional[str] = None
+
+    async def uis_batch() -> List[float]:
+        nonlocal uis_failure
+        try:
+            with STAGE_LATENCY.time(stage="uis_batch"):
+                return await asyncio.wait_for(signal_engine.calculate_uis_batch(events), timeout=timeout)
+        except asyncio.TimeoutError:
+            uis_failure = "timeout"
+        except Exception as e:
+            logger.warning("Batch UIS failed: %r", e)
+            uis_failure = type(e).__name__
+        return [0.0] * len(events)  # UIS 0 -> AVOID, degraded
+
+    async def pressures_batch() -> List[Optional[float]]:
+        with STAGE_LATENCY.time(stage="onchain_pressure_batch"):
+            return await asyncio.gather(*(bounded(a) for a in addresses))
+
+    uis, pressures = await asyncio.gather(uis_batch(), pressures_batch())
+    by_address: Dict[str, Optional[float]] = dict(zip(addresses, pressures))
+    per_event = [by_address.get(e.token_address.lower()) if e.token_address else 0.0 for e in events]
+    partial = np.fromiter((p is None for p in per_event), dtype=bool, count=len(events))
+    onchain = np.fromiter((p or 0.0 for p in per_event), dtype=float, count=len(events))
+    with STAGE_LATENCY.time(stage="build_signals"):
+        batch = build_signal_columns(events, np.asarray(uis), onchain, partial)
+    if uis_failure is not None:
+        batch.reason = [f"Degraded: {uis_failure}"] * len(events)
+    for code, signal_type in enumerate(SIGNAL_TYPES):
+        for degraded in (False, True):
+            n = int(np.count_nonzero((batch.signal == code) & (batch.degraded == degraded)))
+            if n:
+                SIGNALS.inc(n, signal=signal_type.value, degraded=degraded)
+    signal_store.record_columns(events, batch, source)
+    return batch
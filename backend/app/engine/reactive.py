@@ -0,0 +1,245 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import RESCORES, STAGE_LATENCY, record_error
+from app.engine.calculator import TradeSignal
+from app.engine.pipeline import score_event, score_events
+from app.services.market_data import MarketDataService, market_service
+from app.services.market_stream import market_stream
+from app.services.onchain import onchain_service
+from app.services.signal_store import signal_store
+from app.services.snapshot import snapshot_service
+from app.services.unlocks import UnlockEvent, unlock_service
+
+logger = logging.getLogger(__name__)
+
+TRIGGER_INFLOW = "cex_inflow"
+TRIGGER_PRICE = "price_move"
+TRIGGER_VOLUME = "volume_move"
+
+
+@dataclass(slots=True)
+class LiveSignal:
+    event: UnlockEvent
+    signal: TradeSignal
+    scored_at: float
+
+
+class ReactiveEngine:
+    """
+    Keeps the dashboard signals live between full recomputations.
+
+    A dependency map links each token (and its contract address and market symbol) to
+    the live signals it feeds. Two sources mark tokens dirty:
+      - new blocks: the transfer store's per-token cursors are polled every
+        REACTIVE_BLOCK_POLL_INTERVAL, and CEX-bound transfers above REACTIVE_INFLOW_USD
+        since the previous poll trigger a rescore;
+      - streamed tickers (MARKET_STREAMING): a price or 24h volume change beyond
+        REACTIVE_PRICE_MOVE_PCT / REACTIVE_VOLUME_MOVE_PCT against the value seen when
+        the token was last scored.
+    Inflows are read from the transfer store, so transfers ingested by other callers
+    (dashboard or bulk scoring) count too.
+    Only the signals of dirty tokens are rescored (SignalEngine.generate_signal via the
+    event pipeline) and the patched list is published through the snapshot service, so
+    the broadcaster pushes the diff. The whole calendar is rescored every
+    REACTIVE_FULL_RESCORE_INTERVAL to follow calendar changes.
+
+    Replaces the snapshot refresher when enabled. With several workers only the holder
+    of the snapshot leader lease (REACTIVE_LEADER_TTL) polls, rescores and publishes;
+    the others stand by and take over if it goes away.
+    """
+    def __init__(self):
+        self._live: Dict[str, Dict[datetime, LiveSignal]] = {}  # token -> unlock_date -> signal
+        self._order: List[Tuple[str, datetime]] = []  # Dashboard order
+        self._by_address: Dict[str, str] = {}  # lowercase contract address -> token
+        self._by_symbol: Dict[str, str] = {}  # market symbol -> token
+        # (exchange_id, token) -> (price, 24h quote volume) when the token was last scored
+        self._reference: Dict[Tuple[str, str], Tuple[float, Optional[float]]] = {}
+        self._dirty: Dict[str, str] = {}  # token -> first trigger since the last rescore
+        self._wake = asyncio.Event()
+        self._last_block = 0
+        self._leader = False
+
+    # --- Dependency map ----------------------------------------------------
+
+    def _track(self, events: List[UnlockEvent], signals: List[TradeSignal]):
+        now = time.monotonic()
+        self._live, self._order = {}, []
+        for event, sig in zip(events, signals):
+            self._live.setdefault(event.token_symbol, {})[event.unlock_date] = LiveSignal(event, sig, now)
+            self._order.append((event.token_symbol, event.unlock_date))
+        self._by_address = {e.token_address.lower(): e.token_symbol for e in events if e.token_address}
+        self._by_symbol = {MarketDataService._format_symbol(t): t for t in self._live}
+        self._reference = {k: v for k, v in self._reference.items() if k[1] in self._live}
+        self._dirty = {t: reason for t, reason in self._dirty.items() if t in self._live}
+
+    def signals(self) -> List[TradeSignal]:
+        return [self._live[token][unlock_date].signal for token, unlock_date in self._order]
+
+    def _mark(self, token: str, trigger: str):
+        if token in self._live and token not in self._dirty:
+            self._dirty[token] = trigger
+            self._wake.set()
+
+    # --- Triggers ----------------------------------------------------------
+
+    def on_ticker(self, exchange_id: str, symbol: str, ticker: dict):
+        """
+        market_stream listener; runs on the event loop for every streamed ticker.
+        """
+        token = self._by_symbol.get(symbol)
+        price = ticker.get('last')
+        if token is None or not price:
+            return
+        volume = ticker.get('quoteVolume')
+        key = (exchange_id, token)
+        reference = self._reference.get(key)
+        if reference is None:
+            self._reference[key] = (price, volume)
+            return
+        ref_price, ref_volume = reference
+        if abs(price / ref_price - 1.0) * 100.0 >= settings.REACTIVE_PRICE_MOVE_PCT:
+            self._mark(token, TRIGGER_PRICE)
+        elif volume and ref_volume and abs(volume / ref_volume - 1.0) * 100.0 >= settings.REACTIVE_VOLUME_MOVE_PCT:
+            self._mark(token, TRIGGER_VOLUME)
+
+    async def poll_blocks(self):
+        """
+        Pull new CEX-bound transfers for every tracked token and mark the tokens whose
+        inflow since the previous poll reaches REACTIVE_INFLOW_USD.
+        """
+        addresses = list(self._by_address)
+        if not addresses or not settings.ALCHEMY_API_KEY:
+            return
+        since = self._last_block or onchain_service.last_block
+        await onchain_service.ingest_transfers(addresses)
+        self._last_block = onchain_service.last_block
+        if not since:
+            return  # First poll only establishes the cursor
+        # From the store, not this call's counts: other callers may have advanced the cursors
+        inflows = await onchain_service.cex_inflows(addresses, since + 1)
+        for address, logs in inflows.items():
+            token = self._by_address[address]
+            price = await market_service.get_current_price(token)
+            inflow = await onchain_service.inflow_usd(address, logs, price_usd=price)
+            # Without a price any inflow counts
+            if inflow is None or inflow >= settings.REACTIVE_INFLOW_USD:
+                self._mark(token, TRIGGER_INFLOW)
+
+    # --- Rescoring ---------------------------------------------------------
+
+    async def rescore_all(self):
+        events = await unlock_service.get_next_major_unlocks(limit=settings.DASHBOARD_LIMIT)
+        signals = await score_events(events, source='reactive')
+        self._track(events, signals)
+        self._reference.clear()
+        await self._publish()
+
+    async def rescore_dirty(self):
+        dirty, self._dirty = self._dirty, {}
+        affected = [(token, live) for token in dirty for live in self._live.get(token, {}).values()]
+        if not affected:
+            return
+        semaphore = asyncio.Semaphore(settings.SIGNAL_CONCURRENCY)
+
+        async def bounded(live: LiveSignal) -> TradeSignal:
+            async with semaphore:
+                # The block poller keeps transfers current; no per-event ingest
+                return await score_event(live.event, settings.SIGNAL_EVENT_TIMEOUT, refresh_onchain=False)
+
+        with STAGE_LATENCY.time(stage="reactive_rescore"):
+            signals = await asyncio.gather(*(bounded(live) for _, live in affected))
+        now = time.monotonic()
+        for (token, live), sig in zip(affected, signals):
+            live.signal, live.scored_at = sig, now
+        for token, trigger in dirty.items():
+            RESCORES.inc(trigger=trigger)
+            # Next ticker sets the new reference
+            for key in [k for k in self._reference if k[1] == token]:
+                del self._reference[key]
+        signal_store.record([live.event for _, live in affected], signals, source='reactive')
+        await self._publish()
+
+    async def _publish(self):
+        # Fenced on the lease: a leader that stalled past its TTL must not overwrite
+        # the dashboard its successor is publishing
+        if await snapshot_service.publish(self.signals(), leased=True) is None:
+            self._stand_by()
+
+    # --- Loops -------------------------------------------------------------
+
+    async def _block_loop(self):
+        while True:
+            try:
+                if self._leader:
+                    await self.poll_blocks()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Reactive block poll error: %r", e)
+                record_error('reactive', e)
+            await asyncio.sleep(settings.REACTIVE_BLOCK_POLL_INTERVAL)
+
+    def _stand_by(self):
+        """
+        Another worker holds the lease: drop local state and retry later.
+        """
+        self._leader = False
+        self._live, self._order, self._dirty = {}, [], {}
+        self._by_address, self._by_symbol = {}, {}
+        self._reference.clear()
+        self._last_block = 0
+        self._wake.clear()
+
+    async def run(self):
+        market_stream.add_listener(self.on_ticker)
+        blocks = asyncio.create_task(self._block_loop())
+        lease = settings.REACTIVE_LEADER_TTL
+        next_full = 0.0
+        try:
+            while True:
+                if blocks.done():
+                    error = None if blocks.cancelled() else blocks.exception()
+                    logger.error("Reactive block poller stopped (%r), restarting", error)
+                    if error is not None:
+                        record_error('reactive', error)
+                    blocks = asyncio.create_task(self._block_loop())
+                try:
+                    if not await snapshot_service.hold_lead(lease):
+                        self._stand_by()
+                        next_full = 0.0  # Rescore everything on taking over
+                    else:
+                        self._leader = True
+                        if time.monotonic() >= next_full:
+                            await self.rescore_all()
+                            next_full = time.monotonic() + settings.REACTIVE_FULL_RESCORE_INTERVAL
+                        elif self._dirty:
+                            await self.rescore_dirty()
+                        if not self._leader:
+                            next_full = 0.0  # Lost the lease while publishing
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.exception("Reactive rescoring error")
+                    record_error('reactive', e)
+                if not self._dirty:
+                    self._wake.clear()
+                # Wake in time to renew the lease (or to retry taking it)
+                timeout = lease / 3
+                if self._leader:
+                    timeout = min(max(next_full - time.monotonic(), 0.0), timeout)
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+                    # Coalesce bursts (one block often moves several tokens)
+                    await asyncio.sleep(settings.REACTIVE_DEBOUNCE)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            market_stream.remove_listener(self.on_ticker)
+            blocks.cancel()
+
+reactive_engine = ReactiveEngine()
@@ -0,0 +1,228 @@
+import math
+import numpy as np
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+from app.core.config import settings
+
+UIS_LOOKBACK = 30  # Daily candles used for volume / volatility
+
+Key = Tuple[str, str]  # (token, timeframe)
+
+
+class RollingStats:
+    """
+    Rolling window statistics per (token, timeframe), updated in O(1) per candle.
+
+    All state lives in preallocated (slots, window) ring buffers plus per-slot
+    running aggregates, so a token costs ~1 KB regardless of how many candles it
+    has seen. Per slot:
+      - USD volume: running sum of volume x close over the window
+      - return volatility: sliding-window Welford mean / M2 of simple returns
+      - ATR: running sum of true ranges
+    A candle with the same timestamp as the last one replaces it (the forming
+    candle), anything newer is appended. Aggregates are recomputed from the
+    buffers every few windows to bound floating point drift.
+    """
+    def __init__(self, window: int = UIS_LOOKBACK, capacity: int = 256):
+        self.window = window
+        self._slots: Dict[Key, int] = {}
+        self._alloc(capacity)
+
+    def _alloc(self, capacity: int):
+        w = self.window
+        self.close = np.zeros((capacity, w))
+        self.usd_volume = np.zeros((capacity, w))
+        self.true_range = np.zeros((capacity, w))
+        self.returns = np.zeros((capacity, max(w - 1, 1)))
+        self.head = np.zeros(capacity, dtype=np.int32)       # Next candle write position
+        self.count = np.zeros(capacity, dtype=np.int32)      # Candles in window
+        self.ret_head = np.zeros(capacity, dtype=np.int32)
+        self.ret_count = np.zeros(capacity, dtype=np.int32)
+        self.last_ts = np.full(capacity, -1, dtype=np.int64)
+        self.usd_sum = np.zeros(capacity)
+        self.tr_sum = np.zeros(capacity)
+        self.ret_mean = np.zeros(capacity)
+        self.ret_m2 = np.zeros(capacity)
+        self.updates = np.zeros(capacity, dtype=np.int64)
+
+    def _grow(self):
+        old = {name: getattr(self, name) for name in (
+            'close', 'usd_volume', 'true_range', 'returns', 'head', 'count', 'ret_head', 'ret_count',
+            'last_ts', 'usd_sum', 'tr_sum', 'ret_mean', 'ret_m2', 'updates',
+        )}
+        n = len(self.head)
+        self._alloc(n * 2)
+        for name, array in old.items():
+            getattr(self, name)[:n] = array
+
+    def _slot(self, key: Key, create: bool = False) -> Optional[int]:
+        slot = self._slots.get(key)
+        if slot is None and create:
+            if len(self._slots) == len(self.head):
+                self._grow()
+            slot = self._slots[key] = len(self._slots)
+        return slot
+
+    def __contains__(self, key: Key) -> bool:
+        return key in self._slots
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def reset(self, token: str, timeframe: str):
+        slot = self._slot((token.upper(), timeframe))
+        if slot is None:
+            return
+        self.head[slot] = self.count[slot] = self.ret_head[slot] = self.ret_count[slot] = 0
+        self.last_ts[slot] = -1
+        self.usd_sum[slot] = self.tr_sum[slot] = self.ret_mean[slot] = self.ret_m2[slot] = 0.0
+
+    # --- Updates -----------------------------------------------------------
+
+    def _welford_replace(self, slot: int, old: float, new: float):
+        n = self.ret_count[slot]
+        mean = self.ret_mean[slot]
+        new_mean = mean + (new - old) / n
+        self.ret_m2[slot] += (new - old) * (new - new_mean + old - mean)
+        self.ret_mean[slot] = new_mean
+
+    def _add_return(self, slot: int, r: float):
+        size = self.returns.shape[1]
+        pos = self.ret_head[slot]
+        if self.ret_count[slot] == size:
+            # Window full: slide (replace the oldest return)
+            self._welford_replace(slot, self.returns[slot, pos], r)
+        else:
+            self.ret_count[slot] += 1
+            delta = r - self.ret_mean[slot]
+            self.ret_mean[slot] += delta / self.ret_count[slot]
+            self.ret_m2[slot] += delta * (r - self.ret_mean[slot])
+        self.returns[slot, pos] = r
+        self.ret_head[slot] = (pos + 1) % size
+
+    def update(self, token: str, timeframe: str, ts: int, high: float, low: float, close: float,
+               volume: float):
+        """
+        Apply one candle. Older than the last seen candle: ignored.
+        """
+        slot = self._slot((token.upper(), timeframe), create=True)
+        last_ts = self.last_ts[slot]
+        if ts < last_ts:
+            return
+        w = self.window
+        count = self.count[slot]
+        usd = volume * close
+
+        if ts == last_ts:
+            # Forming candle revised: swap its contributions
+            pos = (self.head[slot] - 1) % w
+            prev_close = self.close[slot, (pos - 1) % w] if count > 1 else None
+            tr = _true_range(high, low, prev_close)
+            self.usd_sum[slot] += usd - self.usd_volume[slot, pos]
+            self.tr_sum[slot] += tr - self.true_range[slot, pos]
+            if prev_close and self.ret_count[slot]:
+                ret_pos = (self.ret_head[slot] - 1) % self.returns.shape[1]
+                r = close / prev_close - 1.0
+                self._welford_replace(slot, self.returns[slot, ret_pos], r)
+                self.returns[slot, ret_pos] = r
+        else:
+            pos = self.head[slot]
+            prev_close = self.close[slot, (pos - 1) % w] if count else None
+            tr = _true_range(high, low, prev_close)
+            if count == w:
+                # Evict the oldest candle
+                self.usd_sum[slot] -= self.usd_volume[slot, pos]
+                self.tr_sum[slot] -= self.true_range[slot, pos]
+            else:
+                self.count[slot] = count + 1
+            self.usd_sum[slot] += usd
+            self.tr_sum[slot] += tr
+            if prev_close:
+                self._add_return(slot, close / prev_close - 1.0)
+            self.head[slot] = (pos + 1) % w
+            self.last_ts[slot] = ts
+
+        self.close[slot, pos] = close
+        self.usd_volume[slot, pos] = usd
+        self.true_range[slot, pos] = tr
+
+        self.updates[slot] += 1
+        if self.updates[slot] % (4 * w) == 0:
+            self._recompute(slot)
+
+    def update_many(self, token: str, timeframe: str, ohlcv: Iterable[Sequence[float]]):
+        """
+        Apply [timestamp_ms, open, high, low, close, volume] rows in order.
+        """
+        for ts, _, high, low, close, volume in ohlcv:
+            self.update(token, timeframe, int(ts), float(high), float(low), float(close), float(volume))
+
+    def ingest(self, token: str, timeframe: str, ohlcv: np.ndarray):
+        """
+        Bring a slot up to date with an (n, 6) OHLCV array (timestamps in ms, ascending):
+        only candles at or after the last seen timestamp are applied; an array that
+        does not overlap the state replaces it.
+        """
+        if not len(ohlcv):
+            return
+        slot = self._slot((token.upper(), timeframe))
+        if slot is not None and ohlcv[0, 0] > self.last_ts[slot]:
+            self.reset(token, timeframe)
+        elif slot is not None:
+            ohlcv = ohlcv[ohlcv[:, 0] >= self.last_ts[slot]]
+        self.update_many(token, timeframe, ohlcv.tolist())
+
+    def _recompute(self, slot: int):
+        """
+        Exact aggregates from the buffers (O(window)).
+        """
+        count = self.count[slot]
+        idx = (self.head[slot] - count + np.arange(count)) % self.window
+        self.usd_sum[slot] = self.usd_volume[slot, idx].sum()
+        self.tr_sum[slot] = self.true_range[slot, idx].sum()
+        n = self.ret_count[slot]
+        if n:
+            size = self.returns.shape[1]
+            r = self.returns[slot, (self.ret_head[slot] - n + np.arange(n)) % size]
+            self.ret_mean[slot] = r.mean()
+            self.ret_m2[slot] = ((r - r.mean()) ** 2).sum()
+
+    # --- Reads -------------------------------------------------------------
+
+    def stats(self, token: str, timeframe: str, volatility: Optional[str] = None) -> Optional[Tuple[float, float, float]]:
+        """
+        (avg USD volume per candle, volatility, last close), None if never updated.
+        """
+        slot = self._slot((token.upper(), timeframe))
+        if slot is None or not self.count[slot]:
+            return None
+        avg, vol, last = self.stats_many([(token, timeframe)], volatility)
+        return float(avg[0]), float(vol[0]), float(last[0])
+
+    def stats_many(self, keys: Sequence[Key], volatility: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Vectorized stats for many keys; unknown keys give (0, 0, NaN), which the UIS
+        kernel treats as insufficient data.
+        volatility: 'stdev' (sample std of simple returns) or 'atr' (ATR / last close).
+        """
+        volatility = volatility or settings.UIS_VOLATILITY
+        slots = np.array([self._slots.get((t.upper(), tf), -1) for t, tf in keys], dtype=np.intp)
+        known = slots >= 0
+        s = np.where(known, slots, 0)
+        count = np.where(known, self.count[s], 0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg_usd_volume = np.where(count > 0, self.usd_sum[s] / count, 0.0)
+            last_close = np.where(count > 0, self.close[s, (self.head[s] - 1) % self.window], np.nan)
+            if volatility == 'atr':
+                vol = np.where(count > 0, self.tr_sum[s] / count / last_close, 0.0)
+            else:
+                n = np.where(known, self.ret_count[s], 0)
+                vol = np.where(n > 1, np.sqrt(np.maximum(self.ret_m2[s], 0.0) / (n - 1)), 0.0)
+        return avg_usd_volume, np.nan_to_num(vol), last_close
+
+
+def _true_range(high: float, low: float, prev_close: Optional[float]) -> float:
+    if prev_close is None or math.isnan(prev_close):
+        return high - low
+    return max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+rolling_stats = RollingStats()
@@ -0,0 +1,255 @@
+import asyncio
+import time
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+from app.core.config import settings
+from app.core.metrics import STAGE_LATENCY
+from app.engine.calculator import UIS_TIMEFRAME, _unlock_tokens
+from app.engine.rolling import UIS_LOOKBACK, rolling_stats
+from app.services.market_data import market_service
+from app.services.supply import supply_service
+from app.services.unlock_store import utc_ms
+from app.services.unlocks import UnlockEvent
+
+
+@dataclass(slots=True)
+class ScenarioInputs:
+    """
+    Per-event model inputs, aligned with the event list.
+    """
+    volatility: np.ndarray        # Daily stdev of returns over the UIS lookback
+    unlock_value_usd: np.ndarray
+    absorbable_usd: np.ndarray    # Bid notional within SIM_ABSORB_BAND_PCT, assumed to refill daily
+    is_cliff: np.ndarray          # bool
+    has_data: np.ndarray          # bool; False -> no candles, results are NaN
+
+
+@dataclass(slots=True)
+class SimulationResult:
+    """
+    Price-change distributions per event and horizon, as arrays:
+      return_quantiles  (events, horizons, quantiles)  % change from the unlock-time price
+      mean_return       (events, horizons)             %
+      prob_drawdown     (events, horizons, drawdowns)  P(peak-to-trough drawdown > X% within the horizon)
+    """
+    token: List[str]
+    unlock_ts: np.ndarray         # int64, ms since epoch
+    horizons_days: np.ndarray
+    quantiles: np.ndarray
+    drawdown_pct: np.ndarray
+    n_paths: int
+    return_quantiles: np.ndarray
+    mean_return: np.ndarray
+    prob_drawdown: np.ndarray
+    inputs: ScenarioInputs
+
+    def __len__(self) -> int:
+        return len(self.token)
+
+    def to_json(self) -> bytes:
+        import orjson
+        return orjson.dumps(
+            {
+                "n": len(self),
+                "n_paths": self.n_paths,
+                "horizons_days": self.horizons_days,
+                "quantiles": self.quantiles,
+                "drawdown_pct": self.drawdown_pct,
+                "columns": {
+                    "token": self.token,
+                    "unlock_ts": self.unlock_ts,
+                    "volatility": self.inputs.volatility,
+                    "unlock_value_usd": self.inputs.unlock_value_usd,
+                    "absorbable_usd": self.inputs.absorbable_usd,
+                    "is_cliff": self.inputs.is_cliff,
+                    "return_quantiles": self.return_quantiles,
+                    "mean_return": self.mean_return,
+                    "prob_drawdown": self.prob_drawdown,
+                },
+            },
+            option=orjson.OPT_SERIALIZE_NUMPY,  # NaN (no data) -> null
+        )
+
+
+def sell_schedule(days: int) -> np.ndarray:
+    """
+    (2, days) share of the sold amount hitting the market each day: row 0 for linear
+    unlocks (even over SIM_SELL_DAYS), row 1 for cliffs (front-loaded, halving every
+    SIM_CLIFF_HALF_LIFE_DAYS). Each row sums to 1 over SIM_SELL_DAYS, so horizons
+    shorter than that only see part of the selling.
+    """
+    sell_days = max(settings.SIM_SELL_DAYS, 1)
+    t = np.arange(sell_days, dtype=float)
+    linear = np.full(sell_days, 1.0 / sell_days)
+    cliff = 0.5 ** (t / settings.SIM_CLIFF_HALF_LIFE_DAYS)
+    cliff /= cliff.sum()
+    schedule = np.zeros((2, days))
+    n = min(days, sell_days)
+    schedule[0, :n] = linear[:n]
+    schedule[1, :n] = cliff[:n]
+    return schedule.astype(np.float32)
+
+
+def _log_impact(inputs: ScenarioInputs, rows: np.ndarray, days: int) -> np.ndarray:
+    """
+    (days, events) cumulative log price change from selling at full sell-through.
+    Selling the bid depth within the band in one day moves the price by the band,
+    with square-root impact below and above that (the book refills daily).
+    """
+    schedule = sell_schedule(days)[inputs.is_cliff[rows].astype(np.intp)]  # (events, days)
+    sold = schedule * (inputs.unlock_value_usd[rows] / inputs.absorbable_usd[rows])[:, None]
+    impact = np.minimum(settings.SIM_ABSORB_BAND_PCT / 100.0 * np.sqrt(sold), 0.99)
+    return np.cumsum(np.log1p(-impact), axis=1).T.astype(np.float32)
+
+
+def simulate(inputs: ScenarioInputs, horizons_days: Sequence[int], n_paths: int,
+             quantiles: Sequence[float], drawdown_pct: Sequence[float],
+             seed: Optional[int] = None, deadline: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Monte Carlo price paths for every event; returns (return_quantiles, mean_return,
+    prob_drawdown), see SimulationResult.
+
+    Log price of event i on path p after t days:
+        sqrt(S_p) * impact_i(t) + vol_i * W_p(t) - vol_i^2 * t / 2
+    with S_p the path's sell-through (Beta, mean SIM_SELL_THROUGH) and W_p a standard
+    random walk. S and W are drawn once and shared by all events (common random
+    numbers): each event's distribution is exact, and differences between events are
+    not blurred by sampling noise. The state is (events, paths) float32 arrays stepped
+    one day at a time, in chunks of SIM_MAX_CELLS, with the running peak and drawdown
+    updated in place, so no (events, paths, days) array is materialised. Quantiles
+    are nearest-rank. Past `deadline` (time.monotonic()) it raises TimeoutError: the
+    worker thread cannot be cancelled from outside.
+    """
+    horizons = sorted(set(int(h) for h in horizons_days))
+    days = horizons[-1]
+    quantiles = np.asarray(quantiles, dtype=float)
+    log_drawdowns = np.log1p(-np.asarray(drawdown_pct, dtype=np.float32) / 100.0)
+    n = len(inputs.volatility)
+    return_quantiles = np.full((n, len(horizons), len(quantiles)), np.nan)
+    mean_return = np.full((n, len(horizons)), np.nan)
+    prob_drawdown = np.full((n, len(horizons), len(log_drawdowns)), np.nan)
+
+    rng = np.random.default_rng(seed)
+    k, m = settings.SIM_SELL_THROUGH_CONCENTRATION, settings.SIM_SELL_THROUGH
+    sell_scale = np.sqrt(rng.beta(m * k, (1.0 - m) * k, size=n_paths)).astype(np.float32)
+    walk = np.cumsum(rng.standard_normal((days, n_paths), dtype=np.float32), axis=0)
+    ranks = np.round(quantiles / 100.0 * (n_paths - 1)).astype(np.intp)
+    step = np.arange(1, days + 1, dtype=np.float32)
+
+    rows = np.flatnonzero(inputs.has_data)
+    chunk = max(settings.SIM_MAX_CELLS // n_paths, 1)
+    for start in range(0, len(rows), chunk):
+        r = rows[start:start + chunk]
+        impact = _log_impact(inputs, r, days)
+        vol = inputs.volatility[r].astype(np.float32)
+        convexity = (vol * vol / 2)[None, :] * step[:, None]  # (days, events)
+
+        log_price = np.empty((len(r), n_paths), dtype=np.float32)
+        scratch = np.empty_like(log_price)
+        peak = np.zeros_like(log_price)  # The unlock-time price is the first peak
+        drawdown = np.zeros_like(log_price)
+        for t in range(days):
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError("Simulation exceeded SIM_TIMEOUT")
+            np.multiply.outer(impact[t], sell_scale, out=log_price)
+            np.multiply.outer(vol, walk[t], out=scratch)
+            log_price += scratch
+            log_price -= convexity[t][:, None]
+            np.maximum(peak, log_price, out=peak)
+            np.subtract(log_price, peak, out=scratch)
+            np.minimum(drawdown, scratch, out=drawdown)
+            if t + 1 not in horizons:
+                continue
+            h = horizons.index(t + 1)
+            # Ranks of the log price are ranks of the return: transform only the picks
+            picked = np.partition(log_price, ranks, axis=1)[:, ranks]
+            return_quantiles[r, h] = np.expm1(picked) * 100.0
+            mean_return[r, h] = (np.exp(log_price).mean(axis=1, dtype=np.float64) - 1.0) * 100.0
+            for j, threshold in enumerate(log_drawdowns):
+                prob_drawdown[r, h, j] = np.count_nonzero(drawdown < threshold, axis=1) / n_paths
+    return return_quantiles, mean_return, prob_drawdown
+
+
+async def scenario_inputs(events: Sequence[UnlockEvent]) -> ScenarioInputs:
+    """
+    Volatility and last close from the rolling daily stats, unlock value (supply-backed
+    when the event has no token amount) and bid depth, fetched once per token.
+    """
+    symbols = list(dict.fromkeys(e.token_symbol for e in events))
+    semaphore = asyncio.Semaphore(settings.SIGNAL_CONCURRENCY)
+
+    async def fetch(symbol: str):
+        async with semaphore:
+            ohlcv = await market_service.get_ohlcv_array(symbol, timeframe=UIS_TIMEFRAME, limit=UIS_LOOKBACK)
+            rolling_stats.ingest(symbol, UIS_TIMEFRAME, ohlcv)
+            try:
+                depth = await asyncio.wait_for(
+                    market_service.get_depth_liquidity(symbol), timeout=settings.SIGNAL_EVENT_TIMEOUT
+                )
+            except Exception:
+                depth = None
+            return not len(ohlcv), depth
+
+    results = await asyncio.gather(*(fetch(sym) for sym in symbols))
+    avg_daily_volume, volatility, last_close = rolling_stats.stats_many(
+        [(sym, UIS_TIMEFRAME) for sym in symbols], volatility='stdev'
+    )
+    last_close[[empty for empty, _ in results]] = np.nan
+    band = settings.SIM_ABSORB_BAND_PCT
+    absorbable = np.array([depth.absorbable_usd(band) if depth else 0.0 for _, depth in results])
+    # No book: approximate the band depth from traded volume
+    absorbable = np.where(absorbable > 0, absorbable, avg_daily_volume * settings.SIM_FALLBACK_DEPTH_FRACTION)
+
+    supplies = await supply_service.get_supplies(
+        (e.token_symbol, e.token_address) for e in events if not e.unlock_amount
+    )
+    unlock_tokens = np.fromiter(
+        (_unlock_tokens(e, getattr(supplies.get(e.token_symbol.upper()), 'circulating', None)) for e in events),
+        dtype=float, count=len(events),
+    )
+
+    row_of = {sym: i for i, sym in enumerate(symbols)}
+    rows = np.fromiter((row_of[e.token_symbol] for e in events), dtype=np.intp, count=len(events))
+    unlock_value = np.nan_to_num(unlock_tokens * last_close[rows])
+    return ScenarioInputs(
+        volatility=volatility[rows],
+        unlock_value_usd=unlock_value,
+        absorbable_usd=absorbable[rows],
+        is_cliff=np.fromiter((bool(e.is_cliff) for e in events), dtype=bool, count=len(events)),
+        has_data=~np.isnan(last_close[rows]) & (absorbable[rows] > 0),
+    )
+
+
+async def simulate_events(events: Sequence[UnlockEvent], n_paths: Optional[int] = None,
+                          horizons_days: Optional[Sequence[int]] = None,
+                          drawdown_pct: Optional[Sequence[float]] = None,
+                          seed: Optional[int] = None) -> SimulationResult:
+    """
+    Scenario mode for a batch of events: gather inputs, then run the simulation in a
+    worker thread so the event loop keeps serving, for at most SIM_TIMEOUT seconds.
+    """
+    n_paths = n_paths or settings.SIM_PATHS
+    horizons = np.asarray(sorted(set(horizons_days or settings.SIM_HORIZONS_DAYS)), dtype=np.intp)
+    quantiles = np.asarray(settings.SIM_QUANTILES, dtype=float)
+    drawdowns = np.asarray(drawdown_pct or settings.SIM_DRAWDOWN_PCT, dtype=float)
+
+    with STAGE_LATENCY.time(stage="simulation_inputs"):
+        inputs = await scenario_inputs(events)
+    with STAGE_LATENCY.time(stage="simulation"):
+        return_quantiles, mean_return, prob_drawdown = await asyncio.to_thread(
+            simulate, inputs, horizons, n_paths, quantiles, drawdowns, seed,
+            time.monotonic() + settings.SIM_TIMEOUT,
+        )
+    return SimulationResult(
+        token=[e.token_symbol for e in events],
+        unlock_ts=np.fromiter((utc_ms(e.unlock_date) for e in events), dtype=np.int64, count=len(events)),
+        horizons_days=horizons,
+        quantiles=quantiles,
+        drawdown_pct=drawdowns,
+        n_paths=n_paths,
+        return_quantiles=return_quantiles,
+        mean_return=mean_return,
+        prob_drawdown=prob_drawdown,
+        inputs=inputs,
+    )
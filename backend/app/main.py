@@ -1,11 +1,77 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from app.core.database import db
+    from app.core.http import close_http_client, open_http_client
+    from app.core.redis import close_redis
+    from app.engine.reactive import reactive_engine
+    from app.services.broadcaster import broadcaster
+    from app.services.market_data import market_service
+    from app.services.market_stream import market_stream
+    from app.services.signal_store import signal_store
+    from app.services.snapshot import snapshot_service
+    from app.services.unlocks import unlock_service
+
+    logging.basicConfig(level=settings.LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    # Shared outbound HTTP pool for unlock providers, RPC and supply lookups
+    open_http_client()
+
+    # Connectors are built lazily; pay their import cost off the request path
+    warmer = None
+    if settings.WARM_IMPORTS:
+        warmer = asyncio.create_task(asyncio.to_thread(market_service.warm_up))
+
+    # Unlock calendar: pull and upsert into DuckDB on a schedule
+    ingester = None
+    if settings.UNLOCK_INGEST_ENABLED:
+        ingester = asyncio.create_task(unlock_service.run_ingestion_forever())
+
+    # Background refresher: one dashboard computation per tick for all clients,
+    # or only rescoring the tokens whose on-chain / market inputs moved
+    refresher = None
+    if settings.REACTIVE_ENABLED:
+        refresher = asyncio.create_task(reactive_engine.run())
+    elif settings.SNAPSHOT_REFRESH_ENABLED:
+        refresher = asyncio.create_task(snapshot_service.run_forever())
+
+    # Streaming top-of-book / depth for upcoming unlock tokens (opt-in)
+    streamer = None
+    if settings.MARKET_STREAMING:
+        streamer = asyncio.create_task(market_stream.run())
+
+    # Signal history: move old rows from DuckDB to Parquet
+    archiver = None
+    if settings.SIGNAL_HISTORY_ENABLED:
+        archiver = asyncio.create_task(signal_store.run_archiver_forever())
+
+    yield
+
+    for task in (warmer, ingester, refresher, streamer, archiver):
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    await market_stream.close()
+    await broadcaster.close()
+    await market_service.close_all()
+    await close_http_client()
+    await close_redis()
+    await asyncio.to_thread(db.close)  # Drains queued history writes off the loop
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    lifespan=lifespan
 )
 
 from app.api.v1.api import api_router
@@ -18,6 +84,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Snapshot-Generation"],
 )
 
 @app.get("/")
@@ -31,3 +98,31 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus text exposition of this worker's counters and histograms.
+    """
+    from app.core.metrics import CONTENT_TYPE, render
+    return Response(content=await render(), media_type=CONTENT_TYPE)
+
+@app.get("/metrics/profile")
+async def profile(
+    seconds: float = Query(10.0, gt=0),
+    all_threads: bool = Query(False),
+):
+    """
+    Sample this worker's event loop (or all threads) for `seconds` under live
+    traffic and return collapsed stacks for a flame graph. Off unless PROFILER_ENABLED.
+    """
+    from app.core.profiler import ProfilerBusyError, profiler
+    if not settings.PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler disabled")
+    try:
+        stacks = await profiler.profile(
+            min(seconds, settings.PROFILER_MAX_SECONDS), settings.PROFILER_INTERVAL, all_threads
+        )
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return Response(content=stacks, media_type="text/plain")
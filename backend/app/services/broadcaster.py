@@ -0,0 +1,123 @@
+import asyncio
+import json
+import logging
+from typing import Dict, List, Optional, Set
+from app.core.config import settings
+from app.core.metrics import record_error
+from app.services.snapshot import snapshot_service
+
+logger = logging.getLogger(__name__)
+
+# Fields whose change is worth pushing to clients
+DIFF_FIELDS = ("signal", "uis_score", "confidence")
+
+
+class Subscriber:
+    """
+    One connected client. Messages are pre-encoded JSON strings shared by all subscribers.
+    """
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=maxsize)
+
+
+class SignalBroadcaster:
+    """
+    Watches the dashboard snapshot and fans out per-token diffs to WebSocket/SSE clients.
+    Each message is encoded once per generation, not once per client. A client whose
+    queue is full never blocks the broadcaster: its backlog is replaced by a full resync.
+    """
+    def __init__(self):
+        self._subscribers: Set[Subscriber] = set()
+        self._state: Dict[str, dict] = {}
+        self._generation = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def _snapshot_message(self) -> str:
+        return json.dumps({
+            "type": "snapshot",
+            "generation": self._generation,
+            "signals": list(self._state.values()),
+        })
+
+    async def subscribe(self) -> Subscriber:
+        if self._task is None or self._task.done():
+            await self._sync()
+            self._task = asyncio.create_task(self._watch())
+        sub = Subscriber(settings.STREAM_QUEUE_SIZE)
+        sub.queue.put_nowait(self._snapshot_message())
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        self._subscribers.discard(sub)
+
+    def _publish(self, message: str):
+        for sub in list(self._subscribers):
+            try:
+                sub.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Slow consumer: drop its backlog and resend the full state instead
+                while not sub.queue.empty():
+                    sub.queue.get_nowait()
+                sub.queue.put_nowait(self._snapshot_message())
+
+    @staticmethod
+    def _diff(old: Dict[str, dict], new: Dict[str, dict]) -> tuple[List[dict], List[str]]:
+        upserts = [
+            sig for token, sig in new.items()
+            if token not in old or any(old[token].get(f) != sig.get(f) for f in DIFF_FIELDS)
+        ]
+        removed = [token for token in old if token not in new]
+        return upserts, removed
+
+    async def _sync(self):
+        """
+        Pull the latest snapshot and publish a diff if its generation moved.
+        """
+        generation = await snapshot_service.get_generation()
+        if generation == self._generation:
+            return
+        snapshot = await snapshot_service.get()
+        if snapshot is None:
+            return
+
+        new_state = {sig["token"]: sig for sig in json.loads(snapshot.payload)}
+        upserts, removed = self._diff(self._state, new_state)
+        self._state = new_state
+        self._generation = snapshot.generation
+
+        if upserts or removed:
+            self._publish(json.dumps({
+                "type": "diff",
+                "generation": self._generation,
+                "upserts": upserts,
+                "removed": removed,
+            }))
+
+    async def _watch(self):
+        while True:
+            # Wake immediately on local refreshes, otherwise poll for other workers' ticks
+            try:
+                await asyncio.wait_for(snapshot_service.changed.wait(), settings.STREAM_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            snapshot_service.changed.clear()
+            try:
+                await self._sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Broadcast error: %r", e)
+                record_error('broadcaster', e)
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._subscribers.clear()
+
+broadcaster = SignalBroadcaster()
@@ -0,0 +1,123 @@
+import threading
+import numpy as np
+from typing import TYPE_CHECKING, List, Optional, Tuple
+from app.core.database import db
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ohlcv (
+    exchange VARCHAR NOT NULL,
+    symbol VARCHAR NOT NULL,
+    timeframe VARCHAR NOT NULL,
+    ts BIGINT NOT NULL,          -- candle open time, ms since epoch
+    open DOUBLE,
+    high DOUBLE,
+    low DOUBLE,
+    close DOUBLE,
+    volume DOUBLE,
+    PRIMARY KEY (exchange, symbol, timeframe, ts)
+)
+"""
+
+UPSERT = """
+INSERT INTO ohlcv
+SELECT ?, ?, ?, timestamp, open, high, low, close, volume FROM candles
+ON CONFLICT (exchange, symbol, timeframe, ts) DO UPDATE SET
+    open = excluded.open, high = excluded.high, low = excluded.low,
+    close = excluded.close, volume = excluded.volume
+"""
+
+
+class CandleStore:
+    """
+    Local OHLCV cache in DuckDB keyed by (exchange, symbol, timeframe, ts).
+    Timestamps are kept as raw exchange milliseconds. DuckDB calls are blocking,
+    so the async helpers run reads on the database's reader pool and writes on its
+    single writer thread; each thread uses its own cursor.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _conn(self):
+        conn = db.get_connection()
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    conn.execute(SCHEMA)
+                    self._ready = True
+        return conn
+
+    def read_window_sync(self, exchange: str, symbol: str, timeframe: str, limit: int) -> np.ndarray:
+        """
+        Latest `limit` candles in ascending time order, as an (n, 6) float array of
+        OHLCV_COLUMNS (timestamps in ms, missing values NaN) for the live scoring path.
+        """
+        columns = self._conn().execute(
+            """
+            SELECT * FROM (
+                SELECT ts AS timestamp, open, high, low, close, volume
+                FROM ohlcv
+                WHERE exchange = ? AND symbol = ? AND timeframe = ?
+                ORDER BY ts DESC
+                LIMIT ?
+            ) ORDER BY timestamp
+            """,
+            [exchange, symbol, timeframe, limit],
+        ).fetchnumpy()
+        return np.column_stack([np.ma.filled(columns[name].astype(float), np.nan) for name in OHLCV_COLUMNS])
+
+    def read_range_sync(self, exchange: str, symbol: str, timeframe: str,
+                        start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> "pd.DataFrame":
+        """
+        All stored candles in [start_ms, end_ms], ascending.
+        """
+        return self._conn().execute(
+            """
+            SELECT ts AS timestamp, open, high, low, close, volume
+            FROM ohlcv
+            WHERE exchange = ? AND symbol = ? AND timeframe = ? AND ts BETWEEN ? AND ?
+            ORDER BY ts
+            """,
+            [exchange, symbol, timeframe, start_ms or 0, end_ms or 2**62],
+        ).df()
+
+    def bounds_sync(self, exchange: str, symbol: str, timeframe: str) -> Optional[Tuple[int, int]]:
+        """
+        (first, last) stored candle timestamps, or None if nothing is stored.
+        """
+        row = self._conn().execute(
+            "SELECT min(ts), max(ts) FROM ohlcv WHERE exchange = ? AND symbol = ? AND timeframe = ?",
+            [exchange, symbol, timeframe],
+        ).fetchone()
+        if not row or row[0] is None:
+            return None
+        return int(row[0]), int(row[1])
+
+    def upsert_sync(self, exchange: str, symbol: str, timeframe: str, ohlcv: List[list]) -> int:
+        import pandas as pd
+        if not ohlcv:
+            return 0
+        candles = pd.DataFrame(ohlcv, columns=OHLCV_COLUMNS)
+        conn = self._conn()
+        conn.register("candles", candles)
+        try:
+            conn.execute(UPSERT, [exchange, symbol, timeframe])
+        finally:
+            conn.unregister("candles")
+        return len(candles)
+
+    async def read_window(self, exchange: str, symbol: str, timeframe: str, limit: int) -> np.ndarray:
+        return await db.read(self.read_window_sync, exchange, symbol, timeframe, limit)
+
+    async def bounds(self, exchange: str, symbol: str, timeframe: str) -> Optional[Tuple[int, int]]:
+        return await db.read(self.bounds_sync, exchange, symbol, timeframe)
+
+    async def upsert(self, exchange: str, symbol: str, timeframe: str, ohlcv: List[list]) -> int:
+        return await db.write(self.upsert_sync, exchange, symbol, timeframe, ohlcv)
+
+candle_store = CandleStore()
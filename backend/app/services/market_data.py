@@ -1,115 +1,428 @@
-import ccxt.pro as ccxt  # Use Pro for potential WS upgrades, though standard async is base
-import ccxt.async_support as ccxt_async
 import asyncio
-from typing import Dict, List, Optional
+import logging
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional
 from datetime import datetime
-import pandas as pd
+import numpy as np
 from app.core.config import settings
+from app.core.metrics import ERRORS, EXCHANGE_ERRORS, EXCHANGE_LATENCY, cache_result, record_error
+from app.engine.depth import DepthMetrics, compute_depth_metrics, levels_to_array
+from app.services.candle_store import candle_store, OHLCV_COLUMNS
+from app.services.market_stream import market_stream
+
+if TYPE_CHECKING:
+    # ccxt and pandas dominate import time; they are imported on first use
+    import ccxt.async_support as ccxt_async
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+EXCHANGE_IDS = ('binance', 'bybit', 'okx')
+
+# Largest order book depth each venue accepts on REST
+BOOK_LIMIT_CAPS = {'bybit': 200, 'okx': 400}
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Per-venue breaker. Opens after `threshold` consecutive venue failures
+    (network, timeouts, rate limits). After `cooldown` it is half-open: allow() admits
+    a single probe, whose success closes it and whose failure re-opens it; concurrent
+    calls are still rejected while the probe runs.
+    """
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    @property
+    def is_open(self) -> bool:
+        """
+        Whether calls would be rejected now; a half-open venue with no probe in
+        flight counts as available.
+        """
+        if self.opened_at is None:
+            return False
+        return self.probing or time.monotonic() - self.opened_at < self.cooldown
+
+    def allow(self) -> bool:
+        if self.is_open:
+            return False
+        if self.opened_at is not None:
+            self.probing = True  # Half-open: this call is the probe
+        return True
+
+    def release(self):
+        """
+        End a probe that gave no verdict (cancelled, or a non-venue error); the next
+        call probes again.
+        """
+        self.probing = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.probing or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+        self.probing = False
+
 
 class MarketDataService:
     def __init__(self):
-        self.exchanges: Dict[str, ccxt_async.Exchange] = {}
-        self._initialize_exchanges()
-
-    def _initialize_exchanges(self):
-        # Initialize connectors with rate limits enabled
-        common_config = {
-            'enableRateLimit': True,
-            'options': {'defaultType': 'spot'},  # Default to spot, can switch to future
+        # Connectors are built on first use, so importing this module stays cheap
+        self.exchanges: Dict[str, "ccxt_async.Exchange"] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {
+            exchange_id: CircuitBreaker(settings.EXCHANGE_BREAKER_THRESHOLD, settings.EXCHANGE_BREAKER_COOLDOWN)
+            for exchange_id in EXCHANGE_IDS
         }
 
-        # BINANCE
-        self.exchanges['binance'] = ccxt_async.binance({
-            **common_config,
-            'apiKey': settings.BINANCE_API_KEY,
-            'secret': settings.BINANCE_SECRET,
-        })
-
-        # BYBIT
-        self.exchanges['bybit'] = ccxt_async.bybit({
-            **common_config,
-            'apiKey': settings.BYBIT_API_KEY,
-            'secret': settings.BYBIT_SECRET,
-        })
-
-        # OKX
-        self.exchanges['okx'] = ccxt_async.okx({
-            **common_config,
-            'apiKey': settings.OKX_API_KEY,
-            'secret': settings.OKX_SECRET,
-            'password': settings.OKX_PASSPHRASE,
-        })
+    @staticmethod
+    def _credentials(exchange_id: str) -> dict:
+        if exchange_id == 'binance':
+            return {'apiKey': settings.BINANCE_API_KEY, 'secret': settings.BINANCE_SECRET}
+        if exchange_id == 'bybit':
+            return {'apiKey': settings.BYBIT_API_KEY, 'secret': settings.BYBIT_SECRET}
+        if exchange_id == 'okx':
+            return {'apiKey': settings.OKX_API_KEY, 'secret': settings.OKX_SECRET, 'password': settings.OKX_PASSPHRASE}
+        return {}
+
+    def _exchange(self, exchange_id: str) -> Optional["ccxt_async.Exchange"]:
+        """
+        The venue's connector, constructed (with rate limits enabled) on first use.
+        """
+        if exchange_id not in self.breakers:
+            return None
+        exchange = self.exchanges.get(exchange_id)
+        if exchange is None:
+            import ccxt.async_support as ccxt_async
+            exchange = self.exchanges[exchange_id] = getattr(ccxt_async, exchange_id)({
+                'enableRateLimit': True,
+                'options': {'defaultType': 'spot'},  # Default to spot, can switch to future
+                **self._credentials(exchange_id),
+            })
+        return exchange
+
+    @staticmethod
+    def warm_up():
+        """
+        Import the heavy connector / DataFrame modules ahead of the first request.
+        Blocking; the lifespan runs it in a thread after the worker starts serving.
+        """
+        import ccxt.async_support  # noqa: F401
+        import pandas  # noqa: F401
+
+    def healthy_exchanges(self) -> List[str]:
+        return [ex_id for ex_id in EXCHANGE_IDS if not self.breakers[ex_id].is_open]
+
+    async def _guarded(self, exchange_id: str, coro):
+        """
+        Run an exchange call through that venue's circuit breaker.
+        Only venue-level failures count; e.g. a missing symbol does not trip the breaker.
+        Latency and errors (by ccxt error type) are recorded per venue and method.
+        """
+        import ccxt.async_support as ccxt_async
+        method = getattr(coro, '__name__', 'call')
+        breaker = self.breakers[exchange_id]
+        if not breaker.allow():
+            coro.close()
+            EXCHANGE_ERRORS.inc(exchange=exchange_id, method=method, error='CircuitOpenError')
+            raise CircuitOpenError(f"{exchange_id} circuit open")
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(coro, timeout=settings.EXCHANGE_REQUEST_TIMEOUT)
+        except Exception as e:
+            EXCHANGE_ERRORS.inc(exchange=exchange_id, method=method, error=type(e).__name__)
+            if isinstance(e, (ccxt_async.NetworkError, asyncio.TimeoutError)):
+                breaker.record_failure()
+            raise
+        finally:
+            breaker.release()
+            EXCHANGE_LATENCY.observe(time.perf_counter() - start, exchange=exchange_id, method=method)
+        breaker.record_success()
+        return result
+
+    def _resolve(self, exchange_id: Optional[str]) -> Optional[str]:
+        """
+        Explicit venue wins; otherwise None means aggregated mode, else the default venue.
+        """
+        if exchange_id:
+            return exchange_id
+        return None if settings.MARKET_DATA_AGGREGATE else settings.DEFAULT_EXCHANGE
 
     async def close_all(self):
         for exchange in self.exchanges.values():
             await exchange.close()
+        self.exchanges.clear()
+
+    @staticmethod
+    def _format_symbol(symbol: str) -> str:
+        # Ensure symbol format (e.g., BTC/USDT)
+        formatted_symbol = symbol.upper()
+        if '/' not in formatted_symbol:
+            formatted_symbol = f"{formatted_symbol}/USDT"
+        return formatted_symbol
 
-    async def get_ohlcv(self, symbol: str, exchange_id: str = 'binance', timeframe: str = '1d', limit: int = 100) -> pd.DataFrame:
+    async def get_ohlcv(self, symbol: str, exchange_id: Optional[str] = None, timeframe: str = '1d', limit: int = 100) -> "pd.DataFrame":
         """
-        Fetch OHLCV data and seek the most liquid exchange if default fails.
+        Fetch OHLCV data from one venue, or a volume-consolidated view across all
+        healthy venues in aggregated mode (exchange_id=None with MARKET_DATA_AGGREGATE).
         """
-        exchange = self.exchanges.get(exchange_id)
+        return self._to_frame(await self.get_ohlcv_array(symbol, exchange_id, timeframe, limit))
+
+    async def get_ohlcv_array(self, symbol: str, exchange_id: Optional[str] = None, timeframe: str = '1d',
+                              limit: int = 100) -> np.ndarray:
+        """
+        get_ohlcv as an (n, 6) float array of OHLCV_COLUMNS with ms timestamps, empty
+        on failure. The scoring path stays on arrays; no DataFrame is built.
+        """
+        exchange_id = self._resolve(exchange_id)
+        if exchange_id is None:
+            return await self._get_ohlcv_aggregated(symbol, timeframe, limit)
+        return await self._get_ohlcv_single(symbol, exchange_id, timeframe, limit)
+
+    async def _get_ohlcv_aggregated(self, symbol: str, timeframe: str, limit: int) -> np.ndarray:
+        """
+        Sum volume across venues; open/close are volume-weighted (plain means for
+        candles without volume), high/low are extremes. Missing values are skipped.
+        """
+        arrays = await asyncio.gather(*(
+            self._get_ohlcv_single(symbol, ex_id, timeframe, limit) for ex_id in self.healthy_exchanges()
+        ))
+        arrays = [a for a in arrays if len(a)]
+        if len(arrays) <= 1:
+            return arrays[0] if arrays else _empty_ohlcv()
+
+        rows = np.concatenate(arrays)
+        timestamps, candle = np.unique(rows[:, 0], return_inverse=True)
+        n = len(timestamps)
+        _, open_, high, low, close, volume = rows.T
+        volume = np.nan_to_num(volume)
+
+        def total(values: np.ndarray) -> np.ndarray:
+            return np.bincount(candle, np.nan_to_num(values), n)
+
+        def mean(values: np.ndarray) -> np.ndarray:
+            return total(values) / np.bincount(candle, ~np.isnan(values), n)
+
+        out = np.full((n, len(OHLCV_COLUMNS)), np.nan)
+        out[:, 0] = timestamps
+        np.fmax.at(out[:, 2], candle, high)
+        np.fmin.at(out[:, 3], candle, low)
+        out[:, 5] = total_volume = total(volume)
+        has_volume = total_volume > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out[:, 1] = np.where(has_volume, total(open_ * volume) / total_volume, mean(open_))
+            out[:, 4] = np.where(has_volume, total(close * volume) / total_volume, mean(close))
+        return out[-limit:]
+
+    async def _get_ohlcv_single(self, symbol: str, exchange_id: str, timeframe: str, limit: int) -> np.ndarray:
+        """
+        With the candle store enabled, the cached window is read from DuckDB and only
+        candles from the last stored timestamp onward are requested from the exchange.
+        That needs `limit` contiguous cached candles reaching into the current window;
+        otherwise (partial backfill, gaps, an earlier smaller limit) the whole window
+        is fetched.
+        """
+        exchange = self._exchange(exchange_id)
         if not exchange:
             raise ValueError(f"Exchange {exchange_id} not initialized")
 
         try:
-            # Ensure symbol format (e.g., BTC/USDT)
-            formatted_symbol = symbol.upper()
-            if '/' not in formatted_symbol:
-                formatted_symbol = f"{formatted_symbol}/USDT"
-
-            ohlcv = await exchange.fetch_ohlcv(formatted_symbol, timeframe, limit=limit)
-            
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            return df
+            formatted_symbol = self._format_symbol(symbol)
+
+            if not settings.OHLCV_CACHE_ENABLED:
+                ohlcv = await self._guarded(exchange_id, exchange.fetch_ohlcv(formatted_symbol, timeframe, limit=limit))
+                return _ohlcv_array(ohlcv)
+
+            try:
+                cached = await candle_store.read_window(exchange_id, formatted_symbol, timeframe, limit)
+            except Exception as e:
+                logger.warning("Candle store read error for %s: %s", formatted_symbol, e)
+                record_error('candle_store', e)
+                cached = _empty_ohlcv()
+
+            tf_ms = exchange.parse_timeframe(timeframe) * 1000
+            window_start = exchange.milliseconds() - limit * tf_ms
+            usable = False
+            if len(cached) >= limit:
+                first_ts, last_ts = int(cached[0, 0]), int(cached[-1, 0])
+                usable = last_ts >= window_start and last_ts - first_ts <= (limit - 1) * tf_ms
+            cache_result('ohlcv_window', usable)
+            if not usable:
+                # Cache missing or incomplete: fetch the whole window
+                ohlcv = await self._guarded(exchange_id, exchange.fetch_ohlcv(formatted_symbol, timeframe, limit=limit))
+            else:
+                # Refetch from the last stored candle, which may still have been forming
+                ohlcv = await self._guarded(
+                    exchange_id, exchange.fetch_ohlcv(formatted_symbol, timeframe, since=last_ts, limit=limit)
+                )
+
+            # Only candles that are new or changed (usually just the forming one) are written
+            fresh = _ohlcv_array(ohlcv)
+            at = np.minimum(np.searchsorted(cached[:, 0], fresh[:, 0]), max(len(cached) - 1, 0))
+            unchanged = (cached[at] == fresh).all(axis=1) if len(cached) else np.zeros(len(fresh), dtype=bool)
+            if not unchanged.all():
+                try:
+                    await candle_store.upsert(exchange_id, formatted_symbol, timeframe, fresh[~unchanged].tolist())
+                except Exception as e:
+                    logger.warning("Candle store write error for %s: %s", formatted_symbol, e)
+                    record_error('candle_store', e)
+
+            # Fresh candles win over cached ones with the same timestamp
+            rows = np.concatenate([cached, fresh])
+            rows = rows[np.argsort(rows[:, 0], kind='stable')]
+            last_of_ts = np.append(rows[1:, 0] != rows[:-1, 0], True)
+            return rows[last_of_ts][-limit:]
         except Exception as e:
-            print(f"Error fetching OHLCV for {symbol} on {exchange_id}: {e}")
-            # Fallback logic could go here
-            return pd.DataFrame()
+            logger.warning("Error fetching OHLCV for %s on %s: %r", symbol, exchange_id, e)
+            record_error('ohlcv', e)
+            return _empty_ohlcv()
 
-    async def get_current_price(self, symbol: str, exchange_id: str = 'binance') -> float:
-        exchange = self.exchanges.get(exchange_id)
+    @staticmethod
+    def _to_frame(ohlcv: np.ndarray) -> "pd.DataFrame":
+        import pandas as pd
+        df = pd.DataFrame(ohlcv, columns=OHLCV_COLUMNS)
+        df['timestamp'] = pd.to_datetime(df['timestamp'].astype('int64'), unit='ms')
+        return df
+
+    async def backfill_ohlcv(self, symbol: str, exchange_id: str = 'binance', timeframe: str = '1d',
+                             since: Optional[datetime] = None, page_limit: int = 1000) -> int:
+        """
+        Page through fetch_ohlcv with `since` and store everything in the candle store.
+        Resumes from the last stored candle when the stored range already covers `since`.
+        Returns the number of candles written.
+        """
+        exchange = self._exchange(exchange_id)
         if not exchange:
+            raise ValueError(f"Exchange {exchange_id} not initialized")
+
+        formatted_symbol = self._format_symbol(symbol)
+        tf_ms = exchange.parse_timeframe(timeframe) * 1000
+        cursor = int(since.timestamp() * 1000) if since else exchange.parse8601('2017-01-01T00:00:00Z')
+        bounds = await candle_store.bounds(exchange_id, formatted_symbol, timeframe)
+        if bounds is not None and bounds[0] <= cursor:
+            cursor = max(cursor, bounds[1])
+
+        written = 0
+        while cursor < exchange.milliseconds():
+            page = await exchange.fetch_ohlcv(formatted_symbol, timeframe, since=cursor, limit=page_limit)
+            if not page:
+                break
+            written += await candle_store.upsert(exchange_id, formatted_symbol, timeframe, page)
+            next_cursor = page[-1][0] + tf_ms
+            if next_cursor <= cursor:
+                break
+            cursor = next_cursor
+        return written
+
+    async def _fetch_price(self, symbol: str, exchange_id: str) -> float:
+        formatted_symbol = self._format_symbol(symbol)
+        if settings.MARKET_STREAMING:
+            price = market_stream.get_price(formatted_symbol, exchange_id)
+            cache_result('stream_price', bool(price))
+            if price:
+                return price
+
+        exchange = self._exchange(exchange_id)
+        ticker = await self._guarded(exchange_id, exchange.fetch_ticker(formatted_symbol))
+        if not ticker.get('last'):
+            raise ValueError(f"No last price for {symbol} on {exchange_id}")
+        return ticker['last']
+
+    async def get_current_price(self, symbol: str, exchange_id: Optional[str] = None) -> float:
+        exchange_id = self._resolve(exchange_id)
+        if exchange_id is None:
+            return await self._get_first_price(symbol)
+
+        if exchange_id not in self.breakers:
             return 0.0
-        
         try:
-             # Ensure symbol format
-            formatted_symbol = symbol.upper()
-            if '/' not in formatted_symbol:
-                formatted_symbol = f"{formatted_symbol}/USDT"
-            
-            ticker = await exchange.fetch_ticker(formatted_symbol)
-            return ticker['last']
+            return await self._fetch_price(symbol, exchange_id)
         except Exception as e:
-            print(f"Error fetching price for {symbol}: {e}")
+            logger.warning("Error fetching price for %s: %r", symbol, e)
+            record_error('price', e)
             return 0.0
 
-    async def get_depth_liquidity(self, symbol: str, exchange_id: str = 'binance') -> dict:
+    async def _get_first_price(self, symbol: str) -> float:
         """
-        Calculate simple liquidity metrics from orderbook.
+        Race all healthy venues and take the first valid answer.
         """
-        exchange = self.exchanges.get(exchange_id)
-        if not exchange:
-            return {}
-            
+        tasks = [asyncio.create_task(self._fetch_price(symbol, ex_id)) for ex_id in self.healthy_exchanges()]
         try:
-            formatted_symbol = symbol.upper()
-            if '/' not in formatted_symbol:
-                formatted_symbol = f"{formatted_symbol}/USDT"
-            
-            orderbook = await exchange.fetch_order_book(formatted_symbol, limit=20)
-            
-            # Simple aggregation of +/- 2% liquidity could be calculated here
-            # For now returning raw top bids/asks
-            return {
-                "bids": orderbook['bids'],
-                "asks": orderbook['asks'],
-                "bid_volume_top_20": sum([b[1] for b in orderbook['bids']]),
-                "ask_volume_top_20": sum([a[1] for a in orderbook['asks']])
-            }
-        except Exception as e:
-            print(f"Error fetching depth for {symbol}: {e}")
-            return {}
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    return await next_done
+                except Exception:
+                    continue
+        finally:
+            for task in tasks:
+                task.cancel()
+        logger.warning("Error fetching price for %s: no venue answered", symbol)
+        ERRORS.inc(component='price', error='NoVenueAnswered')
+        return 0.0
+
+    async def _fetch_order_book(self, symbol: str, exchange_id: str, limit: int) -> dict:
+        formatted_symbol = self._format_symbol(symbol)
+        if settings.MARKET_STREAMING:
+            book = market_stream.get_order_book(formatted_symbol, exchange_id)
+            cache_result('stream_book', book is not None)
+            if book is not None:
+                return book
+
+        exchange = self._exchange(exchange_id)
+        return await self._guarded(exchange_id, exchange.fetch_order_book(formatted_symbol, limit=limit))
+
+    async def get_depth_liquidity(self, symbol: str, exchange_id: Optional[str] = None) -> Optional[DepthMetrics]:
+        """
+        Cumulative notional depth at DEPTH_BANDS_PCT around mid, bid/ask imbalance and
+        slippage curves over the full book. In aggregated mode the books of all healthy
+        venues are consolidated first. Returns None if no venue answered.
+        """
+        exchange_id = self._resolve(exchange_id)
+        venues = self.healthy_exchanges() if exchange_id is None else [exchange_id]
+        venues = [ex_id for ex_id in venues if ex_id in self.breakers]
+        if not venues:
+            return None
+
+        results = await asyncio.gather(*(
+            self._fetch_order_book(symbol, ex_id, min(settings.DEPTH_BOOK_LIMIT, BOOK_LIMIT_CAPS.get(ex_id, 5000)))
+            for ex_id in venues
+        ), return_exceptions=True)
+
+        answered, bids, asks = [], [], []
+        for ex_id, result in zip(venues, results):
+            if isinstance(result, Exception):
+                logger.warning("Error fetching depth for %s on %s: %r", symbol, ex_id, result)
+                record_error('depth', result)
+                continue
+            answered.append(ex_id)
+            bids.append(levels_to_array(result['bids']))
+            asks.append(levels_to_array(result['asks']))
+        if not answered:
+            return None
+
+        return compute_depth_metrics(
+            np.concatenate(bids), np.concatenate(asks), settings.DEPTH_BANDS_PCT, venues=answered
+        )
+
+def _ohlcv_array(ohlcv) -> np.ndarray:
+    """
+    ccxt [timestamp, open, high, low, close, volume] rows as an (n, 6) float array;
+    None values become NaN.
+    """
+    return np.asarray(ohlcv, dtype=float).reshape(-1, len(OHLCV_COLUMNS))
+
+def _empty_ohlcv() -> np.ndarray:
+    return np.empty((0, len(OHLCV_COLUMNS)))
 
 market_service = MarketDataService()
@@ -0,0 +1,226 @@
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import record_error
+
+if TYPE_CHECKING:
+    import ccxt.pro as ccxt  # Imported on first subscription
+
+logger = logging.getLogger(__name__)
+
+TICKER = "ticker"
+BOOK = "book"
+
+TickerListener = Callable[[str, str, dict], None]  # (exchange_id, symbol, ticker)
+
+
+class MarketStreamManager:
+    """
+    Long-lived ccxt.pro subscriptions (watch_ticker / watch_order_book) for the
+    tokens with upcoming unlocks. The latest top-of-book and depth are kept in
+    memory so price/depth lookups are a dict read instead of a REST round trip.
+    A watchdog restarts watchers that died, and recreates a venue's client (and so
+    its websocket) when every stream on it has been quiet past its per-kind
+    threshold. A single quiet stream is left alone: illiquid markets go quiet, and
+    re-watching on the same client would not reset the connection anyway.
+    """
+    def __init__(self):
+        self.exchanges: Dict[str, "ccxt.Exchange"] = {}
+        # (exchange_id, symbol) -> (last price, monotonic update time)
+        self._tickers: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        # (exchange_id, symbol) -> (order book, monotonic update time)
+        self._books: Dict[Tuple[str, str], Tuple[dict, float]] = {}
+        # (kind, exchange_id, symbol) -> watcher task
+        self._tasks: Dict[Tuple[str, str, str], asyncio.Task] = {}
+        self._started: Dict[Tuple[str, str, str], float] = {}
+        self._listeners: List[TickerListener] = []
+
+    def _exchange(self, exchange_id: str) -> "ccxt.Exchange":
+        if exchange_id not in self.exchanges:
+            import ccxt.pro as ccxt
+            self.exchanges[exchange_id] = getattr(ccxt, exchange_id)({
+                'enableRateLimit': True,
+                'options': {'defaultType': 'spot'},
+            })
+        return self.exchanges[exchange_id]
+
+    # --- Reads -------------------------------------------------------------
+
+    def get_price(self, symbol: str, exchange_id: str) -> Optional[float]:
+        """
+        Latest streamed price, or None if not subscribed or stale.
+        """
+        entry = self._tickers.get((exchange_id, symbol))
+        if entry is None or time.monotonic() - entry[1] > settings.MARKET_STREAM_STALE_AFTER:
+            return None
+        return entry[0]
+
+    def get_order_book(self, symbol: str, exchange_id: str) -> Optional[dict]:
+        entry = self._books.get((exchange_id, symbol))
+        if entry is None or time.monotonic() - entry[1] > settings.MARKET_STREAM_STALE_AFTER:
+            return None
+        return entry[0]
+
+    def add_listener(self, listener: TickerListener):
+        """
+        Call `listener` on the event loop for every streamed ticker. Listeners must not block.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: TickerListener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, exchange_id: str, symbol: str, ticker: dict):
+        for listener in self._listeners:
+            try:
+                listener(exchange_id, symbol, ticker)
+            except Exception as e:
+                logger.warning("Ticker listener error for %s on %s: %r", symbol, exchange_id, e)
+                record_error('market_stream', e)
+
+    # --- Subscriptions -----------------------------------------------------
+
+    async def _watch_ticker(self, exchange_id: str, symbol: str):
+        import ccxt.pro as ccxt
+        exchange = self._exchange(exchange_id)
+        while True:
+            try:
+                ticker = await exchange.watch_ticker(symbol)
+                if ticker.get('last'):
+                    self._tickers[(exchange_id, symbol)] = (ticker['last'], time.monotonic())
+                    self._notify(exchange_id, symbol, ticker)
+            except asyncio.CancelledError:
+                raise
+            except ccxt.BadSymbol:
+                return  # Not listed on this venue
+            except Exception as e:
+                logger.warning("Ticker stream error for %s on %s: %r", symbol, exchange_id, e)
+                record_error('market_stream', e)
+                await asyncio.sleep(1.0)
+
+    async def _watch_book(self, exchange_id: str, symbol: str):
+        import ccxt.pro as ccxt
+        exchange = self._exchange(exchange_id)
+        while True:
+            try:
+                book = await exchange.watch_order_book(symbol, limit=settings.MARKET_STREAM_BOOK_DEPTH)
+                # ccxt.pro mutates the book in place; keep a plain snapshot
+                self._books[(exchange_id, symbol)] = (
+                    {'bids': list(book['bids']), 'asks': list(book['asks'])}, time.monotonic()
+                )
+            except asyncio.CancelledError:
+                raise
+            except ccxt.BadSymbol:
+                return
+            except Exception as e:
+                logger.warning("Order book stream error for %s on %s: %r", symbol, exchange_id, e)
+                record_error('market_stream', e)
+                await asyncio.sleep(1.0)
+
+    def _start(self, key: Tuple[str, str, str]):
+        kind, exchange_id, symbol = key
+        watcher = self._watch_ticker if kind == TICKER else self._watch_book
+        self._tasks[key] = asyncio.create_task(watcher(exchange_id, symbol))
+        self._started[key] = time.monotonic()
+
+    def _stop(self, key: Tuple[str, str, str]):
+        task = self._tasks.pop(key, None)
+        if task:
+            task.cancel()
+        self._started.pop(key, None)
+        _, exchange_id, symbol = key
+        self._tickers.pop((exchange_id, symbol), None)
+        self._books.pop((exchange_id, symbol), None)
+
+    def sync_symbols(self, symbols: Iterable[str], exchange_ids: Optional[List[str]] = None):
+        """
+        Subscribe to exactly this set of symbols on the streaming venues.
+        """
+        exchange_ids = exchange_ids or settings.MARKET_STREAM_EXCHANGES
+        wanted = {
+            (kind, exchange_id, symbol)
+            for symbol in symbols for exchange_id in exchange_ids for kind in (TICKER, BOOK)
+        }
+        for key in set(self._tasks) - wanted:
+            self._stop(key)
+        for key in wanted - set(self._tasks):
+            self._start(key)
+
+    def _last_update(self, key: Tuple[str, str, str]) -> float:
+        kind, exchange_id, symbol = key
+        entry = (self._tickers if kind == TICKER else self._books).get((exchange_id, symbol))
+        # A stream that never delivered counts from its subscription time
+        return entry[1] if entry else self._started.get(key, 0.0)
+
+    @staticmethod
+    def _stale_after(kind: str) -> float:
+        return settings.MARKET_STREAM_TICKER_STALE_AFTER if kind == TICKER else settings.MARKET_STREAM_BOOK_STALE_AFTER
+
+    def _check_streams(self) -> List[str]:
+        """
+        Restart watchers that died; return the venues whose streams are all stale.
+        """
+        now = time.monotonic()
+        stale: Dict[str, bool] = {}
+        for key, task in list(self._tasks.items()):
+            if task.done() and not task.cancelled() and task.exception() is None:
+                continue  # Watcher gave up on purpose (symbol not listed)
+            if task.done():
+                self._start(key)
+            kind, exchange_id, _ = key
+            quiet = now - self._last_update(key) > self._stale_after(kind)
+            stale[exchange_id] = stale.get(exchange_id, True) and quiet
+        return [exchange_id for exchange_id, all_quiet in stale.items() if all_quiet]
+
+    async def _reconnect(self, exchange_id: str):
+        """
+        Drop the venue's client and resubscribe its streams on a new one.
+        """
+        logger.warning("All %s streams stale, reconnecting", exchange_id)
+        keys = [key for key in self._tasks if key[1] == exchange_id]
+        for key in keys:
+            self._stop(key)
+        exchange = self.exchanges.pop(exchange_id, None)
+        if exchange is not None:
+            try:
+                await exchange.close()
+            except Exception as e:
+                logger.warning("Error closing %s stream client: %r", exchange_id, e)
+                record_error('market_stream', e)
+        for key in keys:
+            self._start(key)
+
+    async def run(self):
+        """
+        Keep subscriptions aligned with the unlock calendar and reconnect stale venues.
+        """
+        from app.services.market_data import MarketDataService
+        from app.services.unlocks import unlock_service
+
+        next_sync = 0.0
+        while True:
+            try:
+                if time.monotonic() >= next_sync:
+                    events = await unlock_service.get_next_major_unlocks(limit=settings.MARKET_STREAM_MAX_SYMBOLS)
+                    self.sync_symbols({MarketDataService._format_symbol(e.token_symbol) for e in events})
+                    next_sync = time.monotonic() + settings.MARKET_STREAM_SYNC_INTERVAL
+                for exchange_id in self._check_streams():
+                    await self._reconnect(exchange_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Market stream manager error")
+                record_error('market_stream', e)
+            await asyncio.sleep(settings.MARKET_STREAM_STALE_AFTER / 2)
+
+    async def close(self):
+        for key in list(self._tasks):
+            self._stop(key)
+        for exchange in self.exchanges.values():
+            await exchange.close()
+        self.exchanges.clear()
+
+market_stream = MarketStreamManager()
@@ -1,71 +1,272 @@
-import httpx
-from typing import List, Dict, Optional
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack
+import numpy as np
+from typing import List, Dict, Optional, Tuple
 from app.core.config import settings
+from app.core.http import get_http_client
+from app.core.metrics import RPC_CALLS, RPC_ERRORS, RPC_LATENCY, cache_result, record_error
+from app.services.transfer_store import transfer_store
+from app.services.wallet_registry import CexWalletRegistry, get_wallet_registry
+
+DECIMALS_SELECTOR = "0x313ce567"  # decimals()
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+
+logger = logging.getLogger(__name__)
+
+# Provider messages meaning "narrow the block range and retry"
+RANGE_ERROR_HINTS = ("more than", "response size", "block range", "too large", "limit exceeded", "too many")
 
 class OnchainService:
     def __init__(self):
+        self.last_block = 0  # Chain head seen by the latest ingestion run
+        self._decimals: Dict[str, int] = {}
+        self._ingest_locks: Dict[Tuple[str, str], asyncio.Lock] = {}  # Per (chain, token)
+
+    @property
+    def rpc_url(self) -> str:
         # In production, use AsyncWeb3 from web3.py
         # For this architecture demo, using raw RPC calls via HTTPX is lighter
-        self.rpc_url = f"https://eth-mainnet.g.alchemy.com/v2/{settings.ALCHEMY_API_KEY}"
-        self.http_client = httpx.AsyncClient()
-        
-        # Known CEX Hot Wallets (Simplified List)
-        self.cex_wallets = {
-            "0x28C6c06298d514Db089934071355E5743bf21d60": "Binance 14",
-            "0x21a31Ee1afC51d94C2eFcCAa2092aD1028285549": "Binance 15",
-            "0xf89d7b9c864f589bbf53a82105107622b35eaa40": "Bybit",
-            # ... and so on
-        }
-
-    async def get_token_transfers(self, token_address: str, from_block: str = "latest"):
-        """
-        Fetch recent Transfer events for a token using eth_getLogs
-        Topic0 for Transfer: 0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef
+        return f"https://eth-mainnet.g.alchemy.com/v2/{settings.ALCHEMY_API_KEY}"
+
+    @property
+    def cex_wallets(self) -> CexWalletRegistry:
+        # Known CEX deposit / hot wallets, normalised for O(1) lookup (loaded on first use)
+        return get_wallet_registry()
+
+    def _cex_topic_groups(self) -> List[List[str]]:
         """
-        if not settings.ALCHEMY_API_KEY:
-            # Mock if no key
-            return []
+        CEX wallets as 32-byte padded topics, for server-side filtering on `to`, split
+        into lists of at most ONCHAIN_TOPIC_FILTER_MAX (providers reject longer topic
+        lists). Each block range is queried once per list.
+        """
+        topics = self.cex_wallets.padded_topics()
+        size = settings.ONCHAIN_TOPIC_FILTER_MAX
+        return [topics[i:i + size] for i in range(0, len(topics), size)] or [topics]
 
-        payload = {
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "eth_getLogs",
-            "params": [{
-                "address": token_address,
-                "fromBlock": from_block,
-                "toBlock": "latest",
-                "topics": ["0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"]
-            }]
-        }
-        
+    async def _rpc_batch(self, calls: List[Tuple[str, list]]) -> List[dict]:
+        """
+        Send several JSON-RPC calls in one HTTP request. Responses are returned in call
+        order, each either {"result": ...} or {"error": ...}.
+        """
+        payload = [
+            {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+            for i, (method, params) in enumerate(calls)
+        ]
+        methods = [method for method, _ in calls]
+        label = methods[0] if len(set(methods)) == 1 else "mixed"
+        for method in methods:
+            RPC_CALLS.inc(method=method)
+        start = time.perf_counter()
         try:
-            response = await self.http_client.post(self.rpc_url, json=payload)
+            # Reads only, so identical concurrent batches can share one response
+            response = await get_http_client().post(self.rpc_url, json=payload, coalesce=True)
             data = response.json()
-            if "result" in data:
-                return data["result"]
+        except Exception as e:
+            for method in methods:
+                RPC_ERRORS.inc(method=method, error=type(e).__name__)
+            raise
+        finally:
+            RPC_LATENCY.observe(time.perf_counter() - start, method=label)
+        if isinstance(data, dict):
+            # Whole batch rejected (e.g. auth / batch too large)
+            responses = [data] * len(calls)
+        else:
+            by_id = {item.get("id"): item for item in data}
+            responses = [by_id.get(i, {"error": {"message": "missing response"}}) for i in range(len(calls))]
+        for method, item in zip(methods, responses):
+            if "error" in item:
+                RPC_ERRORS.inc(method=method, error=str((item["error"] or {}).get("code", "unknown")))
+        return responses
+
+    async def get_block_number(self) -> int:
+        (response,) = await self._rpc_batch([("eth_blockNumber", [])])
+        return int(response["result"], 16)
+
+    @staticmethod
+    def _is_range_too_large(error: dict) -> bool:
+        message = str(error.get("message", "")).lower()
+        return error.get("code") == -32005 or any(hint in message for hint in RANGE_ERROR_HINTS)
+
+    async def ingest_transfers(self, token_addresses: List[str]) -> Dict[str, int]:
+        """
+        Incrementally pull CEX-bound Transfer logs for many tokens.
+
+        Each token resumes from its stored last-seen block. Block ranges are chunked to
+        ONCHAIN_MAX_BLOCK_RANGE, sent as JSON-RPC batches of ONCHAIN_BATCH_SIZE, and halved
+        whenever the provider reports a result that is too large. Only transfers whose
+        `to` topic is a known CEX wallet are requested. Returns new logs per token.
+
+        Runs that share a token are serialised, so a run never starts from a cursor
+        another run is about to move; the store also never moves a cursor backwards.
+        """
+        if not settings.ALCHEMY_API_KEY or not token_addresses:
+            # Mock if no key
+            return {}
+
+        chain = settings.ONCHAIN_CHAIN
+        addresses = sorted(set(a.lower() for a in token_addresses))  # One lock order: no deadlocks
+        async with AsyncExitStack() as stack:
+            for addr in addresses:
+                await stack.enter_async_context(self._ingest_locks.setdefault((chain, addr), asyncio.Lock()))
+            return await self._ingest(chain, token_addresses)
+
+    async def _ingest(self, chain: str, token_addresses: List[str]) -> Dict[str, int]:
+        addresses = list(dict.fromkeys(a.lower() for a in token_addresses))
+        latest = await self.get_block_number()
+        self.last_block = latest
+        cursors = await transfer_store.get_cursors(chain, addresses)
+
+        # Work queue of (token, from_block, to_block, topic group), blocks inclusive
+        topic_groups = self._cex_topic_groups()
+        pending: List[Tuple[str, int, int, int]] = []
+        for addr in addresses:
+            start = cursors[addr] + 1 if addr in cursors else max(latest - settings.ONCHAIN_INITIAL_LOOKBACK_BLOCKS, 0)
+            for lo in range(start, latest + 1, settings.ONCHAIN_MAX_BLOCK_RANGE):
+                hi = min(lo + settings.ONCHAIN_MAX_BLOCK_RANGE - 1, latest)
+                pending.extend((addr, lo, hi, group) for group in range(len(topic_groups)))
+
+        logs: List[dict] = []
+        failed_from: Dict[str, int] = {}  # Earliest block that could not be fetched per token
+
+        while pending:
+            chunk, pending = pending[:settings.ONCHAIN_BATCH_SIZE], pending[settings.ONCHAIN_BATCH_SIZE:]
+            calls = [
+                ("eth_getLogs", [{
+                    "address": addr,
+                    "fromBlock": hex(lo),
+                    "toBlock": hex(hi),
+                    "topics": [TRANSFER_TOPIC, None, topic_groups[group]],
+                }])
+                for addr, lo, hi, group in chunk
+            ]
+            try:
+                responses = await self._rpc_batch(calls)
+            except Exception as e:
+                logger.warning("RPC Error: %r", e)
+                responses = [{"error": {"message": str(e)}}] * len(chunk)
+
+            for (addr, lo, hi, group), response in zip(chunk, responses):
+                if "result" in response:
+                    logs.extend(
+                        {
+                            "token_address": addr,
+                            "block_number": int(log["blockNumber"], 16),
+                            "tx_hash": log["transactionHash"],
+                            "log_index": int(log["logIndex"], 16),
+                            "from_address": "0x" + log["topics"][1][26:],
+                            "to_address": "0x" + log["topics"][2][26:],
+                            "amount_hex": log["data"],
+                        }
+                        for log in response["result"]
+                        # ERC-20 only (ERC-721 indexes the token id too)
+                        if len(log["topics"]) == 3
+                    )
+                elif self._is_range_too_large(response["error"]) and hi > lo:
+                    mid = (lo + hi) // 2
+                    pending.extend([(addr, lo, mid, group), (addr, mid + 1, hi, group)])
+                else:
+                    logger.warning("eth_getLogs failed for %s [%d, %d]: %s", addr, lo, hi, response['error'])
+                    failed_from[addr] = min(failed_from.get(addr, lo), lo)
+
+        # Cursors stop just before the first gap so failed ranges are retried next run
+        new_cursors = {addr: failed_from.get(addr, latest + 1) - 1 for addr in addresses}
+        new_cursors = {addr: block for addr, block in new_cursors.items() if block >= cursors.get(addr, -1)}
+        await transfer_store.save(chain, logs, new_cursors)
+
+        counts = dict.fromkeys(addresses, 0)
+        for log in logs:
+            counts[log["token_address"]] += 1
+        return counts
+
+    async def get_token_transfers(self, token_address: str, lookback_blocks: Optional[int] = None) -> List[dict]:
+        """
+        CEX-bound Transfer logs for a token over the last `lookback_blocks`,
+        after pulling any new blocks since the previous run.
+        """
+        if not settings.ALCHEMY_API_KEY:
             return []
+        lookback_blocks = lookback_blocks or settings.ONCHAIN_PRESSURE_WINDOW_BLOCKS
+        try:
+            await self.ingest_transfers([token_address])
         except Exception as e:
-            print(f"RPC Error: {e}")
+            logger.warning("RPC Error: %r", e)
+            record_error('onchain', e)
             return []
+        return await transfer_store.recent(settings.ONCHAIN_CHAIN, token_address, self.last_block - lookback_blocks)
+
+    async def get_decimals(self, token_addresses: List[str]) -> Dict[str, int]:
+        """
+        ERC-20 decimals() for many tokens in one batched eth_call (cached; they never change).
+        """
+        missing = [a.lower() for a in token_addresses if a.lower() not in self._decimals]
+        cache_result('decimals', True, len(token_addresses) - len(missing))
+        cache_result('decimals', False, len(missing))
+        if missing and settings.ALCHEMY_API_KEY:
+            calls = [("eth_call", [{"to": addr, "data": DECIMALS_SELECTOR}, "latest"]) for addr in missing]
+            for addr, response in zip(missing, await self._rpc_batch(calls)):
+                result = response.get("result")
+                if result and result != "0x":
+                    self._decimals[addr] = int(result, 16)
+        return {a.lower(): self._decimals.get(a.lower(), 18) for a in token_addresses}
 
-    async def analyze_movement_to_cex(self, token_address: str, threshold: float = 100000.0) -> float:
+    async def analyze_movement_to_cex(self, token_address: str, threshold: float = 100000.0,
+                                      price_usd: Optional[float] = None, refresh: bool = True) -> float:
         """
         Returns a 'pressure score' based on transfers to CEXs.
         0.0 = No pressure
         1.0 = High pressure (Big transfers to CEX)
+
+        Each `threshold` USD moved to exchange wallets in the window adds 0.2.
+        Without a price, falls back to 0.2 per transfer. `refresh=False` skips the
+        incremental ingest when the caller already ran one for a batch of tokens.
         """
-        logs = await self.get_token_transfers(token_address)
-        pressure = 0.0
-        
-        for log in logs:
-            # Parse 'to' address from topic[2] (padded 32 bytes)
-            to_topic = log["topics"][2]
-            to_address = "0x" + to_topic[26:] # Extract last 20 bytes
-            
-            if to_address in self.cex_wallets: # Case sensitivity needs handling in real code
-                # Simplify: just increment pressure for demo
-                pressure += 0.2
-        
-        return min(pressure, 1.0)
+        if refresh:
+            logs = await self.get_token_transfers(token_address)
+        else:
+            logs = await transfer_store.recent(
+                settings.ONCHAIN_CHAIN, token_address, self.last_block - settings.ONCHAIN_PRESSURE_WINDOW_BLOCKS
+            )
+        if not logs:
+            return 0.0
+
+        # Defensive: the registry may have changed since these logs were ingested
+        logs = [log for log in logs if log["to_address"] in self.cex_wallets]
+        if not price_usd:
+            return min(0.2 * len(logs), 1.0)
+
+        usd_to_cex = await self._usd_value(token_address, logs, price_usd)
+        return min(0.2 * usd_to_cex / threshold, 1.0)
+
+    async def _usd_value(self, token_address: str, logs: List[dict], price_usd: float) -> float:
+        if not logs:
+            return 0.0
+        decimals = (await self.get_decimals([token_address]))[token_address.lower()]
+        # Decode uint256 `data` in bulk (Python ints first: values can exceed int64)
+        raw = np.array([int(log["amount_hex"], 16) for log in logs], dtype=float)
+        return float(np.sum(raw / 10.0 ** decimals) * price_usd)
+
+    async def cex_inflows(self, token_addresses: List[str], since_block: int) -> Dict[str, List[dict]]:
+        """
+        Stored CEX-bound transfers from `since_block` on per token (no ingest), in one
+        query, whoever ingested them. Tokens without any are left out.
+        """
+        by_token = await transfer_store.recent_many(settings.ONCHAIN_CHAIN, token_addresses, since_block)
+        inflows = {}
+        for address, logs in by_token.items():
+            logs = [log for log in logs if log["to_address"] in self.cex_wallets]
+            if logs:
+                inflows[address] = logs
+        return inflows
+
+    async def inflow_usd(self, token_address: str, logs: List[dict],
+                         price_usd: Optional[float] = None) -> Optional[float]:
+        """
+        USD value of transfers from cex_inflows(). None without a price.
+        """
+        if not price_usd:
+            return None
+        return await self._usd_value(token_address, logs, price_usd)
 
 onchain_service = OnchainService()
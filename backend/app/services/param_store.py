@@ -0,0 +1,142 @@
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.database import db
+from app.core.metrics import record_error
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS model_params (
+    scope VARCHAR NOT NULL,          -- 'global' | 'category' | 'token'
+    key VARCHAR NOT NULL,            -- '*', category name or token symbol
+    dump_factor DOUBLE,
+    short_threshold DOUBLE,          -- only on the global row
+    long_threshold DOUBLE,
+    n_events INTEGER,
+    pre_days INTEGER,
+    post_days INTEGER,
+    fitted_at TIMESTAMP
+)
+"""
+
+PARAM_COLUMNS = [
+    'scope', 'key', 'dump_factor', 'short_threshold', 'long_threshold', 'n_events', 'pre_days', 'post_days'
+]
+
+# Copy of the fit for processes without the API's DuckDB file (Celery workers)
+SHARED_KEY = "model:params"
+
+# Used until a backtest has been written back
+DEFAULT_DUMP_FACTOR = 1.1
+DEFAULT_SHORT_THRESHOLD = 1.2
+DEFAULT_LONG_THRESHOLD = 0.7
+
+
+class ParamStore:
+    """
+    Backtest-fitted engine parameters. The live engine reads them through an
+    in-memory copy refreshed every MODEL_PARAMS_TTL seconds, so lookups on the
+    scoring path are dict reads. A process that finds a fit in its database shares
+    it through Redis; one whose database has none (a worker) uses the shared copy.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready = False
+        self._token_factors: Dict[str, float] = {}
+        self._category_factors: Dict[str, float] = {}
+        self._global_factor = DEFAULT_DUMP_FACTOR
+        self._thresholds = (DEFAULT_SHORT_THRESHOLD, DEFAULT_LONG_THRESHOLD)
+        self._loaded_at: Optional[float] = None
+
+    def _conn(self):
+        conn = db.get_connection()
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    conn.execute(SCHEMA)
+                    self._ready = True
+        return conn
+
+    def replace_sync(self, rows: List[dict]):
+        """
+        Replace the whole parameter set with a new fit.
+        """
+        import pandas as pd
+        params = pd.DataFrame(rows, columns=PARAM_COLUMNS)
+        params['fitted_at'] = datetime.utcnow()
+        conn = self._conn()
+        conn.register("fitted", params)
+        conn.execute("BEGIN TRANSACTION")
+        try:
+            conn.execute("DELETE FROM model_params")
+            conn.execute("INSERT INTO model_params BY NAME SELECT * FROM fitted")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.unregister("fitted")
+        self._loaded_at = None  # Pick up the new fit on next lookup
+
+    def load_sync(self) -> List[dict]:
+        cursor = self._conn().execute(f"SELECT {', '.join(PARAM_COLUMNS)} FROM model_params")
+        return [dict(zip(PARAM_COLUMNS, row)) for row in cursor.fetchall()]
+
+    def _apply(self, rows: List[dict]):
+        token_factors, category_factors = {}, {}
+        for row in rows:
+            if row['scope'] == 'token':
+                token_factors[row['key']] = float(row['dump_factor'])
+            elif row['scope'] == 'category':
+                category_factors[row['key']] = float(row['dump_factor'])
+            elif row['scope'] == 'global':
+                self._global_factor = float(row['dump_factor'])
+                self._thresholds = (float(row['short_threshold']), float(row['long_threshold']))
+        self._token_factors, self._category_factors = token_factors, category_factors
+
+    @staticmethod
+    async def _shared(rows: List[dict]) -> List[dict]:
+        """
+        Publish our fit, or without one take the published copy.
+        """
+        try:
+            if rows:
+                await get_redis().set(SHARED_KEY, json.dumps(rows))
+                return rows
+            shared = await get_redis().get(SHARED_KEY)
+        except Exception as e:
+            logger.warning("Shared model params unavailable: %r", e)
+            return rows
+        return json.loads(shared) if shared else rows
+
+    async def ensure_fresh(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > settings.MODEL_PARAMS_TTL:
+            try:
+                self._apply(await self._shared(await db.read(self.load_sync)))
+            except Exception as e:
+                logger.warning("Error loading model params: %r", e)
+                record_error('param_store', e)
+            self._loaded_at = time.monotonic()  # On error keep the current values, retry after TTL
+
+    def dump_factor(self, token_symbol: str, category: Optional[str] = None) -> float:
+        """
+        Most specific fitted factor: token, then category, then global.
+        """
+        factor = self._token_factors.get(token_symbol.upper())
+        if factor is None and category:
+            factor = self._category_factors.get(category)
+        return factor if factor is not None else self._global_factor
+
+    def thresholds(self) -> Tuple[float, float]:
+        """
+        (short_threshold, long_threshold) on UIS.
+        """
+        return self._thresholds
+
+param_store = ParamStore()
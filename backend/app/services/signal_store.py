@@ -0,0 +1,418 @@
+import asyncio
+import glob
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+from app.core.config import settings
+from app.core.database import db
+from app.core.metrics import record_error
+from app.services.candle_store import SCHEMA as CANDLE_SCHEMA
+
+if TYPE_CHECKING:
+    from app.engine.calculator import TradeSignal
+    from app.engine.columnar import SignalColumns
+    from app.services.unlocks import UnlockEvent
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS signal_history (
+    token VARCHAR NOT NULL,
+    unlock_date TIMESTAMP NOT NULL,
+    computed_at TIMESTAMP NOT NULL,
+    signal VARCHAR NOT NULL,
+    uis_score DOUBLE,
+    confidence DOUBLE,
+    expected_move_pct DOUBLE,
+    degraded BOOLEAN,
+    source VARCHAR              -- 'dashboard' | 'bulk' | ...
+)
+"""
+
+HISTORY_COLUMNS = [
+    'token', 'unlock_date', 'computed_at', 'signal', 'uis_score', 'confidence', 'expected_move_pct', 'degraded',
+    'source',
+]
+
+DAY_MS = 86_400_000
+
+# Archive layout: one directory per month of computed_at. Each archiver run that finds
+# closed days adds a part file; once the month is past the cutoff its parts are
+# compacted into one file, so the archive grows by about one file per month.
+ARCHIVE_PARTITION = "month={month}"
+ARCHIVE_GLOB = "month=*/*.parquet"
+COMPACTED_FILE = "compacted.parquet"
+
+# Realized move per (token, unlock): the last non-degraded signal issued before the
+# unlock, priced from daily candles in the candle store. Entry is the close of the
+# candle ending at the start of the unlock day, exit the close `horizon` days later.
+MOVES_SQL = """
+WITH latest AS (
+    SELECT token, unlock_date,
+           arg_max(signal, computed_at) AS signal,
+           arg_max(uis_score, computed_at) AS uis_score,
+           arg_max(expected_move_pct, computed_at) AS expected_move_pct,
+           max(computed_at) AS computed_at
+    FROM {source}
+    WHERE NOT degraded AND computed_at <= unlock_date {where}
+    GROUP BY token, unlock_date
+)
+SELECT l.token, l.unlock_date, l.computed_at, l.signal, l.uis_score, l.expected_move_pct,
+       entry.close AS entry_close, exit.close AS exit_close,
+       (exit.close / entry.close - 1.0) * 100.0 AS realized_move_pct
+FROM latest l
+JOIN ohlcv entry
+  ON entry.exchange = $exchange AND entry.timeframe = '1d' AND entry.symbol = l.token || '/USDT'
+ AND entry.ts = epoch_ms(date_trunc('day', l.unlock_date)) - {day_ms}
+JOIN ohlcv exit
+  ON exit.exchange = $exchange AND exit.timeframe = '1d' AND exit.symbol = l.token || '/USDT'
+ AND exit.ts = epoch_ms(date_trunc('day', l.unlock_date)) + ($horizon - 1) * {day_ms}
+"""
+
+
+class _ArchiveLock:
+    """
+    Shared by analytical queries, exclusive while the archiver adds or removes
+    Parquet files, so a query never globs a file that disappears under it or sees
+    rows both in the table and in a part file. A waiting archiver holds off new
+    queries.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writing = False
+
+    @contextmanager
+    def shared(self):
+        with self._cond:
+            self._cond.wait_for(lambda: not self._writing)
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                self._cond.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        with self._cond:
+            self._cond.wait_for(lambda: not self._writing)
+            self._writing = True
+            self._cond.wait_for(lambda: self._readers == 0)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+
+
+class SignalStore:
+    """
+    Append-only signal history in DuckDB. Rows older than SIGNAL_ARCHIVE_AFTER_DAYS
+    are moved to Parquet files under SIGNAL_ARCHIVE_DIR; queries read both, so the
+    analytics below run inside DuckDB over the full history without loading it here.
+
+    Appends are queued on the database's writer thread off the request path, at most
+    one row per (token, unlock) every SIGNAL_HISTORY_INTERVAL seconds.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._archive_lock = _ArchiveLock()
+        self._ready = False
+        self._last_recorded: Dict[Tuple[str, datetime], float] = {}
+
+    def _conn(self):
+        conn = db.get_connection()
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    conn.execute(SCHEMA)
+                    conn.execute(CANDLE_SCHEMA)  # Joined for realized moves
+                    self._ready = True
+        return conn
+
+    @staticmethod
+    def _archive_files() -> List[str]:
+        return sorted(glob.glob(os.path.join(settings.SIGNAL_ARCHIVE_DIR, ARCHIVE_GLOB)))
+
+    def _source(self) -> str:
+        """
+        The live table, plus the Parquet archive when there is one.
+        """
+        if not self._archive_files():
+            return "signal_history"
+        pattern = os.path.join(settings.SIGNAL_ARCHIVE_DIR, ARCHIVE_GLOB).replace("'", "''")
+        columns = ", ".join(HISTORY_COLUMNS)
+        return (f"(SELECT {columns} FROM signal_history "
+                f"UNION ALL SELECT {columns} FROM read_parquet('{pattern}'))")
+
+    @contextmanager
+    def _snapshot(self):
+        """
+        Cursor for an analytical read. DuckDB cannot open the file read-only next to
+        our read-write connection, so the query runs in a transaction that is always
+        rolled back, with the archive files held in place.
+        """
+        conn = self._conn()  # Schema is created outside the transaction
+        with self._archive_lock.shared():
+            conn.execute("BEGIN TRANSACTION")
+            try:
+                yield conn
+            finally:
+                conn.execute("ROLLBACK")
+
+    @staticmethod
+    def _records(cursor) -> List[dict]:
+        names = [d[0] for d in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    # --- Writes ------------------------------------------------------------
+
+    def _due(self, token: str, unlock_date: datetime, now: float) -> bool:
+        key = (token, unlock_date)
+        last = self._last_recorded.get(key)
+        if last is not None and now - last < settings.SIGNAL_HISTORY_INTERVAL:
+            return False
+        self._last_recorded[key] = now
+        return True
+
+    def _prune(self, now: float):
+        if len(self._last_recorded) > 100_000:
+            cutoff = now - settings.SIGNAL_HISTORY_INTERVAL
+            self._last_recorded = {k: t for k, t in self._last_recorded.items() if t >= cutoff}
+
+    def insert_sync(self, rows: List[dict]) -> int:
+        if not rows:
+            return 0
+        import pandas as pd
+        frame = pd.DataFrame(rows, columns=HISTORY_COLUMNS)
+        conn = self._conn()
+        conn.register("incoming_signals", frame)
+        try:
+            conn.execute("INSERT INTO signal_history BY NAME SELECT * FROM incoming_signals")
+        finally:
+            conn.unregister("incoming_signals")
+        return len(frame)
+
+    def record(self, events: Sequence["UnlockEvent"], signals: Sequence["TradeSignal"], source: str):
+        """
+        Queue scored signals for the history (non-blocking).
+        """
+        if not settings.SIGNAL_HISTORY_ENABLED:
+            return
+        now = time.time()
+        computed_at = datetime.utcnow()
+        rows = [
+            {
+                'token': sig.token, 'unlock_date': event.unlock_date, 'computed_at': computed_at,
+                'signal': sig.signal.value, 'uis_score': sig.uis_score, 'confidence': sig.confidence,
+                'expected_move_pct': sig.expected_move_pct, 'degraded': sig.degraded, 'source': source,
+            }
+            for event, sig in zip(events, signals)
+            if self._due(sig.token, event.unlock_date, now)
+        ]
+        self._prune(now)
+        if rows:
+            db.write_nowait(self.insert_sync, rows)
+
+    def record_columns(self, events: Sequence["UnlockEvent"], batch: "SignalColumns", source: str):
+        """
+        Columnar variant of record() for bulk scoring.
+        """
+        if not settings.SIGNAL_HISTORY_ENABLED or not len(batch):
+            return
+        import numpy as np
+        import pandas as pd
+        from app.engine.columnar import SIGNAL_TYPES
+        now = time.time()
+        due = np.fromiter((self._due(e.token_symbol, e.unlock_date, now) for e in events),
+                          dtype=bool, count=len(batch))
+        self._prune(now)
+        if not due.any():
+            return
+        signal_names = np.array([t.value for t in SIGNAL_TYPES], dtype=object)
+        frame = pd.DataFrame({
+            'token': np.asarray(batch.token, dtype=object)[due],
+            'unlock_date': np.array([e.unlock_date for e in events], dtype=object)[due],
+            'computed_at': datetime.utcnow(),
+            'signal': signal_names[batch.signal[due]],
+            'uis_score': batch.uis_score[due],
+            'confidence': batch.confidence[due],
+            'expected_move_pct': batch.expected_move_pct[due],
+            'degraded': batch.degraded[due],
+            'source': source,
+        })
+        db.write_nowait(self.insert_sync, frame.to_dict('records'))
+
+    def archive_sync(self, older_than: datetime) -> int:
+        """
+        Move rows computed before the start of `older_than`'s day into the monthly
+        Parquet partitions, then compact months that are wholly archived. Returns rows
+        moved.
+        """
+        cutoff = older_than.replace(hour=0, minute=0, second=0, microsecond=0)
+        conn = self._conn()
+        months = [m for (m,) in conn.execute(
+            "SELECT DISTINCT strftime(computed_at, '%Y-%m') FROM signal_history WHERE computed_at < ? ORDER BY 1",
+            [cutoff],
+        ).fetchall()]
+        moved, written = 0, []
+        # Exclusive from the first part file to the commit: queries see the rows either
+        # in the table or in the archive, never both
+        with self._archive_lock.exclusive():
+            conn.execute("BEGIN TRANSACTION")
+            try:
+                for month in months:
+                    start = datetime.strptime(month, "%Y-%m")
+                    end = min(_next_month(start), cutoff)
+                    directory = os.path.join(settings.SIGNAL_ARCHIVE_DIR, ARCHIVE_PARTITION.format(month=month))
+                    os.makedirs(directory, exist_ok=True)
+                    path = os.path.join(directory, f"part_{cutoff:%Y%m%d}_{int(time.time() * 1000)}.parquet")
+                    written.append(path)
+                    # COPY takes no parameters; the literals are generated here
+                    _copy(conn, f"SELECT {', '.join(HISTORY_COLUMNS)} FROM signal_history "
+                                f"WHERE computed_at >= {_ts(start)} AND computed_at < {_ts(end)}", path)
+                    moved += conn.execute(
+                        "DELETE FROM signal_history WHERE computed_at >= ? AND computed_at < ?", [start, end]
+                    ).fetchone()[0]
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                for path in written:
+                    if os.path.exists(path):
+                        os.remove(path)
+                raise
+        self._compact_sync(cutoff)
+        return moved
+
+    def _compact_sync(self, cutoff: datetime):
+        """
+        Merge the parts of every month that ended before `cutoff` into one file.
+        Rewritten through a temporary name outside the query glob, then swapped in
+        under the archive lock; duplicate rows left by an interrupted compaction are
+        dropped the next time.
+        """
+        conn = self._conn()
+        for directory in sorted(glob.glob(os.path.join(settings.SIGNAL_ARCHIVE_DIR, "month=*"))):
+            month = os.path.basename(directory).split("=", 1)[1]
+            parts = sorted(glob.glob(os.path.join(directory, "*.parquet")))
+            if len(parts) < 2 or _next_month(datetime.strptime(month, "%Y-%m")) > cutoff:
+                continue
+            target = os.path.join(directory, COMPACTED_FILE)
+            tmp = target + ".tmp"
+            files = ", ".join(_literal(p) for p in parts)
+            _copy(conn, f"SELECT DISTINCT {', '.join(HISTORY_COLUMNS)} FROM read_parquet([{files}]) "
+                        f"ORDER BY computed_at", tmp)
+            with self._archive_lock.exclusive():
+                os.replace(tmp, target)
+                for part in parts:
+                    if part != target:
+                        os.remove(part)
+
+    async def run_archiver_forever(self, interval: Optional[float] = None):
+        interval = interval or settings.SIGNAL_ARCHIVE_INTERVAL
+        while True:
+            cutoff = datetime.utcnow() - timedelta(days=settings.SIGNAL_ARCHIVE_AFTER_DAYS)
+            try:
+                await db.write(self.archive_sync, cutoff)
+            except Exception as e:
+                logger.warning("Signal archive error: %r", e)
+                record_error('signal_archive', e)
+            await asyncio.sleep(interval)
+
+    # --- Analytical reads (pushed down to DuckDB) --------------------------
+
+    def history_sync(self, token: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                     limit: int = 1000) -> List[dict]:
+        """
+        Stored signals for a token, newest first.
+        """
+        with self._snapshot() as conn:
+            cursor = conn.execute(
+                f"""
+                SELECT {', '.join(HISTORY_COLUMNS)} FROM {self._source()}
+                WHERE token = ? AND computed_at >= ? AND computed_at <= ?
+                ORDER BY computed_at DESC
+                LIMIT ?
+                """,
+                [token.upper(), start or datetime(1970, 1, 1), end or datetime(9999, 1, 1), limit],
+            )
+            return self._records(cursor)
+
+    def _moves(self, where: str, params: dict, horizon_days: int, exchange: Optional[str]) -> Tuple[str, dict]:
+        sql = MOVES_SQL.format(source=self._source(), where=where, day_ms=DAY_MS)
+        return sql, {**params, "exchange": exchange or settings.DEFAULT_EXCHANGE, "horizon": horizon_days}
+
+    def hit_rate_sync(self, bucket_width: float = 0.5, horizon_days: int = 7,
+                      exchange: Optional[str] = None) -> List[dict]:
+        """
+        Per UIS bucket: signals with a realized move, share whose realized move had the
+        sign of the expected move, and mean expected / realized move.
+        """
+        with self._snapshot() as conn:
+            moves, params = self._moves("", {}, horizon_days, exchange)
+            cursor = conn.execute(
+                f"""
+                SELECT floor(uis_score / $width) * $width AS uis_bucket,
+                       count(*) AS n,
+                       avg(CASE WHEN sign(realized_move_pct) = sign(expected_move_pct) THEN 1.0 ELSE 0.0 END) AS hit_rate,
+                       avg(expected_move_pct) AS mean_expected_move_pct,
+                       avg(realized_move_pct) AS mean_realized_move_pct
+                FROM ({moves})
+                GROUP BY uis_bucket
+                ORDER BY uis_bucket
+                """,
+                {**params, "width": bucket_width},
+            )
+            return self._records(cursor)
+
+    def realized_sync(self, token: Optional[str] = None, horizon_days: int = 7, exchange: Optional[str] = None,
+                      limit: int = 1000) -> List[dict]:
+        """
+        Expected vs realized move per (token, unlock), most recent unlocks first.
+        """
+        where, params = ("AND token = $token", {"token": token.upper()}) if token else ("", {})
+        with self._snapshot() as conn:
+            moves, params = self._moves(where, params, horizon_days, exchange)
+            cursor = conn.execute(
+                f"""
+                SELECT *, realized_move_pct - expected_move_pct AS error_pct
+                FROM ({moves})
+                ORDER BY unlock_date DESC
+                LIMIT $limit
+                """,
+                {**params, "limit": limit},
+            )
+            return self._records(cursor)
+
+    async def history(self, token: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                      limit: int = 1000) -> List[dict]:
+        return await db.read(self.history_sync, token, start, end, limit)
+
+    async def hit_rate(self, bucket_width: float = 0.5, horizon_days: int = 7,
+                       exchange: Optional[str] = None) -> List[dict]:
+        return await db.read(self.hit_rate_sync, bucket_width, horizon_days, exchange)
+
+    async def realized(self, token: Optional[str] = None, horizon_days: int = 7, exchange: Optional[str] = None,
+                       limit: int = 1000) -> List[dict]:
+        return await db.read(self.realized_sync, token, horizon_days, exchange, limit)
+
+def _next_month(start: datetime) -> datetime:
+    return start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+
+def _literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+def _ts(value: datetime) -> str:
+    return f"TIMESTAMP {_literal(value.isoformat(sep=' '))}"
+
+def _copy(conn, query: str, path: str):
+    conn.execute(f"COPY ({query}) TO {_literal(path)} (FORMAT PARQUET)")
+
+signal_store = SignalStore()
@@ -0,0 +1,241 @@
+import asyncio
+import hashlib
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import List, Optional
+from pydantic import TypeAdapter
+from app.core.config import settings
+from app.core.metrics import STAGE_LATENCY, cache_result, record_error
+from app.core.redis import get_redis
+from app.engine.calculator import TradeSignal
+from app.engine.pipeline import score_events
+from app.services.signal_store import signal_store
+from app.services.unlocks import UnlockEvent, unlock_service
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KEY = "signals:dashboard:snapshot"
+GENERATION_KEY = "signals:dashboard:generation"  # No TTL: stays monotonic when the snapshot expires
+LOCK_KEY = "signals:dashboard:lock"
+LEADER_KEY = "signals:dashboard:leader"
+
+# Extend the lease only if this worker still holds it
+_RENEW_LEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Compare the etag and bump the generation in one step, so concurrent publishers
+# cannot both read generation N and both write N + 1. Returns [generation, changed],
+# or [-1, 0] without writing if ARGV[5] is set and no longer holds the leader lease.
+_PUBLISH = """
+if ARGV[5] ~= '' and redis.call('get', KEYS[3]) ~= ARGV[5] then
+    return {-1, 0}
+end
+local generation = tonumber(redis.call('hget', KEYS[1], 'generation'))
+local changed = 0
+if not generation or redis.call('hget', KEYS[1], 'etag') ~= ARGV[1] then
+    generation = redis.call('incr', KEYS[2])
+    redis.call('hset', KEYS[1], 'generation', generation, 'etag', ARGV[1], 'payload', ARGV[2])
+    changed = 1
+end
+redis.call('hset', KEYS[1], 'computed_at', ARGV[3])
+redis.call('pexpire', KEYS[1], ARGV[4])
+return {generation, changed}
+"""
+
+_signals_adapter = TypeAdapter(List[TradeSignal])
+
+
+@dataclass(frozen=True)
+class DashboardSnapshot:
+    generation: int
+    etag: str
+    payload: bytes  # Pre-encoded JSON list of TradeSignal
+    computed_at: float
+
+
+class SignalSnapshotService:
+    """
+    Computes the dashboard once per tick and shares it through Redis, so the
+    exchange/RPC load is independent of how many clients are polling.
+    The generation counter only moves when the payload actually changes; a snapshot
+    older than SNAPSHOT_MAX_AGE (e.g. its publisher died) expires and is recomputed.
+    """
+    def __init__(self):
+        self._worker_id = uuid.uuid4().hex
+        self._local: Optional[DashboardSnapshot] = None  # Fallback if Redis is down
+        self._refresh_lock = asyncio.Lock()
+        self.changed = asyncio.Event()  # Set when this process publishes a new generation
+
+    async def get(self) -> Optional[DashboardSnapshot]:
+        try:
+            data = await get_redis().hgetall(SNAPSHOT_KEY)
+        except Exception:
+            return self._local
+        if not data:
+            return self._local
+        return DashboardSnapshot(
+            generation=int(data["generation"]),
+            etag=data["etag"],
+            payload=data["payload"].encode(),
+            computed_at=float(data["computed_at"]),
+        )
+
+    async def get_generation(self) -> int:
+        try:
+            generation = await get_redis().hget(SNAPSHOT_KEY, "generation")
+        except Exception:
+            generation = None
+        if generation is None:
+            return self._local.generation if self._local else 0
+        return int(generation)
+
+    async def get_etag(self) -> Optional[str]:
+        """
+        Cheap conditional-request check that avoids transferring the payload.
+        """
+        try:
+            etag = await get_redis().hget(SNAPSHOT_KEY, "etag")
+        except Exception:
+            etag = None
+        if etag is None and self._local:
+            return self._local.etag
+        return etag
+
+    async def _acquire_tick(self, interval: float) -> bool:
+        """
+        One worker per tick wins the lock; the lock expires just before the next tick.
+        """
+        try:
+            ttl_ms = max(int(interval * 900), 100)
+            return bool(await get_redis().set(LOCK_KEY, self._worker_id, nx=True, px=ttl_ms))
+        except Exception:
+            # No Redis: every process refreshes its own local snapshot
+            return True
+
+    async def hold_lead(self, ttl: float) -> bool:
+        """
+        Lease for a single long-running publisher (the reactive engine): taken if free,
+        renewed if this worker holds it. Call again well within `ttl`.
+        """
+        ttl_ms = max(int(ttl * 1000), 100)
+        try:
+            redis = get_redis()
+            if await redis.set(LEADER_KEY, self._worker_id, nx=True, px=ttl_ms):
+                return True
+            return bool(await redis.eval(_RENEW_LEASE, 1, LEADER_KEY, self._worker_id, ttl_ms))
+        except Exception:
+            # No Redis: every process publishes its own local snapshot
+            return True
+
+    async def refresh(self) -> DashboardSnapshot:
+        """
+        Recompute the dashboard and publish it if the content changed.
+        """
+        with STAGE_LATENCY.time(stage="snapshot_refresh"):
+            events = await unlock_service.get_next_major_unlocks(limit=settings.DASHBOARD_LIMIT)
+            signals = await (self._from_workers(events) if settings.SCORING_OFFLOAD else score_events(events))
+        return await self.publish(signals)
+
+    @staticmethod
+    async def _from_workers(events: List[UnlockEvent]) -> List[TradeSignal]:
+        """
+        Signals the Celery scoring chords wrote for these events; events they have
+        not scored (yet) are scored here.
+        """
+        from app.tasks.scoring import read_signals
+        try:
+            signals = await read_signals(events)
+        except Exception as e:
+            logger.warning("Worker signals unavailable: %r", e)
+            signals = [None] * len(events)
+        missing = [i for i, sig in enumerate(signals) if sig is None]
+        hits = [i for i, sig in enumerate(signals) if sig is not None]
+        cache_result('worker_signals', True, len(hits))
+        cache_result('worker_signals', False, len(missing))
+        # Workers have no access to the history database: record theirs here
+        signal_store.record([events[i] for i in hits], [signals[i] for i in hits], 'celery')
+        if missing:
+            for i, sig in zip(missing, await score_events([events[i] for i in missing])):
+                signals[i] = sig
+        return signals
+
+    async def publish(self, signals: List[TradeSignal], leased: bool = False) -> Optional[DashboardSnapshot]:
+        """
+        Publish a dashboard computed elsewhere (e.g. patched by the reactive engine).
+        The generation only moves if the content changed. With `leased`, the write is
+        fenced on this worker still holding the hold_lead lease; None if it does not.
+        """
+        payload = _signals_adapter.dump_json(signals)
+        etag = '"' + hashlib.sha1(payload).hexdigest()[:20] + '"'
+        now = time.time()
+
+        try:
+            generation, changed = await get_redis().eval(
+                _PUBLISH, 3, SNAPSHOT_KEY, GENERATION_KEY, LEADER_KEY,
+                etag, payload.decode(), now, max(int(settings.SNAPSHOT_MAX_AGE * 1000), 1000),
+                self._worker_id if leased else "",
+            )
+            generation, changed = int(generation), bool(changed)
+            if generation < 0:
+                logger.warning("Snapshot publish dropped: leader lease lost")
+                return None
+        except Exception as e:
+            logger.warning("Snapshot publish error: %r", e)
+            record_error('snapshot', e)
+            current = self._local
+            changed = current is None or current.etag != etag
+            generation = (current.generation if current else 0) + changed
+
+        snapshot = DashboardSnapshot(generation, etag, payload, now)
+        self._local = snapshot
+        if changed:
+            self.changed.set()
+        return snapshot
+
+    async def get_or_refresh(self) -> DashboardSnapshot:
+        """
+        Serve the current snapshot; on a cold start or when it is stale, compute it
+        once per process while concurrent requests wait on the same computation.
+        If that fails, a stale snapshot is still better than none.
+        """
+        snapshot = await self.get()
+        if self._fresh(snapshot):
+            return snapshot
+        async with self._refresh_lock:
+            snapshot = await self.get()
+            if self._fresh(snapshot):
+                return snapshot
+            try:
+                return await self.refresh()
+            except Exception:
+                if snapshot is None:
+                    raise
+                logger.exception("Stale snapshot refresh error")
+                return snapshot
+
+    @staticmethod
+    def _fresh(snapshot: Optional[DashboardSnapshot]) -> bool:
+        return snapshot is not None and time.time() - snapshot.computed_at < settings.SNAPSHOT_MAX_AGE
+
+    async def run_forever(self, interval: Optional[float] = None):
+        interval = interval or settings.SNAPSHOT_REFRESH_INTERVAL
+        while True:
+            started = time.monotonic()
+            try:
+                if await self._acquire_tick(interval):
+                    async with self._refresh_lock:
+                        await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Snapshot refresh error")
+                record_error('snapshot', e)
+            await asyncio.sleep(max(interval - (time.monotonic() - started), 0.0))
+
+snapshot_service = SignalSnapshotService()
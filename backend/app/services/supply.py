@@ -0,0 +1,203 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.core.config import settings
+from app.core.http import get_http_client
+from app.core.metrics import cache_result, record_error
+from app.core.redis import get_redis
+from app.services.onchain import onchain_service
+
+TOTAL_SUPPLY_SELECTOR = "0x18160ddd"  # totalSupply()
+MESSARI_METRICS_URL = "https://data.messari.io/api/v1/assets/{symbol}/metrics"
+CACHE_KEY = "supply:{symbol}"
+logger = logging.getLogger(__name__)
+
+MISS_TTL = 300.0  # Unresolvable tokens are retried after this long, not every scoring pass
+
+
+@dataclass(frozen=True)
+class TokenSupply:
+    symbol: str
+    circulating: Optional[float]
+    total: Optional[float]
+    source: str  # 'messari' | 'onchain' | 'none'
+
+
+class SupplyService:
+    """
+    Circulating / total supply per token behind three layers: an in-process LRU with
+    TTL, a shared Redis copy (SUPPLY_CACHE_TTL), then the providers. Concurrent
+    lookups for the same token share one in-flight resolution.
+    """
+    def __init__(self):
+        self._local: "OrderedDict[str, Tuple[float, TokenSupply]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}  # symbol -> resolution of its batch
+
+    def _local_get(self, symbol: str) -> Optional[TokenSupply]:
+        entry = self._local.get(symbol)
+        if entry is None:
+            return None
+        expires, supply = entry
+        if expires < time.monotonic():
+            del self._local[symbol]
+            return None
+        self._local.move_to_end(symbol)
+        return supply
+
+    def _local_put(self, supply: TokenSupply, ttl: float):
+        self._local[supply.symbol] = (time.monotonic() + ttl, supply)
+        self._local.move_to_end(supply.symbol)
+        while len(self._local) > settings.SUPPLY_CACHE_SIZE:
+            self._local.popitem(last=False)
+
+    async def _redis_get_many(self, symbols: List[str]) -> Dict[str, TokenSupply]:
+        try:
+            values = await get_redis().mget([CACHE_KEY.format(symbol=s) for s in symbols])
+        except Exception as e:
+            record_error('supply_cache', e)
+            return {}
+        return {s: TokenSupply(**json.loads(v)) for s, v in zip(symbols, values) if v}
+
+    async def _redis_put_many(self, supplies: List[TokenSupply]):
+        if not supplies:
+            return
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for supply in supplies:
+                    pipe.set(CACHE_KEY.format(symbol=supply.symbol), json.dumps(asdict(supply)),
+                             ex=int(settings.SUPPLY_CACHE_TTL))
+                await pipe.execute()
+        except Exception as e:
+            logger.warning("Error caching supply in Redis: %r", e)
+            record_error('supply_cache', e)
+
+    async def fetch_messari(self, symbol: str) -> Optional[float]:
+        """
+        Circulating supply from Messari asset metrics, None if unavailable.
+        """
+        if not settings.MESSARI_API_KEY:
+            return None
+        headers = {"x-messari-api-key": settings.MESSARI_API_KEY}
+        try:
+            response = await get_http_client().get(MESSARI_METRICS_URL.format(symbol=symbol.lower()), headers=headers)
+            response.raise_for_status()
+            supply = ((response.json().get("data") or {}).get("supply")) or {}
+        except Exception as e:
+            logger.warning("Error fetching Messari supply for %s: %r", symbol, e)
+            record_error('messari', e)
+            return None
+        circulating = supply.get("circulating")
+        # Messari's other supply figures (y_2050, y_plus10) are projections, not current totals
+        return float(circulating) if circulating else None
+
+    async def fetch_total_supply(self, token_addresses: List[str]) -> Dict[str, float]:
+        """
+        ERC-20 totalSupply() for many tokens in one batched eth_call, scaled by decimals.
+        """
+        if not settings.ALCHEMY_API_KEY or not token_addresses:
+            return {}
+        addresses = list(dict.fromkeys(a.lower() for a in token_addresses))
+        calls = [("eth_call", [{"to": addr, "data": TOTAL_SUPPLY_SELECTOR}, "latest"]) for addr in addresses]
+        try:
+            responses, decimals = await asyncio.gather(
+                onchain_service._rpc_batch(calls), onchain_service.get_decimals(addresses)
+            )
+        except Exception as e:
+            logger.warning("RPC Error: %r", e)
+            record_error('supply_onchain', e)
+            return {}
+        totals = {}
+        for addr, response in zip(addresses, responses):
+            result = response.get("result")
+            if result and result != "0x":
+                totals[addr] = int(result, 16) / 10.0 ** decimals[addr]
+        return totals
+
+    async def _resolve(self, tokens: Dict[str, Optional[str]]) -> Dict[str, TokenSupply]:
+        """
+        Provider lookup for cache misses: Messari per symbol (circulating), and one
+        batched totalSupply call for everything with a contract address (total).
+        Without Messari, circulating stays unknown: total supply includes locked
+        tokens and would understate unlock_percent-based pressure.
+        """
+        symbols = list(tokens)
+        messari = await asyncio.gather(*(self.fetch_messari(s) for s in symbols))
+        onchain = await self.fetch_total_supply([a for a in tokens.values() if a])
+
+        resolved = {}
+        for symbol, from_messari in zip(symbols, messari):
+            address = tokens[symbol]
+            total_onchain = onchain.get(address.lower()) if address else None
+            if from_messari:
+                resolved[symbol] = TokenSupply(symbol, from_messari, total_onchain, "messari")
+            elif total_onchain:
+                resolved[symbol] = TokenSupply(symbol, None, total_onchain, "onchain")
+            else:
+                resolved[symbol] = TokenSupply(symbol, None, None, "none")
+        return resolved
+
+    async def get_supplies(self, tokens: Iterable[Tuple[str, Optional[str]]]) -> Dict[str, TokenSupply]:
+        """
+        Supply for many (symbol, token_address) pairs. Local hits are free, Redis is read
+        with one MGET, and the remaining misses are resolved in one batch.
+        """
+        wanted: Dict[str, Optional[str]] = {}
+        for symbol, address in tokens:
+            symbol = symbol.upper()
+            wanted[symbol] = wanted.get(symbol) or address
+
+        result: Dict[str, TokenSupply] = {}
+        for symbol in list(wanted):
+            supply = self._local_get(symbol)
+            if supply is not None:
+                result[symbol] = supply
+                del wanted[symbol]
+        cache_result('supply_local', True, len(result))
+        cache_result('supply_local', False, len(wanted))
+
+        if wanted:
+            shared = await self._redis_get_many(list(wanted))
+            cache_result('supply_redis', True, len(shared))
+            cache_result('supply_redis', False, len(wanted) - len(shared))
+            for symbol, supply in shared.items():
+                self._local_put(supply, settings.SUPPLY_CACHE_TTL)
+                result[symbol] = supply
+                del wanted[symbol]
+
+        # Join resolutions already in flight; resolve the rest in one batch. The batch
+        # runs detached, so a caller timing out does not cancel the others waiting on it
+        batches = {s: self._inflight[s] for s in wanted if s in self._inflight}
+        mine = {s: a for s, a in wanted.items() if s not in batches}
+        if mine:
+            task = asyncio.create_task(self._resolve_and_cache(mine))
+            for symbol in mine:
+                self._inflight[symbol] = task
+                batches[symbol] = task
+            task.add_done_callback(self._landed)
+        for task in set(batches.values()):
+            resolved = await asyncio.shield(task)
+            result.update((s, supply) for s, supply in resolved.items() if s in batches)
+        return result
+
+    async def _resolve_and_cache(self, tokens: Dict[str, Optional[str]]) -> Dict[str, TokenSupply]:
+        resolved = await self._resolve(tokens)
+        for supply in resolved.values():
+            found = supply.circulating is not None
+            self._local_put(supply, settings.SUPPLY_CACHE_TTL if found else MISS_TTL)
+        await self._redis_put_many([s for s in resolved.values() if s.circulating is not None])
+        return resolved
+
+    def _landed(self, task: asyncio.Task):
+        for symbol in [s for s, t in self._inflight.items() if t is task]:
+            del self._inflight[symbol]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved; callers re-raise it themselves, if any are left
+
+    async def get_supply(self, symbol: str, token_address: Optional[str] = None) -> TokenSupply:
+        return (await self.get_supplies([(symbol, token_address)]))[symbol.upper()]
+
+supply_service = SupplyService()
@@ -0,0 +1,127 @@
+import threading
+from typing import Dict, Iterable, List
+from app.core.database import db
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS log_cursors (
+    chain VARCHAR NOT NULL,
+    token_address VARCHAR NOT NULL,
+    last_block BIGINT NOT NULL,   -- last block fully scanned for this token
+    PRIMARY KEY (chain, token_address)
+);
+CREATE TABLE IF NOT EXISTS cex_transfers (
+    chain VARCHAR NOT NULL,
+    token_address VARCHAR NOT NULL,
+    block_number BIGINT NOT NULL,
+    tx_hash VARCHAR NOT NULL,
+    log_index INTEGER NOT NULL,
+    from_address VARCHAR,
+    to_address VARCHAR,
+    amount_hex VARCHAR,           -- raw uint256 `data` field
+    PRIMARY KEY (chain, tx_hash, log_index)
+);
+"""
+
+TRANSFER_COLUMNS = [
+    'token_address', 'block_number', 'tx_hash', 'log_index', 'from_address', 'to_address', 'amount_hex'
+]
+
+
+class TransferStore:
+    """
+    Per-token eth_getLogs cursors and the CEX-bound Transfer logs they produced.
+    Addresses are stored lowercase. Same threading model as the candle store.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _conn(self):
+        conn = db.get_connection()
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    conn.execute(SCHEMA)
+                    self._ready = True
+        return conn
+
+    def get_cursors_sync(self, chain: str, token_addresses: Iterable[str]) -> Dict[str, int]:
+        addresses = [a.lower() for a in token_addresses]
+        if not addresses:
+            return {}
+        rows = self._conn().execute(
+            "SELECT token_address, last_block FROM log_cursors WHERE chain = ? AND list_contains(?, token_address)",
+            [chain, addresses],
+        ).fetchall()
+        return {addr: int(block) for addr, block in rows}
+
+    def save_sync(self, chain: str, logs: List[dict], cursors: Dict[str, int]):
+        """
+        Store decoded logs and advance cursors in one transaction.
+        """
+        import pandas as pd
+        conn = self._conn()
+        conn.execute("BEGIN TRANSACTION")
+        try:
+            if logs:
+                transfers = pd.DataFrame(logs, columns=TRANSFER_COLUMNS).drop_duplicates(['tx_hash', 'log_index'])
+                conn.register("transfers", transfers)
+                conn.execute(
+                    "INSERT INTO cex_transfers SELECT ?, * FROM transfers ON CONFLICT DO NOTHING", [chain]
+                )
+                conn.unregister("transfers")
+            for addr, block in cursors.items():
+                conn.execute(
+                    """
+                    INSERT INTO log_cursors VALUES (?, ?, ?)
+                    ON CONFLICT (chain, token_address)
+                    DO UPDATE SET last_block = greatest(log_cursors.last_block, excluded.last_block)
+                    """,
+                    [chain, addr.lower(), block],
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def recent_sync(self, chain: str, token_address: str, since_block: int) -> List[dict]:
+        df = self._conn().execute(
+            f"""
+            SELECT {', '.join(TRANSFER_COLUMNS)} FROM cex_transfers
+            WHERE chain = ? AND token_address = ? AND block_number >= ?
+            ORDER BY block_number, log_index
+            """,
+            [chain, token_address.lower(), since_block],
+        ).df()
+        return df.to_dict('records')
+
+    def recent_many_sync(self, chain: str, token_addresses: Iterable[str], since_block: int) -> Dict[str, List[dict]]:
+        """
+        recent_sync for many tokens in one query; tokens without logs are left out.
+        """
+        addresses = [a.lower() for a in token_addresses]
+        if not addresses:
+            return {}
+        df = self._conn().execute(
+            f"""
+            SELECT {', '.join(TRANSFER_COLUMNS)} FROM cex_transfers
+            WHERE chain = ? AND list_contains(?, token_address) AND block_number >= ?
+            ORDER BY token_address, block_number, log_index
+            """,
+            [chain, addresses, since_block],
+        ).df()
+        return {addr: group.to_dict('records') for addr, group in df.groupby('token_address', sort=False)}
+
+    async def get_cursors(self, chain: str, token_addresses: Iterable[str]) -> Dict[str, int]:
+        return await db.read(self.get_cursors_sync, chain, list(token_addresses))
+
+    async def save(self, chain: str, logs: List[dict], cursors: Dict[str, int]):
+        await db.write(self.save_sync, chain, logs, cursors)
+
+    async def recent(self, chain: str, token_address: str, since_block: int) -> List[dict]:
+        return await db.read(self.recent_sync, chain, token_address, since_block)
+
+    async def recent_many(self, chain: str, token_addresses: Iterable[str], since_block: int) -> Dict[str, List[dict]]:
+        return await db.read(self.recent_many_sync, chain, list(token_addresses), since_block)
+
+transfer_store = TransferStore()
@@ -0,0 +1,141 @@
+import threading
+from datetime import datetime, timezone
+from typing import List, Optional
+from app.core.database import db
+
+# No PRIMARY KEY: DuckDB cannot re-insert a deleted key in the same transaction,
+# so uniqueness on (token_symbol, unlock_day) is enforced by the delete+insert upsert.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS unlock_events (
+    token_symbol VARCHAR NOT NULL,
+    unlock_day DATE NOT NULL,        -- dedup key across sources, with token_symbol
+    unlock_date TIMESTAMP NOT NULL,
+    unlock_amount DOUBLE,
+    unlock_percent DOUBLE,
+    is_cliff BOOLEAN,
+    source VARCHAR,
+    token_address VARCHAR,
+    updated_at TIMESTAMP
+);
+ALTER TABLE unlock_events ADD COLUMN IF NOT EXISTS category VARCHAR;
+CREATE INDEX IF NOT EXISTS idx_unlock_events_date ON unlock_events (unlock_date);
+CREATE INDEX IF NOT EXISTS idx_unlock_events_token ON unlock_events (token_symbol, unlock_day);
+"""
+
+
+def utc_now() -> datetime:
+    """
+    Calendar times are stored and compared as naive UTC.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def utc_ms(value: datetime) -> int:
+    """
+    Epoch milliseconds of a calendar time. Naive values are UTC; a bare .timestamp()
+    would read them as local time.
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+
+EVENT_COLUMNS = [
+    'token_symbol', 'unlock_date', 'unlock_amount', 'unlock_percent', 'is_cliff', 'source', 'token_address',
+    'category'
+]
+
+
+class UnlockStore:
+    """
+    The unlock calendar in DuckDB, one row per (token, unlock day).
+    Same threading model as the candle store.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _conn(self):
+        conn = db.get_connection()
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    conn.execute(SCHEMA)
+                    self._ready = True
+        return conn
+
+    def upsert_sync(self, events: List[dict], replace_source: Optional[str] = None) -> int:
+        """
+        Insert or replace by (token_symbol, unlock_day). With `replace_source`, every
+        stored row of that source is dropped first, so the incoming set replaces it
+        (e.g. generated data whose dates move on each run).
+        """
+        if not events and replace_source is None:
+            return 0
+        import pandas as pd
+        rows = pd.DataFrame(events, columns=EVENT_COLUMNS)
+        rows['unlock_day'] = pd.to_datetime(rows['unlock_date']).dt.date
+        rows['updated_at'] = utc_now()
+        rows = rows.drop_duplicates(['token_symbol', 'unlock_day'], keep='first').sort_values('unlock_date')
+        conn = self._conn()
+        conn.register("incoming", rows)
+        conn.execute("BEGIN TRANSACTION")
+        try:
+            if replace_source is not None:
+                conn.execute("DELETE FROM unlock_events WHERE source = ?", [replace_source])
+            conn.execute(
+                """
+                DELETE FROM unlock_events USING incoming
+                WHERE unlock_events.token_symbol = incoming.token_symbol
+                  AND unlock_events.unlock_day = incoming.unlock_day
+                """
+            )
+            conn.execute(
+                """
+                INSERT INTO unlock_events
+                BY NAME SELECT token_symbol, unlock_day, unlock_date, unlock_amount, unlock_percent,
+                       is_cliff, source, token_address, updated_at, category
+                FROM incoming
+                """
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.unregister("incoming")
+        return len(rows)
+
+    def query_sync(self, start: Optional[datetime], end: Optional[datetime] = None, limit: Optional[int] = None,
+                   min_unlock_percent: Optional[float] = None, cliff_only: bool = False) -> List[dict]:
+        """
+        Events with start < unlock_date <= end, soonest first. start=None reads from the beginning.
+        """
+        sql = f"SELECT {', '.join(EVENT_COLUMNS)} FROM unlock_events WHERE unlock_date > ?"
+        params: list = [start or datetime(1970, 1, 1)]
+        if end is not None:
+            sql += " AND unlock_date <= ?"
+            params.append(end)
+        if min_unlock_percent is not None:
+            sql += " AND unlock_percent >= ?"
+            params.append(min_unlock_percent)
+        if cliff_only:
+            sql += " AND is_cliff"
+        sql += " ORDER BY unlock_date"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        df = self._conn().execute(sql, params).df()
+        records = df.astype(object).where(df.notna(), None).to_dict('records')
+        for row in records:
+            row['unlock_date'] = row['unlock_date'].to_pydatetime()
+        return records
+
+    async def upsert(self, events: List[dict], replace_source: Optional[str] = None) -> int:
+        return await db.write(self.upsert_sync, events, replace_source)
+
+    async def query(self, start: Optional[datetime], end: Optional[datetime] = None, limit: Optional[int] = None,
+                    min_unlock_percent: Optional[float] = None, cliff_only: bool = False) -> List[dict]:
+        return await db.read(self.query_sync, start, end, limit, min_unlock_percent, cliff_only)
+
+unlock_store = UnlockStore()
@@ -1,8 +1,19 @@
-import httpx
-from datetime import datetime, timedelta
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Optional
 from pydantic import BaseModel
 from app.core.config import settings
+from app.core.http import get_http_client
+from app.core.metrics import STAGE_LATENCY, record_error
+from app.services.unlock_store import unlock_store, utc_now
+
+logger = logging.getLogger(__name__)
+
+# Development stand-in for the TokenUnlocks feed; replaced wholesale on every ingest
+MOCK_SOURCE = "mock"
 
 class UnlockEvent(BaseModel):
     token_symbol: str
@@ -11,10 +22,32 @@ class UnlockEvent(BaseModel):
     unlock_percent: float  # % of circulating supply
     is_cliff: bool
     source: str
+    token_address: Optional[str] = None  # ERC-20 contract, if the token lives on Ethereum
+    category: Optional[str] = None  # Sector (L1, L2, DeFi, ...) for category-level dump factors
+
+@dataclass(slots=True)
+class EventRecord:
+    """
+    Validation-free, slotted stand-in for UnlockEvent on bulk paths (same attributes).
+    """
+    token_symbol: str
+    unlock_date: datetime
+    unlock_amount: float
+    unlock_percent: float
+    is_cliff: bool
+    source: str
+    token_address: Optional[str] = None
+    category: Optional[str] = None
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
 
 class UnlockDataService:
     def __init__(self):
-        self.http_client = httpx.AsyncClient(timeout=10.0)
+        self._ingested_at: Optional[float] = None
+        self._ingest_lock = asyncio.Lock()
 
     async def fetch_token_unlocks(self) -> List[UnlockEvent]:
         """
@@ -23,25 +56,25 @@ class UnlockDataService:
         # In a real scenario, we would use:
         # url = "https://api.tokenunlocks.app/v1/unlocks"
         # headers = {"Authorization": f"Bearer {settings.TOKEN_UNLOCKS_API_KEY}"}
-        # response = await self.http_client.get(url, headers=headers)
+        # response = await get_http_client().get(url, headers=headers)
         
         # Simulating data for development/demonstration
         return [
             UnlockEvent(
                 token_symbol="ARB",
-                unlock_date=datetime.now() + timedelta(days=2),
+                unlock_date=utc_now() + timedelta(days=2),
                 unlock_amount=1_110_000_000,
                 unlock_percent=18.5,
                 is_cliff=True,
-                source="TokenUnlocks"
+                source=MOCK_SOURCE
             ),
             UnlockEvent(
                 token_symbol="SUI",
-                unlock_date=datetime.now() + timedelta(days=5),
+                unlock_date=utc_now() + timedelta(days=5),
                 unlock_amount=34_000_000,
                 unlock_percent=2.4,
                 is_cliff=False,
-                source="TokenUnlocks"
+                source=MOCK_SOURCE
             )
         ]
 
@@ -49,19 +82,135 @@ class UnlockDataService:
         """
         Fetch vesting schedule from Cryptorank.
         """
-        # url = f"https://api.cryptorank.io/v1/currencies/{symbol}/vesting"
-        # headers = {"api-key": settings.CRYPTORANK_API_KEY}
-        return {}
+        if not settings.CRYPTORANK_API_KEY:
+            return {}
+        url = f"https://api.cryptorank.io/v1/currencies/{symbol}/vesting"
+        headers = {"api-key": settings.CRYPTORANK_API_KEY}
+        try:
+            response = await get_http_client().get(url, headers=headers)
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            logger.warning("Error fetching Cryptorank vesting for %s: %r", symbol, e)
+            record_error('cryptorank', e)
+            return {}
+
+    @staticmethod
+    def parse_cryptorank_vesting(symbol: str, data: Dict) -> List[UnlockEvent]:
+        """
+        Flatten Cryptorank allocation batches into UnlockEvents. Unknown shapes yield [].
+        """
+        events = []
+        allocations = (data.get("data") or {}).get("allocations") or []
+        for allocation in allocations:
+            for batch in allocation.get("batches") or []:
+                try:
+                    events.append(UnlockEvent(
+                        token_symbol=symbol.upper(),
+                        unlock_date=_naive_utc(datetime.fromisoformat(str(batch["date"]).replace("Z", "+00:00"))),
+                        unlock_amount=float(batch.get("tokens") or 0.0),
+                        unlock_percent=float(batch.get("unlockPercent") or 0.0),
+                        is_cliff=bool(batch.get("isCliff", False)),
+                        source="Cryptorank",
+                    ))
+                except (KeyError, TypeError, ValueError):
+                    continue
+        return events
+
+    @staticmethod
+    def merge_sources(*sources: List[UnlockEvent]) -> List[UnlockEvent]:
+        """
+        Deduplicate on (token, unlock day). Earlier sources win; later ones only fill gaps.
+        """
+        merged: Dict[tuple, UnlockEvent] = {}
+        for events in sources:
+            for event in events:
+                key = (event.token_symbol.upper(), event.unlock_date.date())
+                existing = merged.get(key)
+                if existing is None:
+                    merged[key] = event
+                else:
+                    if not existing.token_address and event.token_address:
+                        existing.token_address = event.token_address
+                    if not existing.unlock_amount and event.unlock_amount:
+                        existing.unlock_amount = event.unlock_amount
+                    if not existing.category and event.category:
+                        existing.category = event.category
+        return list(merged.values())
+
+    async def ingest_calendar(self) -> int:
+        """
+        Pull TokenUnlocks + Cryptorank schedules, deduplicate and upsert into DuckDB.
+        """
+        token_unlocks = await self.fetch_token_unlocks()
+        symbols = sorted({e.token_symbol for e in token_unlocks} | set(settings.UNLOCK_WATCHLIST))
+
+        semaphore = asyncio.Semaphore(8)
+
+        async def cryptorank(symbol: str) -> List[UnlockEvent]:
+            async with semaphore:
+                return self.parse_cryptorank_vesting(symbol, await self.fetch_cryptorank_vesting(symbol))
+
+        cryptorank_events = [e for events in await asyncio.gather(*(cryptorank(s) for s in symbols)) for e in events]
+        merged = self.merge_sources(token_unlocks, cryptorank_events)
+        # The mock's dates move with the clock: replace its rows instead of adding a day's worth
+        written = await unlock_store.upsert([e.model_dump() for e in merged], replace_source=MOCK_SOURCE)
+        self._ingested_at = time.monotonic()
+        return written
+
+    async def ensure_ingested(self, max_age: Optional[float] = None):
+        """
+        Ingest if this process never has (no scheduler yet), or longer than `max_age`
+        seconds ago. Errors are logged: the stored calendar is served as it is.
+        """
+        def due() -> bool:
+            if self._ingested_at is None:
+                return True
+            return max_age is not None and time.monotonic() - self._ingested_at > max_age
+
+        if not due():
+            return
+        async with self._ingest_lock:
+            if due():
+                try:
+                    await self.ingest_calendar()
+                except Exception as e:
+                    logger.exception("Unlock calendar ingestion error")
+                    record_error('unlock_ingest', e)
+
+    async def run_ingestion_forever(self, interval: Optional[float] = None):
+        interval = interval or settings.UNLOCK_INGEST_INTERVAL
+        while True:
+            # Through ensure_ingested, under the readers' lock: at startup, requests that
+            # arrive during the first ingest wait for it instead of running their own
+            await self.ensure_ingested(max_age=interval / 2)
+            await asyncio.sleep(interval)
+
+    async def get_next_major_unlocks(self, limit: int = 5, horizon_days: Optional[float] = None,
+                                     min_unlock_percent: Optional[float] = None,
+                                     cliff_only: bool = False) -> List[UnlockEvent]:
+        """
+        Upcoming unlocks from the stored calendar, soonest first (a range query on unlock_date).
+        """
+        rows = await self._upcoming(limit, horizon_days, min_unlock_percent, cliff_only)
+        return [UnlockEvent(**row) for row in rows]
+
+    async def get_next_unlock_records(self, limit: int, horizon_days: Optional[float] = None,
+                                      min_unlock_percent: Optional[float] = None,
+                                      cliff_only: bool = False) -> List[EventRecord]:
+        """
+        Same query as get_next_major_unlocks, as EventRecords (no pydantic validation).
+        """
+        rows = await self._upcoming(limit, horizon_days, min_unlock_percent, cliff_only)
+        return [EventRecord(**row) for row in rows]
 
-    async def get_next_major_unlocks(self, limit: int = 5) -> List[UnlockEvent]:
-        # Aggregation logic would go here
-        all_unlocks = await self.fetch_token_unlocks()
-        # Filter for future events and sort by sooner dates
-        future_unlocks = [u for u in all_unlocks if u.unlock_date > datetime.now()]
-        future_unlocks.sort(key=lambda x: x.unlock_date)
-        return future_unlocks[:limit]
+    async def _upcoming(self, limit: Optional[int], horizon_days: Optional[float],
+                        min_unlock_percent: Optional[float], cliff_only: bool) -> List[dict]:
+        await self.ensure_ingested()
 
-    async def close(self):
-        await self.http_client.aclose()
+        now = utc_now()
+        end = now + timedelta(days=horizon_days) if horizon_days is not None else None
+        with STAGE_LATENCY.time(stage="calendar_query"):
+            return await unlock_store.query(now, end, limit, min_unlock_percent, cliff_only)
 
 unlock_service = UnlockDataService()
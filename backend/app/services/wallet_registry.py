@@ -0,0 +1,105 @@
+import csv
+import json
+import logging
+import os
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import record_error
+
+logger = logging.getLogger(__name__)
+
+# Seed set, extended by CEX_WALLETS_PATH
+BUILTIN_WALLETS = {
+    "0x28C6c06298d514Db089934071355E5743bf21d60": "Binance 14",
+    "0x21a31Ee1afC51d94C2eFcCAa2092aD1028285549": "Binance 15",
+    "0xf89d7b9c864f589bbf53a82105107622b35eaa40": "Bybit",
+}
+
+
+def normalize_address(address: str) -> bytes:
+    """
+    Any hex address form -> 20 raw bytes. Accepts checksum/lower/upper case, with or
+    without 0x, and 32-byte padded log topics (the address is the last 20 bytes).
+    """
+    hex_str = address[2:] if address[:2] in ("0x", "0X") else address
+    raw = bytes.fromhex(hex_str)
+    if len(raw) == 32:
+        raw = raw[12:]
+    if len(raw) != 20:
+        raise ValueError(f"Not an address: {address}")
+    return raw
+
+
+class CexWalletRegistry:
+    """
+    Labelled exchange deposit / hot wallets keyed by normalised 20-byte address,
+    so a lookup is one hash probe regardless of registry size or input casing.
+    """
+    def __init__(self, wallets: Optional[Dict[str, str]] = None):
+        self._labels: Dict[bytes, str] = {}
+        for address, label in (wallets or {}).items():
+            self.add(address, label)
+
+    def add(self, address: str, label: str):
+        self._labels[normalize_address(address)] = label
+
+    def load(self, path: str) -> int:
+        """
+        Load a CSV (`address,label` header) or JSON ({address: label} or
+        [{"address": ..., "label": ...}]) file. Returns the number of wallets read.
+        """
+        entries: Iterable[Tuple[str, str]]
+        with open(path, newline="") as f:
+            if path.endswith(".json"):
+                data = json.load(f)
+                if isinstance(data, dict):
+                    entries = data.items()
+                else:
+                    entries = ((row["address"], row.get("label", "")) for row in data)
+            else:
+                entries = ((row["address"], row.get("label", "")) for row in csv.DictReader(f))
+            count = 0
+            for address, label in entries:
+                try:
+                    self.add(address.strip(), label.strip())
+                    count += 1
+                except ValueError:
+                    continue
+        return count
+
+    def label(self, address: str) -> Optional[str]:
+        try:
+            return self._labels.get(normalize_address(address))
+        except ValueError:
+            return None
+
+    def __contains__(self, address: str) -> bool:
+        return self.label(address) is not None
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def padded_topics(self) -> List[str]:
+        """
+        Wallets as 32-byte log topics, for server-side eth_getLogs filtering.
+        """
+        return ["0x" + "0" * 24 + raw.hex() for raw in self._labels]
+
+
+def load_registry() -> CexWalletRegistry:
+    registry = CexWalletRegistry(BUILTIN_WALLETS)
+    if settings.CEX_WALLETS_PATH and os.path.exists(settings.CEX_WALLETS_PATH):
+        try:
+            registry.load(settings.CEX_WALLETS_PATH)
+        except Exception as e:
+            logger.warning("Error loading CEX wallet registry from %s: %r", settings.CEX_WALLETS_PATH, e)
+            record_error('wallet_registry', e)
+    return registry
+
+@lru_cache(maxsize=None)
+def get_wallet_registry() -> CexWalletRegistry:
+    """
+    The shared registry, loaded from CEX_WALLETS_PATH on first use.
+    """
+    return load_registry()
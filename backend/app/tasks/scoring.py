@@ -0,0 +1,188 @@
+import json
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from celery import chord, group
+from celery.utils.log import get_task_logger
+from app.core.celery_app import celery_app, run_async
+from app.core.config import settings
+from app.core.metrics import record_error
+from app.core.redis import get_redis
+from app.engine.calculator import TradeSignal, signal_engine
+from app.engine.pipeline import degraded_signal
+from app.services.market_data import market_service
+from app.services.onchain import onchain_service
+from app.services.unlock_store import utc_now
+from app.services.unlocks import UnlockEvent, unlock_service
+
+# Each worker process opens its own DuckDB (DUCKDB_WORKER_PATH, see celery_app): the
+# API holds an exclusive lock on DUCKDB_PATH, so everything shared between the API and
+# workers goes through Redis. A worker's calendar is ingested from the providers on first use,
+# its fitted model params are the API's copy (param_store.SHARED_KEY), and its signals are
+# read back by the API's dashboard refresh when SCORING_OFFLOAD is on (read_signals).
+
+logger = get_task_logger(__name__)
+
+SIGNAL_KEY = "signal:{token}:{unlock_date}"
+TOKEN_LOCK_KEY = "scoring:lock:{token}"
+
+
+def signal_key(token: str, unlock_date: datetime) -> str:
+    """
+    Result key per (token, unlock day), the calendar's dedup key, so re-running
+    or retrying a task overwrites the same entry instead of adding one.
+    """
+    return SIGNAL_KEY.format(token=token.upper(), unlock_date=unlock_date.date().isoformat())
+
+
+def _retry_or(task, exc: Exception, fallback):
+    """
+    Retry with exponential backoff; after SCORING_MAX_RETRIES return `fallback`
+    so the chord still completes (with a degraded signal) instead of failing.
+    """
+    if task.request.retries < settings.SCORING_MAX_RETRIES:
+        raise task.retry(exc=exc, countdown=min(2 ** task.request.retries, 30))
+    logger.error("%s failed after %d retries: %r", task.name, task.request.retries, exc)
+    record_error(task.name, exc)
+    return fallback
+
+
+@celery_app.task(bind=True)
+def fetch_market_data(self, symbol: str) -> Optional[List[float]]:
+    """
+    [avg daily USD volume, volatility, last close] for the UIS, None without candles.
+    """
+    try:
+        stats = run_async(signal_engine.market_stats(symbol))
+    except Exception as e:
+        return _retry_or(self, e, None)
+    return list(stats) if stats else None
+
+
+@celery_app.task(bind=True)
+def fetch_onchain_pressure(self, symbol: str, token_address: Optional[str]) -> Optional[float]:
+    """
+    CEX inflow pressure in [0, 1]; None if it could not be determined.
+    """
+    if not token_address:
+        return 0.0  # Not an Ethereum token: nothing to watch
+
+    async def pressure() -> float:
+        price = await market_service.get_current_price(symbol)
+        return await onchain_service.analyze_movement_to_cex(token_address, price_usd=price)
+
+    try:
+        return run_async(pressure())
+    except Exception as e:
+        return _retry_or(self, e, None)
+
+
+@celery_app.task
+def compute_signals(results: list, events: List[dict]) -> List[dict]:
+    """
+    Chord callback: UIS and signal for each of the token's events from the header results.
+    """
+    stats, pressure = results
+
+    async def score(event: UnlockEvent) -> TradeSignal:
+        if stats is None:
+            uis = 0.0  # Insufficient data
+        else:
+            uis = await signal_engine.uis_from_stats(event, *stats)
+        sig = signal_engine.build_signal(event, uis, onchain_confidence=pressure or 0.0)
+        if pressure is None:
+            sig.degraded = True
+            sig.reason += " (onchain unavailable)"
+        return sig
+
+    scored = []
+    for payload in events:
+        event = UnlockEvent(**payload)
+        try:
+            sig = run_async(score(event))
+        except Exception as e:
+            sig = degraded_signal(event, type(e).__name__)
+        scored.append({"event": payload, "signal": sig.model_dump(mode="json")})
+    return scored
+
+
+@celery_app.task(bind=True)
+def write_signals(self, scored: List[dict]) -> int:
+    """
+    Store each signal under its (token, unlock_date) key and release the token lock.
+    """
+    async def write():
+        async with get_redis().pipeline(transaction=True) as pipe:
+            for item in scored:
+                event = UnlockEvent(**item["event"])
+                pipe.set(signal_key(event.token_symbol, event.unlock_date), json.dumps(item["signal"]),
+                         ex=settings.SCORING_RESULT_TTL)
+            for token in {item["event"]["token_symbol"].upper() for item in scored}:
+                pipe.delete(TOKEN_LOCK_KEY.format(token=token))
+            await pipe.execute()
+
+    try:
+        run_async(write())
+    except Exception as e:
+        return _retry_or(self, e, 0)
+    return len(scored)
+
+
+def token_canvas(symbol: str, token_address: Optional[str], events: List[dict], queue: str):
+    """
+    chord(market data | on-chain pressure) -> compute_signals -> write_signals, all on `queue`.
+    """
+    header = group(
+        fetch_market_data.si(symbol).set(queue=queue),
+        fetch_onchain_pressure.si(symbol, token_address).set(queue=queue),
+    )
+    body = compute_signals.s(events).set(queue=queue) | write_signals.s().set(queue=queue)
+    return chord(header, body)
+
+
+async def dispatch(events: List[UnlockEvent]) -> Dict[str, int]:
+    """
+    Enqueue one chord per token, soonest unlock first. Tokens unlocking within
+    SCORING_HIGH_PRIORITY_HOURS go to high_priority. A token whose previous chord
+    is still running (lock held) is skipped. Returns tokens enqueued per queue.
+    """
+    by_token: Dict[str, List[UnlockEvent]] = {}
+    for event in sorted(events, key=lambda e: e.unlock_date):
+        by_token.setdefault(event.token_symbol.upper(), []).append(event)
+
+    cutoff = utc_now() + timedelta(hours=settings.SCORING_HIGH_PRIORITY_HOURS)
+    lock_ttl = max(int(settings.SCORING_INTERVAL * 2), 1)
+    redis = get_redis()
+    enqueued = {"high_priority": 0, "default": 0}
+    for token, token_events in by_token.items():
+        if not await redis.set(TOKEN_LOCK_KEY.format(token=token), "1", nx=True, ex=lock_ttl):
+            continue
+        queue = "high_priority" if token_events[0].unlock_date <= cutoff else "default"
+        token_address = next((e.token_address for e in token_events if e.token_address), None)
+        payload = [e.model_dump(mode="json") for e in token_events]
+        token_canvas(token, token_address, payload, queue).apply_async()
+        enqueued[queue] += 1
+    return enqueued
+
+
+async def read_signals(events: List[UnlockEvent]) -> List[Optional[TradeSignal]]:
+    """
+    Latest worker-computed signal per event (None if not scored yet), in event order.
+    """
+    if not events:
+        return []
+    values = await get_redis().mget([signal_key(e.token_symbol, e.unlock_date) for e in events])
+    return [TradeSignal.model_validate_json(v) if v else None for v in values]
+
+
+@celery_app.task
+def score_calendar(limit: Optional[int] = None) -> Dict[str, int]:
+    """
+    Beat entry point: fan the upcoming calendar out to per-token chords.
+    """
+    async def run() -> Dict[str, int]:
+        # Workers have no ingestion loop: refresh this process's calendar when due
+        await unlock_service.ensure_ingested(max_age=settings.UNLOCK_INGEST_INTERVAL)
+        events = await unlock_service.get_next_major_unlocks(limit=limit or settings.SCORING_CALENDAR_LIMIT)
+        return await dispatch(events)
+
+    return run_async(run())
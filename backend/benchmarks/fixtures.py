@@ -0,0 +1,191 @@
+"""
+Fixture layout (one gzipped JSON document):
+
+  recorded_at   ms timestamp the stub exchanges report as "now"
+  chain_head    block number the RPC stub reports
+  tokens        [{symbol, address, category, circulating}]
+  ohlcv         {"SYM/USDT": [[ts, o, h, l, c, v], ...]}
+  tickers       {"SYM/USDT": last}
+  books         {"SYM/USDT": {"bids": [[p, q]], "asks": [[p, q]]}}
+  logs          {token_address: [eth_getLogs result objects]}
+  unlocks       [{token_symbol, offset_hours, unlock_amount, unlock_percent,
+                  is_cliff, source, token_address, category}]
+"""
+import asyncio
+import gzip
+import json
+import os
+import random
+from typing import Dict, List, Optional
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+SYNTHETIC_PATH = os.path.join(FIXTURES_DIR, "synthetic.json.gz")
+RECORDED_PATH = os.path.join(FIXTURES_DIR, "recorded.json.gz")
+
+DAY_MS = 86_400_000
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+
+
+def generate(n_tokens: int = 200, n_candles: int = 120, n_unlocks: int = 10_000,
+             logs_per_token: int = 40, seed: int = 7) -> dict:
+    """
+    Deterministic synthetic fixtures with the same shapes as a recording.
+    """
+    from app.services.wallet_registry import BUILTIN_WALLETS
+
+    rng = random.Random(seed)
+    recorded_at = 1_760_000_000_000
+    last_day = recorded_at // DAY_MS * DAY_MS
+    head = 20_000_000
+    wallets = ["0x" + "0" * 24 + w[2:].lower() for w in BUILTIN_WALLETS]
+    categories = ["L1", "L2", "DeFi", "Gaming", "AI"]
+
+    fixtures = {"recorded_at": recorded_at, "chain_head": head, "tokens": [], "ohlcv": {}, "tickers": {},
+                "books": {}, "logs": {}, "unlocks": []}
+    for i in range(n_tokens):
+        symbol = f"TK{i:03d}"
+        address = "0x" + rng.getrandbits(160).to_bytes(20, "big").hex()
+        pair = f"{symbol}/USDT"
+        price = rng.uniform(0.05, 50.0)
+        base_volume = rng.uniform(1e5, 5e7) / price
+        candles = []
+        for d in range(n_candles):
+            open_ = price
+            price *= 1.0 + rng.gauss(0.0, 0.04)
+            high, low = max(open_, price) * (1 + rng.random() * 0.02), min(open_, price) * (1 - rng.random() * 0.02)
+            candles.append([last_day - (n_candles - 1 - d) * DAY_MS, open_, high, low, price,
+                            base_volume * rng.uniform(0.5, 1.5)])
+        fixtures["ohlcv"][pair] = candles
+        fixtures["tickers"][pair] = price
+        fixtures["books"][pair] = {
+            "bids": [[price * (1 - 0.0005 * (k + 1)), rng.uniform(10, 1000) / price * 100] for k in range(200)],
+            "asks": [[price * (1 + 0.0005 * (k + 1)), rng.uniform(10, 1000) / price * 100] for k in range(200)],
+        }
+        fixtures["logs"][address] = [
+            {
+                "address": address,
+                "blockNumber": hex(head - rng.randrange(7200)),
+                "transactionHash": "0x" + rng.getrandbits(256).to_bytes(32, "big").hex(),
+                "logIndex": hex(k),
+                "topics": [TRANSFER_TOPIC, "0x" + "0" * 24 + rng.getrandbits(160).to_bytes(20, "big").hex(),
+                           rng.choice(wallets)],
+                "data": hex(int(rng.uniform(1e3, 1e6) * 10 ** 18)),
+            }
+            for k in range(logs_per_token)
+        ]
+        fixtures["tokens"].append({"symbol": symbol, "address": address, "category": categories[i % len(categories)],
+                                   "circulating": base_volume * rng.uniform(50, 500)})
+
+    for j in range(n_unlocks):
+        token = fixtures["tokens"][j % n_tokens]
+        fixtures["unlocks"].append({
+            "token_symbol": token["symbol"],
+            # Exactly one day apart per token, so the calendar's (token, day) key keeps them all
+            "offset_hours": 24.0 * (1 + j // n_tokens) + (j % n_tokens) % 12,
+            "unlock_amount": token["circulating"] * rng.uniform(0.001, 0.05),
+            "unlock_percent": rng.uniform(0.1, 5.0),
+            "is_cliff": rng.random() < 0.3,
+            "source": "fixture",
+            "token_address": token["address"],
+            "category": token["category"],
+        })
+    return fixtures
+
+
+def save(fixtures: dict, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with gzip.open(path, "wt") as f:
+        json.dump(fixtures, f)
+
+
+def load(path: Optional[str] = None) -> dict:
+    """
+    A recording if one exists, else the synthetic set (generated on first use).
+    """
+    if path is None:
+        path = RECORDED_PATH if os.path.exists(RECORDED_PATH) else SYNTHETIC_PATH
+        if path == SYNTHETIC_PATH and not os.path.exists(path):
+            save(generate(), path)
+    with gzip.open(path, "rt") as f:
+        return json.load(f)
+
+
+async def record(symbols: List[str], path: str = RECORDED_PATH, candles: int = 120):
+    """
+    Capture live exchange / RPC / calendar responses into a fixture file.
+    Needs network access and the usual API keys.
+    """
+    from app.core.config import settings
+    from app.core.http import close_http_client, open_http_client
+    from app.services.market_data import market_service
+    from app.services.onchain import onchain_service
+    from app.services.unlock_store import utc_now
+    from app.services.unlocks import unlock_service
+
+    open_http_client()
+    exchange = market_service._exchange(settings.DEFAULT_EXCHANGE)
+    events = await unlock_service.get_next_major_unlocks(limit=10_000)
+    symbols = list(dict.fromkeys([s.upper() for s in symbols] + [e.token_symbol for e in events]))
+    addresses: Dict[str, str] = {e.token_symbol: e.token_address for e in events if e.token_address}
+
+    fixtures = {"recorded_at": exchange.milliseconds(), "chain_head": 0, "tokens": [], "ohlcv": {},
+                "tickers": {}, "books": {}, "logs": {}, "unlocks": []}
+    for symbol in symbols:
+        pair = market_service._format_symbol(symbol)
+        try:
+            fixtures["ohlcv"][pair] = await exchange.fetch_ohlcv(pair, "1d", limit=candles)
+            fixtures["tickers"][pair] = (await exchange.fetch_ticker(pair))["last"]
+            book = await exchange.fetch_order_book(pair, limit=200)
+            fixtures["books"][pair] = {"bids": book["bids"], "asks": book["asks"]}
+        except Exception as e:
+            print(f"Skipping {pair}: {e}")
+            continue
+        fixtures["tokens"].append({"symbol": symbol, "address": addresses.get(symbol), "category": None,
+                                   "circulating": None})
+
+    if settings.ALCHEMY_API_KEY and addresses:
+        head = await onchain_service.get_block_number()
+        fixtures["chain_head"] = head
+        topic_groups = onchain_service._cex_topic_groups()
+        for address in addresses.values():
+            responses = await onchain_service._rpc_batch([("eth_getLogs", [{
+                "address": address, "fromBlock": hex(head - settings.ONCHAIN_PRESSURE_WINDOW_BLOCKS),
+                "toBlock": hex(head), "topics": [TRANSFER_TOPIC, None, topics],
+            }]) for topics in topic_groups])
+            fixtures["logs"][address.lower()] = [log for r in responses for log in r.get("result") or []]
+
+    now = utc_now()  # Unlock dates are naive UTC
+    fixtures["unlocks"] = [
+        {**e.model_dump(exclude={"unlock_date"}), "offset_hours": (e.unlock_date - now).total_seconds() / 3600}
+        for e in events
+    ]
+    save(fixtures, path)
+    await market_service.close_all()
+    await close_http_client()
+    print(f"Recorded {len(fixtures['ohlcv'])} markets, {len(fixtures['unlocks'])} unlocks to {path}")
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    # Add backend to path
+    sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+
+    parser = argparse.ArgumentParser(description="Generate or record benchmark fixtures")
+    sub = parser.add_subparsers(dest="command", required=True)
+    gen = sub.add_parser("generate", help="Write the synthetic fixture set")
+    gen.add_argument("--tokens", type=int, default=200)
+    gen.add_argument("--unlocks", type=int, default=10_000)
+    gen.add_argument("--output", default=SYNTHETIC_PATH)
+    rec = sub.add_parser("record", help="Capture live responses (network and API keys required)")
+    rec.add_argument("symbols", nargs="*", help="Extra symbols besides those on the unlock calendar")
+    rec.add_argument("--output", default=RECORDED_PATH)
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        os.environ.setdefault("SECRET_KEY", "benchmark")
+        save(generate(n_tokens=args.tokens, n_unlocks=args.unlocks), args.output)
+        print(f"Wrote {args.output}")
+    else:
+        asyncio.run(record(args.symbols, args.output))
@@ -0,0 +1,263 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+TARGETS = ("calculate_uis", "generate_signal", "analyze_movement_to_cex", "dashboard")
+SIZES = (10, 100, 1000, 10000)
+
+# Offline defaults, applied before the app (and its settings) is imported. Each run
+# gets a fresh DuckDB file; outbound rate limits are off because the stubs model the
+# providers' latency themselves.
+BENCH_ENV = {
+    "SECRET_KEY": "benchmark",
+    "ALCHEMY_API_KEY": "benchmark",
+    "MESSARI_API_KEY": "",
+    "TOKEN_UNLOCKS_API_KEY": "",
+    "CRYPTORANK_API_KEY": "",
+    "REDIS_URL": "redis://127.0.0.1:1/0",  # Nothing listening: shared caches fall back to local
+    "UNLOCK_INGEST_ENABLED": "false",
+    "SNAPSHOT_REFRESH_ENABLED": "false",
+    "MARKET_STREAMING": "false",
+    "WARM_IMPORTS": "false",
+    "DASHBOARD_MAX_LIMIT": str(max(SIZES)),
+    "SIGNAL_EVENT_TIMEOUT": "60",
+    "HTTP_DEFAULT_RATE_LIMIT": "0",
+    "HTTP_HOST_RATE_LIMITS": "{}",
+    "HTTP_BACKOFF_BASE": "0.01",
+    "HTTP_BACKOFF_MAX": "0.1",
+}
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return float("nan")
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100.0 * len(ordered)) - 1))]
+
+
+async def timed(coro):
+    """
+    (latency ms, error name or None) for one awaited call.
+    """
+    start = time.perf_counter()
+    try:
+        await coro
+        error = None
+    except Exception as e:
+        error = type(e).__name__
+    return (time.perf_counter() - start) * 1000.0, error
+
+
+class Bench:
+    """
+    One measured workload per target. Engine targets score N events concurrently
+    (SIGNAL_CONCURRENCY, as the pipeline does) and sample per-event latency; the
+    dashboard target samples whole requests for N events.
+    """
+    def __init__(self, events, client):
+        from app.core.config import settings
+        self.events = events
+        self.client = client
+        self.concurrency = settings.SIGNAL_CONCURRENCY
+
+    async def _each(self, items, call):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(item):
+            async with semaphore:
+                return await timed(call(item))
+
+        return await asyncio.gather(*(bounded(item) for item in items))
+
+    async def calculate_uis(self, n: int):
+        from app.engine.calculator import signal_engine
+        return await self._each(self.events[:n], signal_engine.calculate_uis)
+
+    async def generate_signal(self, n: int):
+        from app.engine.calculator import signal_engine
+        return await self._each(self.events[:n], signal_engine.generate_signal)
+
+    async def analyze_movement_to_cex(self, n: int):
+        from app.services.market_data import market_service
+        from app.services.onchain import onchain_service
+
+        async def pressure(event):
+            price = await market_service.get_current_price(event.token_symbol)
+            return await onchain_service.analyze_movement_to_cex(event.token_address, price_usd=price)
+
+        return await self._each([e for e in self.events[:n] if e.token_address], pressure)
+
+    async def dashboard(self, n: int):
+        async def request():
+            response = await self.client.get("/api/v1/signals/dashboard", params={"limit": n})
+            response.raise_for_status()
+        return [await timed(request())]
+
+
+async def measure(bench: Bench, target: str, n: int, samples: int, min_iterations: int, repeats: int) -> dict:
+    """
+    Latency percentiles and throughput are the median over `repeats` independent
+    runs, so one run disturbed by the machine (GC, another process) does not move
+    the result; memory is measured once.
+    """
+    run = getattr(bench, target)
+    await run(n)  # Warm-up: fills the candle / transfer stores and caches, as in steady state
+
+    per_call = target == "dashboard"
+    p50, p99, throughput, total, errors = [], [], [], 0, 0
+    for _ in range(repeats):
+        latencies, wall, events = [], 0.0, 0
+        for _ in range(max(min_iterations, math.ceil(samples / n))):
+            start = time.perf_counter()
+            results = await run(n)
+            wall += time.perf_counter() - start
+            latencies.extend(ms for ms, _ in results)
+            errors += sum(1 for _, error in results if error)
+            events += n if per_call else len(results)
+        p50.append(percentile(latencies, 50))
+        p99.append(percentile(latencies, 99))
+        throughput.append(events / wall if wall else 0.0)  # Events per second
+        total += len(latencies)
+
+    # Separate pass for memory: tracemalloc slows allocation-heavy code considerably
+    tracemalloc.start()
+    try:
+        await run(n)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "p50_ms": round(statistics.median(p50), 3),
+        "p99_ms": round(statistics.median(p99), 3),
+        "throughput": round(statistics.median(throughput), 1),
+        "peak_mb": round(peak / 2**20, 2),
+        "samples": total,
+        "errors": errors,
+    }
+
+
+def regressions(current: dict, baseline: dict, tolerance: float, min_delta_ms: float, min_delta_mb: float):
+    """
+    Metrics worse than the baseline by more than `tolerance` (relative) and a minimum
+    absolute delta, so sub-millisecond noise does not fail the run.
+    """
+    found = []
+    for key, result in current.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for metric in ("p50_ms", "p99_ms"):
+            if result[metric] > base[metric] * (1 + tolerance) and result[metric] - base[metric] > min_delta_ms:
+                found.append(f"{key}: {metric} {base[metric]} -> {result[metric]}")
+        if result["throughput"] * (1 + tolerance) < base["throughput"]:
+            found.append(f"{key}: throughput {base['throughput']} -> {result['throughput']}")
+        if result["peak_mb"] > base["peak_mb"] * (1 + tolerance) and result["peak_mb"] - base["peak_mb"] > min_delta_mb:
+            found.append(f"{key}: peak_mb {base['peak_mb']} -> {result['peak_mb']}")
+        if result["errors"] > base["errors"] and not base.get("error_rate"):
+            found.append(f"{key}: errors {base['errors']} -> {result['errors']}")
+    return found
+
+
+async def run_suite(args) -> dict:
+    import httpx
+    from benchmarks import fixtures as fixture_data, stubs
+    from app.core.http import close_http_client
+    from app.main import app
+    from app.services.market_data import market_service
+    from app.services.unlocks import unlock_service
+
+    data = fixture_data.load(args.fixtures)
+    stubs.install(data, stubs.Faults(args.latency_ms, args.error_rate))
+    events = await unlock_service.get_next_major_unlocks(limit=max(args.sizes))
+
+    results = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        bench = Bench(events, client)
+        for target in args.targets:
+            for n in args.sizes:
+                if n > len(events):
+                    print(f"{target}/{n}: skipped, fixtures hold {len(events)} upcoming events")
+                    continue
+                result = await measure(bench, target, n, args.samples, args.min_iterations, args.repeats)
+                results[f"{target}/{n}"] = result
+                print(f"{target + '/' + str(n):<32} p50 {result['p50_ms']:>9.2f} ms  p99 {result['p99_ms']:>9.2f} ms  "
+                      f"{result['throughput']:>9.1f} ev/s  peak {result['peak_mb']:>7.2f} MB  "
+                      f"errors {result['errors']}")
+
+    await market_service.close_all()
+    await close_http_client()
+    return results
+
+
+def main(args):
+    for key, value in BENCH_ENV.items():
+        os.environ.setdefault(key, value)
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    os.environ.setdefault("DUCKDB_PATH", os.path.join(workdir, "bench.db"))
+
+    results = asyncio.run(run_suite(args))
+    meta = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "latency_ms": args.latency_ms,
+        "error_rate": args.error_rate,
+        "samples": args.samples,
+        "repeats": args.repeats,
+    }
+    for result in results.values():
+        result["error_rate"] = args.error_rate
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2, sort_keys=True)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against; run with --update-baseline first.")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline["meta"].get("latency_ms") != args.latency_ms:
+        print(f"Warning: baseline was recorded with --latency-ms {baseline['meta'].get('latency_ms')}")
+    found = regressions(results, baseline["results"], args.tolerance, args.min_delta_ms, args.min_delta_mb)
+    if found:
+        print("Regressions against baseline:")
+        for line in found:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"No regressions against baseline ({len(results)} measurements)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmarks against recorded exchange / RPC fixtures")
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=list(TARGETS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(SIZES), help="Events per measurement")
+    parser.add_argument("--samples", type=int, default=500, help="Latency samples to aim for per run")
+    parser.add_argument("--min-iterations", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=5, help="Independent runs per measurement; medians are reported")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Median injected latency per stub call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability a stub call fails")
+    parser.add_argument("--fixtures", help="Fixture file (default: recorded if present, else synthetic)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed relative slowdown")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="Ignore latency changes smaller than this")
+    parser.add_argument("--min-delta-mb", type=float, default=2.0, help="Ignore memory changes smaller than this")
+    parser.add_argument("--output", help="Also write this run's results as JSON")
+    main(parser.parse_args())
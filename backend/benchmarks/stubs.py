@@ -0,0 +1,184 @@
+import asyncio
+import bisect
+import json
+import random
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+DECIMALS = 18
+DAY_MS = 86_400_000
+
+
+class Faults:
+    """
+    Injected latency and failures shared by every stub: each call sleeps
+    latency_ms x lognormal(0, 0.5) and fails with probability error_rate.
+    """
+    def __init__(self, latency_ms: float = 0.0, error_rate: float = 0.0, seed: int = 11):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+
+    async def delay(self):
+        if self.latency_ms > 0:
+            await asyncio.sleep(self.latency_ms * self._rng.lognormvariate(0.0, 0.5) / 1000.0)
+
+    def should_fail(self) -> bool:
+        return self.error_rate > 0 and self._rng.random() < self.error_rate
+
+
+class StubExchange:
+    """
+    Replays recorded markets through the subset of the ccxt async API the services
+    use. The clock is frozen at the recording time so candle windows line up.
+    """
+    def __init__(self, exchange_id: str, fixtures: dict, faults: Faults):
+        self.id = exchange_id
+        self.faults = faults
+        self._now = fixtures["recorded_at"]
+        self._ohlcv: Dict[str, List[list]] = fixtures["ohlcv"]
+        self._timestamps = {pair: [c[0] for c in candles] for pair, candles in self._ohlcv.items()}
+        self._tickers: Dict[str, float] = fixtures["tickers"]
+        self._books: Dict[str, dict] = fixtures["books"]
+
+    async def _call(self, symbol: str, table: dict):
+        import ccxt.async_support as ccxt_async
+        await self.faults.delay()
+        if self.faults.should_fail():
+            raise ccxt_async.NetworkError(f"{self.id} stub: injected failure")
+        if symbol not in table:
+            raise ccxt_async.BadSymbol(f"{self.id} does not have market symbol {symbol}")
+
+    def milliseconds(self) -> int:
+        return self._now
+
+    @staticmethod
+    def parse_timeframe(timeframe: str) -> int:
+        units = {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+        return int(timeframe[:-1]) * units[timeframe[-1]]
+
+    async def fetch_ohlcv(self, symbol: str, timeframe: str = '1d', since: Optional[int] = None,
+                          limit: Optional[int] = None) -> List[list]:
+        await self._call(symbol, self._ohlcv)
+        candles = self._ohlcv[symbol]
+        if since is not None:
+            candles = candles[bisect.bisect_left(self._timestamps[symbol], since):]
+            return [list(c) for c in candles[:limit]]
+        return [list(c) for c in candles[-limit:]] if limit else [list(c) for c in candles]
+
+    async def fetch_ticker(self, symbol: str) -> dict:
+        await self._call(symbol, self._tickers)
+        last = self._tickers[symbol]
+        return {"symbol": symbol, "last": last, "timestamp": self._now}
+
+    async def fetch_order_book(self, symbol: str, limit: Optional[int] = None) -> dict:
+        await self._call(symbol, self._books)
+        book = self._books[symbol]
+        return {"symbol": symbol, "bids": book["bids"][:limit], "asks": book["asks"][:limit], "timestamp": self._now}
+
+    async def close(self):
+        pass
+
+
+class ProviderStub:
+    """
+    ASGI app answering the HTTP providers by host: Alchemy JSON-RPC (batched
+    eth_blockNumber / eth_getLogs / eth_call), Messari supply metrics, and empty
+    calendars for the unlock sources (the calendar is preloaded into DuckDB).
+    Injected failures are 503s, which exercise the shared client's retries.
+    """
+    def __init__(self, fixtures: dict, faults: Faults):
+        self.faults = faults
+        self.head = fixtures["chain_head"]
+        self.logs = {addr.lower(): logs for addr, logs in fixtures["logs"].items()}
+        self.supply = {t["address"].lower(): t["circulating"] for t in fixtures["tokens"]
+                       if t.get("address") and t.get("circulating")}
+        self.supply_by_symbol = {t["symbol"].lower(): t["circulating"] for t in fixtures["tokens"]
+                                 if t.get("circulating")}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        await self.faults.delay()
+        if self.faults.should_fail():
+            return await self._respond(send, 503, {"error": "injected failure"})
+
+        host = dict(scope["headers"]).get(b"host", b"").decode()
+        if host.startswith("eth-mainnet."):
+            payload = json.loads(body)
+            if isinstance(payload, list):
+                return await self._respond(send, 200, [self.rpc(call) for call in payload])
+            return await self._respond(send, 200, self.rpc(payload))
+        if host == "data.messari.io":
+            symbol = scope["path"].split("/")[4]
+            circulating = self.supply_by_symbol.get(symbol)
+            if circulating is None:
+                return await self._respond(send, 404, {"status": {"error_message": "Asset not found"}})
+            return await self._respond(send, 200, {"data": {"supply": {"circulating": circulating, "y_2050": None}}})
+        return await self._respond(send, 200, {"data": []})
+
+    @staticmethod
+    async def _respond(send, status: int, payload):
+        body = json.dumps(payload).encode()
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+    def rpc(self, call: dict) -> dict:
+        method, params = call["method"], call.get("params") or []
+        reply = {"jsonrpc": "2.0", "id": call.get("id")}
+        if method == "eth_blockNumber":
+            return {**reply, "result": hex(self.head)}
+        if method == "eth_getLogs":
+            query = params[0]
+            lo, hi = int(query["fromBlock"], 16), int(query["toBlock"], 16)
+            topics = query.get("topics") or []
+            to_topics = topics[2] if len(topics) > 2 else None
+            logs = [
+                log for log in self.logs.get(query["address"].lower(), [])
+                if lo <= int(log["blockNumber"], 16) <= hi and (not to_topics or log["topics"][2] in to_topics)
+            ]
+            return {**reply, "result": logs}
+        if method == "eth_call":
+            to, data = params[0]["to"].lower(), params[0]["data"]
+            if data == "0x313ce567":  # decimals()
+                return {**reply, "result": hex(DECIMALS)}
+            if data == "0x18160ddd" and to in self.supply:  # totalSupply()
+                return {**reply, "result": hex(int(self.supply[to] * 10 ** DECIMALS))}
+            return {**reply, "result": "0x"}
+        return {**reply, "error": {"code": -32601, "message": f"method {method} not supported by stub"}}
+
+
+def install(fixtures: dict, faults: Faults) -> dict:
+    """
+    Point the live services at the stubs: every exchange connector, the shared HTTP
+    client, and the unlock calendar (recorded offsets re-anchored to now).
+    Returns the per-component objects for inspection.
+    """
+    import httpx
+    from app.core.http import HttpClient, open_http_client
+    from app.services.market_data import EXCHANGE_IDS, market_service
+    from app.services.unlock_store import unlock_store, utc_now
+    from app.services.unlocks import unlock_service
+    import time
+
+    for exchange_id in EXCHANGE_IDS:
+        market_service.exchanges[exchange_id] = StubExchange(exchange_id, fixtures, faults)
+
+    provider = ProviderStub(fixtures, faults)
+    open_http_client(HttpClient(transport=httpx.ASGITransport(app=provider)))
+
+    now = utc_now()
+    unlock_store.upsert_sync([
+        {**{k: v for k, v in u.items() if k != "offset_hours"}, "unlock_date": now + timedelta(hours=u["offset_hours"])}
+        for u in fixtures["unlocks"]
+    ])
+    unlock_service._ingested_at = time.monotonic()  # Calendar is preloaded: no provider ingestion
+    return {"exchanges": dict(market_service.exchanges), "provider": provider}
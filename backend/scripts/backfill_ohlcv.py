@@ -0,0 +1,37 @@
+import argparse
+import asyncio
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+
+from app.core.database import db
+from app.services.market_data import market_service
+
+async def main(args):
+    if args.db:
+        db.path = args.db
+    since = datetime.now(timezone.utc) - timedelta(days=args.days)
+    try:
+        for symbol in args.symbols:
+            print(f"Backfilling {symbol} {args.timeframe} on {args.exchange} since {since:%Y-%m-%d}...")
+            written = await market_service.backfill_ohlcv(
+                symbol, exchange_id=args.exchange, timeframe=args.timeframe, since=since
+            )
+            print(f"  {written} candles stored")
+    finally:
+        await market_service.close_all()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Backfill the local OHLCV candle store. Run with the API stopped (DuckDB locks "
+                    "its file per process), or write to another file with --db."
+    )
+    parser.add_argument("symbols", nargs="+", help="e.g. ARB SUI BTC/USDT")
+    parser.add_argument("--exchange", default="binance")
+    parser.add_argument("--timeframe", default="1d")
+    parser.add_argument("--days", type=int, default=5 * 365)
+    parser.add_argument("--db", help="DuckDB file to use instead of DUCKDB_PATH, which the running API keeps locked")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,62 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../')
+
+# Cold import budgets in milliseconds for the entry points of each process type
+BUDGETS_MS = {
+    "app.core.config": 250,
+    "app.engine.calculator": 600,
+    "app.core.celery_app": 400,
+    "app.main": 1500,
+}
+
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def measure(module: str):
+    """
+    Import `module` in a fresh interpreter with -X importtime.
+    Returns (cumulative ms, [(cumulative ms, package) for the slowest top-level packages]).
+    """
+    env = {**os.environ, "SECRET_KEY": os.environ.get("SECRET_KEY", "import-budget")}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    rows = [(int(m.group(2)) / 1000, len(m.group(3)), m.group(4)) for m in map(LINE.match, proc.stderr.splitlines()) if m]
+    total = next(ms for ms, _, name in reversed(rows) if name == module)
+    packages = {}
+    for ms, _, name in rows:
+        if "." not in name and not name.startswith("_") and name not in ("app", "site", "encodings"):
+            packages[name] = max(ms, packages.get(name, 0.0))
+    return total, sorted(((ms, name) for name, ms in packages.items()), reverse=True)
+
+def main(args):
+    budgets = {m: BUDGETS_MS.get(m, args.budget) for m in (args.modules or BUDGETS_MS)}
+    over = []
+    for module, budget in budgets.items():
+        # Best of N: the first run also pays for .pyc compilation and a cold page cache
+        runs = [measure(module) for _ in range(args.repeat)]
+        total, slowest = min(runs, key=lambda r: r[0])
+        status = "ok" if total <= budget else "OVER"
+        print(f"{module:<28} {total:8.1f} ms  (budget {budget} ms)  {status}")
+        for ms, name in slowest[:args.top]:
+            print(f"    {ms:8.1f} ms  {name}")
+        if total > budget:
+            over.append(module)
+    if over:
+        print(f"Import budget exceeded: {', '.join(over)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check cold import time of service entry points")
+    parser.add_argument("modules", nargs="*", help="Defaults to every module in BUDGETS_MS")
+    parser.add_argument("--budget", type=float, default=500, help="Budget (ms) for modules not in BUDGETS_MS")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=5, help="Slowest packages to list")
+    main(parser.parse_args())
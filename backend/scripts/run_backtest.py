@@ -0,0 +1,51 @@
+import argparse
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+
+from app.core.database import db
+from app.engine.backtest import BacktestConfig, run_backtest_sync, sweep_sync, write_back_sync
+
+def report(result):
+    print(f"window -{result.config.pre_days}d/+{result.config.post_days}d: {result.n_events} events, "
+          f"short > {result.short_threshold:.3f}, long < {result.long_threshold:.3f}, "
+          f"objective {result.objective:+.3f}")
+
+def main(args):
+    if args.db:
+        db.path = args.db
+    base = BacktestConfig(pre_days=args.pre, post_days=args.post, exchange=args.exchange, workers=args.workers)
+    if args.sweep:
+        windows = [tuple(int(x) for x in w.split(":")) for w in args.sweep.split(",")]
+        results = sweep_sync(windows, base)
+        for result in results:
+            report(result)
+        best = max(results, key=lambda r: r.objective) if results else None
+    else:
+        best = run_backtest_sync(base)
+        if best is not None:
+            report(best)
+    if best is None:
+        print("No unlocks with enough candle history; backfill OHLCV first.")
+        return
+    for symbol, factor in sorted(best.token_factors.items()):
+        print(f"  {symbol:<10} dump factor {factor:.3f}")
+    if args.write:
+        write_back_sync(best)
+        print(f"Wrote parameters for window -{best.config.pre_days}d/+{best.config.post_days}d")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Replay historical unlocks and fit engine parameters. Run with the API stopped "
+                    "(DuckDB locks its file per process), or work on a copy with --db."
+    )
+    parser.add_argument("--pre", type=int, default=7, help="Days before the unlock to enter")
+    parser.add_argument("--post", type=int, default=14, help="Days after the unlock to exit")
+    parser.add_argument("--sweep", help="Comma-separated pre:post windows, e.g. 3:7,7:14,14:30")
+    parser.add_argument("--exchange", default="binance")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--write", action="store_true", help="Write the (best) fit back for the live engine")
+    parser.add_argument("--db", help="DuckDB file to use instead of DUCKDB_PATH, which the running API keeps locked")
+    main(parser.parse_args())
@@ -10,6 +10,8 @@ from app.services.unlocks import unlock_service
 
 async def main():
     print("--- Antigravity Engine Test ---")
+    from app.core.http import open_http_client
+    open_http_client()
     
     # 1. Fetch Mock Events
     print("Fetching Unlocks...")
@@ -30,10 +32,11 @@ async def main():
         except Exception as e:
             print(f"Error analyzing {event.token_symbol}: {e}")
 
-    await unlock_service.close()
-    # Close other services if needed (market_service auto-closes usually or needs explicit close)
+    # Close shared clients (market_service auto-closes usually or needs explicit close)
+    from app.core.http import close_http_client
     from app.services.market_data import market_service
     await market_service.close_all()
+    await close_http_client()
 
 if __name__ == "__main__":
     asyncio.run(main())
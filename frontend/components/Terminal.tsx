@@ -6,7 +6,7 @@ import { useStore, TradeSignal } from '@/lib/store/useStore'
 import { cn } from '@/lib/utils'
 
 export default function Terminal() {
-    const { signals, setSignals, isConnected, setConnected } = useStore()
+    const { signals, setSignals, applySignalDiff, isConnected, setConnected } = useStore()
     const [logs, setLogs] = useState<string[]>([])
     const logsEndRef = useRef<HTMLDivElement>(null)
 
@@ -17,7 +17,10 @@ export default function Terminal() {
 
     // Connect to Real Backend
     useEffect(() => {
-        setConnected(true)
+        const log = (msg: string) =>
+            setLogs(prev => [...prev, `[${new Date().toLocaleTimeString()}] ${msg}`].slice(-20))
+
+        let interval: ReturnType<typeof setInterval> | undefined
 
         const fetchSignals = async () => {
             try {
@@ -25,25 +28,75 @@ export default function Terminal() {
                 const res = await fetch('/api/python/signals/dashboard')
                 if (res.ok) {
                     const data = await res.json()
-                    // Update global store
-                    // we can use the setSignals we destructured, but inside async sometimes clojures are tricky
-                    // safest to just call setSignals from the closure if valid
                     setSignals(data)
-                    setLogs(prev => [...prev, `[${new Date().toLocaleTimeString()}] Sync: ${data.length} active signals`].slice(-20))
+                    log(`Sync: ${data.length} active signals`)
                 }
             } catch (e) {
-                setLogs(prev => [...prev, `[${new Date().toLocaleTimeString()}] Connection Error: Retrying...`].slice(-20))
+                log('Connection Error: Retrying...')
             }
         }
 
-        // Initial Fetch
-        fetchSignals()
+        // Push stream (SSE). EventSource reconnects by itself after a dropped connection;
+        // only when it gives up (CLOSED) or keeps failing do we poll every 5s, and retry
+        // the stream every 30s until it comes back.
+        let source: EventSource | undefined
+        let failures = 0
+        let retry: ReturnType<typeof setTimeout> | undefined
+        let disposed = false
+
+        const startPolling = () => {
+            if (interval !== undefined) return
+            log('Stream unavailable: falling back to polling')
+            setConnected(true)
+            fetchSignals()
+            interval = setInterval(fetchSignals, 5000)
+        }
 
-        // Poll every 5s
-        const interval = setInterval(fetchSignals, 5000)
+        const stopPolling = () => {
+            if (interval === undefined) return
+            clearInterval(interval)
+            interval = undefined
+            log('Stream restored')
+        }
 
-        return () => clearInterval(interval)
-    }, [setConnected, setSignals])
+        const connect = () => {
+            retry = undefined
+            if (disposed) return
+            const es = new EventSource('/api/python/signals/stream')
+            source = es
+            es.onopen = () => {
+                failures = 0
+                setConnected(true)
+                stopPolling()
+            }
+            es.onmessage = (e) => {
+                const msg = JSON.parse(e.data)
+                if (msg.type === 'snapshot') {
+                    setSignals(msg.signals)
+                    log(`Sync: ${msg.signals.length} active signals`)
+                } else if (msg.type === 'diff') {
+                    applySignalDiff(msg.upserts, msg.removed)
+                    log(`Update: ${msg.upserts.length} changed, ${msg.removed.length} removed`)
+                }
+            }
+            es.onerror = () => {
+                failures += 1
+                if (es.readyState !== EventSource.CLOSED && failures < 3) return
+                es.close()
+                startPolling()
+                if (retry === undefined) retry = setTimeout(connect, 30000)
+            }
+        }
+
+        connect()
+
+        return () => {
+            disposed = true
+            source?.close()
+            if (retry !== undefined) clearTimeout(retry)
+            if (interval !== undefined) clearInterval(interval)
+        }
+    }, [setConnected, setSignals, applySignalDiff])
 
     return (
         <div className="flex h-screen w-full flex-col bg-white text-black font-mono text-sm">
@@ -9,12 +9,14 @@ export interface TradeSignal {
     confidence: number
     expected_move_pct: number
     reason: string
+    degraded?: boolean
 }
 
 interface AppState {
     signals: TradeSignal[]
     setSignals: (signals: TradeSignal[]) => void
     addSignal: (signal: TradeSignal) => void
+    applySignalDiff: (upserts: TradeSignal[], removed: string[]) => void
     isConnected: boolean
     setConnected: (status: boolean) => void
 }
@@ -23,6 +25,12 @@ export const useStore = create<AppState>((set) => ({
     signals: [],
     setSignals: (signals) => set({ signals }),
     addSignal: (signal) => set((state) => ({ signals: [signal, ...state.signals].slice(0, 50) })),
+    applySignalDiff: (upserts, removed) => set((state) => {
+        const byToken = new Map(state.signals.map((s) => [s.token, s]))
+        removed.forEach((token) => byToken.delete(token))
+        upserts.forEach((s) => byToken.set(s.token, s))
+        return { signals: Array.from(byToken.values()) }
+    }),
     isConnected: false,
     setConnected: (status) => set({ isConnected: status }),
 }))